@@ -66,8 +66,8 @@ if st.button("Predict Fraud"):
 st.write("---")
 
 # File upload for batch processing
-st.subheader("Upload a CSV/XLS file for batch fraud detection")
-uploaded_file = st.file_uploader("Upload your CSV or XLS file", type=["csv", "xls", "xlsx"])
+st.subheader("Upload a CSV/XLS/Parquet file for batch fraud detection")
+uploaded_file = st.file_uploader("Upload your CSV, XLS, Parquet or Arrow file", type=["csv", "xls", "xlsx", "parquet", "arrow", "feather"])
 
 if uploaded_file is not None:
     st.write("File uploaded successfully!")
@@ -86,9 +86,15 @@ if uploaded_file is not None:
                     if file_response.status_code == 200:
                         # Determine file type and extension
                         content_type = file_response.headers.get("Content-Type", "")
-                        if "excel" in content_type:
+                        if "spreadsheetml" in content_type or "excel" in content_type:
                             file_extension = "xlsx"
                             mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        elif "parquet" in content_type:
+                            file_extension = "parquet"
+                            mime_type = content_type
+                        elif "arrow" in content_type:
+                            file_extension = "arrow"
+                            mime_type = content_type
                         else:
                             file_extension = "csv"
                             mime_type = "text/csv"
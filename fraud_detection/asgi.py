@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fraud_detection.settings')
 
 application = get_asgi_application()
+
+# Serving processes follow the model registry; imported once the apps are loaded
+from model.scoring import start_serving  # noqa: E402
+
+start_serving()
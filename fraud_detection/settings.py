@@ -71,6 +71,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'model.profiling.ProfilingMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -159,3 +160,135 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Model serving
+# Rows passed to a single model.predict call when scoring uploaded files
+PREDICT_CHUNK_SIZE = int(os.environ.get("PREDICT_CHUNK_SIZE", 8192))
+
+# Inference runtime: "keras" loads model.h5 with TensorFlow, "numpy" runs the
+# exported weights without importing TensorFlow
+MODEL_RUNTIME = os.environ.get("MODEL_RUNTIME", "keras")
+NUMPY_MODEL_PATH = os.environ.get("NUMPY_MODEL_PATH", os.path.join(BASE_DIR, "model", "model.npz"))
+# Weight precision loaded by the NumPy runtime. Keep "float32": the "float16"/"int8"
+# variants built by compare_model_variants are widened to float32 on every call,
+# so they cost more CPU, and are only meant for measuring accuracy loss
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION", "float32")
+
+# Batch sizes of the compiled small-batch inference path (single records and
+# micro-batches, padded up to the next size); larger batches use model.predict.
+# Every size is run once when a model version is loaded
+SMALL_BATCH_BUCKETS = tuple(int(size) for size in os.environ.get("SMALL_BATCH_BUCKETS", "1,2,4,8,16,32").split(","))
+
+# Micro-batching of concurrent /model/predict/ requests (useful with threaded workers)
+PREDICT_BATCHING = os.environ.get("PREDICT_BATCHING", "0") == "1"
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get("PREDICT_BATCH_MAX_SIZE", 32))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.environ.get("PREDICT_BATCH_MAX_WAIT_MS", 2))
+
+# Rows read, scored and written at a time when streaming CSV uploads through predict_file
+PREDICT_FILE_CHUNK_ROWS = int(os.environ.get("PREDICT_FILE_CHUNK_ROWS", 50000))
+# CSV uploads are read with chunked pd.read_csv; "arrow" parses them with Arrow's
+# multithreaded reader in blocks of this many bytes instead, which is faster but
+# holds more memory in read-ahead buffers (see production.md)
+PREDICT_FILE_CSV_READER = os.environ.get("PREDICT_FILE_CSV_READER", "pandas")
+PREDICT_FILE_CSV_BLOCK_BYTES = int(os.environ.get("PREDICT_FILE_CSV_BLOCK_BYTES", 1024 * 1024))
+
+# File uploads: files larger than FILE_UPLOAD_MAX_MEMORY_SIZE are streamed to a
+# temporary file in FILE_UPLOAD_TEMP_DIR in 64 KB chunks and scored from disk;
+# reading stops with a 413 once a file passes UPLOAD_MAX_BYTES
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 1024 * 1024 * 1024))
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get("FILE_UPLOAD_MAX_MEMORY_SIZE", 2.5 * 1024 * 1024))
+FILE_UPLOAD_TEMP_DIR = os.environ.get("FILE_UPLOAD_TEMP_DIR") or None
+FILE_UPLOAD_HANDLERS = [
+    "model.uploads.UploadSizeLimitHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Background scoring jobs (/model/jobs/); SCORING_JOBS_DIR must be shared by all
+# workers on the host, since any worker may answer for a job
+SCORING_JOBS_DIR = os.environ.get("SCORING_JOBS_DIR", os.path.join(BASE_DIR, "scoring_jobs"))
+SCORING_JOB_WORKERS = int(os.environ.get("SCORING_JOB_WORKERS", 2))
+SCORING_JOB_RETENTION_HOURS = float(os.environ.get("SCORING_JOB_RETENTION_HOURS", 24))
+# A running job whose status has not changed for this long is marked failed
+# when the next job is submitted; its worker was restarted or crashed
+SCORING_JOB_STALE_MINUTES = float(os.environ.get("SCORING_JOB_STALE_MINUTES", 30))
+
+# Caches: "predictions" holds predict_json results in a SQLite file shared by all
+# workers on the host, with a TTL and least-recently-used eviction
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "predictions": {
+        "BACKEND": "model.cache.SQLiteLRUCache",
+        "LOCATION": os.environ.get("PREDICTION_CACHE_PATH", os.path.join(BASE_DIR, "cache", "predictions.sqlite3")),
+        "TIMEOUT": int(os.environ.get("PREDICTION_CACHE_TTL", 24 * 3600)),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("PREDICTION_CACHE_MAX_ENTRIES", 100_000))},
+    },
+    "signatures": {
+        "BACKEND": "model.cache.SQLiteLRUCache",
+        "LOCATION": os.environ.get("SIGNATURE_CACHE_PATH", os.path.join(BASE_DIR, "cache", "signatures.sqlite3")),
+        "TIMEOUT": int(os.environ.get("SIGNATURE_CACHE_TTL", 7 * 24 * 3600)),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("SIGNATURE_CACHE_MAX_ENTRIES", 20_000))},
+    },
+}
+PREDICTION_CACHE_ENABLED = os.environ.get("PREDICTION_CACHE_ENABLED", "0") == "1"
+
+# Signature verification Space (/model/verify_signature/). SIGNATURE_API_SRC takes
+# a Space name or a URL, e.g. a local stand-in Gradio app in tests
+SIGNATURE_API_SRC = os.environ.get("SIGNATURE_API_SRC", "Abhij12/signauth")
+SIGNATURE_POOL_SIZE = int(os.environ.get("SIGNATURE_POOL_SIZE", 4))
+SIGNATURE_CONNECT_TIMEOUT = float(os.environ.get("SIGNATURE_CONNECT_TIMEOUT", 5))
+SIGNATURE_READ_TIMEOUT = float(os.environ.get("SIGNATURE_READ_TIMEOUT", 60))
+
+# Reuse parsed verify_signature results for the same image and reference number
+# (the "signatures" cache above)
+SIGNATURE_CACHE_ENABLED = os.environ.get("SIGNATURE_CACHE_ENABLED", "0") == "1"
+
+# Bulk signature verification (/model/verify_signature_bulk/): concurrent remote
+# calls per request (also capped by SIGNATURE_POOL_SIZE), per-item timeout and retries, and the circuit breaker that
+# fails fast after SIGNATURE_BREAKER_FAILURES consecutive upstream errors. Zip members are refused before
+# decompression when one is larger than SIGNATURE_BULK_MAX_FILE_BYTES or all of them together exceed
+# SIGNATURE_BULK_MAX_TOTAL_BYTES uncompressed
+SIGNATURE_BULK_MAX_ITEMS = int(os.environ.get("SIGNATURE_BULK_MAX_ITEMS", 1000))
+SIGNATURE_BULK_MAX_FILE_BYTES = int(os.environ.get("SIGNATURE_BULK_MAX_FILE_BYTES", 10 * 1024 * 1024))
+SIGNATURE_BULK_MAX_TOTAL_BYTES = int(os.environ.get("SIGNATURE_BULK_MAX_TOTAL_BYTES", 256 * 1024 * 1024))
+SIGNATURE_BULK_CONCURRENCY = int(os.environ.get("SIGNATURE_BULK_CONCURRENCY", 4))
+SIGNATURE_BULK_ITEM_TIMEOUT = float(os.environ.get("SIGNATURE_BULK_ITEM_TIMEOUT", 60))
+SIGNATURE_BULK_RETRIES = int(os.environ.get("SIGNATURE_BULK_RETRIES", 2))
+SIGNATURE_BREAKER_FAILURES = int(os.environ.get("SIGNATURE_BREAKER_FAILURES", 5))
+SIGNATURE_BREAKER_RESET_SECONDS = float(os.environ.get("SIGNATURE_BREAKER_RESET_SECONDS", 30))
+
+# Opt-in cProfile capture of single /model/ requests, triggered by an X-Profile
+# header or ?profile= query value ("1", or PROFILING_TOKEN when set). Profiles
+# are listed and downloaded by staff users at /model/profiles/
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 50))
+
+# Store every scored record with its predicted category and model version in
+# InsuranceData (run migrations first); uploads are inserted in bulk, one
+# transaction per PERSIST_CHUNK_ROWS rows, once the whole file has been scored
+PERSIST_PREDICTIONS = os.environ.get("PERSIST_PREDICTIONS", "0") == "1"
+PERSIST_CHUNK_ROWS = int(os.environ.get("PERSIST_CHUNK_ROWS", 5000))
+
+# Page size of the stored prediction history at /model/predictions/
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", 100))
+HISTORY_MAX_PAGE_SIZE = int(os.environ.get("HISTORY_MAX_PAGE_SIZE", 1000))
+
+# Async views under /model/async/ (served with an ASGI server) run preprocessing
+# and inference on this many threads; further requests wait, up to
+# ASYNC_INFERENCE_MAX_PENDING, and are then refused with 503
+ASYNC_INFERENCE_WORKERS = int(os.environ.get("ASYNC_INFERENCE_WORKERS", 4))
+ASYNC_INFERENCE_MAX_PENDING = int(os.environ.get("ASYNC_INFERENCE_MAX_PENDING", 64))
+
+# Largest JSON batch accepted by /model/predict_batch/, in records and in request bytes
+BATCH_SCORING_MAX_RECORDS = int(os.environ.get("BATCH_SCORING_MAX_RECORDS", 1000))
+BATCH_SCORING_MAX_BYTES = int(os.environ.get("BATCH_SCORING_MAX_BYTES", 5 * 1024 * 1024))
+
+# Versioned model registry (publish_model / activate_model commands). Workers
+# poll the ACTIVE file every MODEL_REGISTRY_POLL_SECONDS (0 disables polling)
+# and swap in a newly activated version once it is loaded and warmed; without
+# an activated version the built-in model/model.h5 is served
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(BASE_DIR, "model_registry"))
+MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get("MODEL_REGISTRY_POLL_SECONDS", 10))
@@ -17,9 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from .views import welcome_view
+from model.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('model/', include('model.urls')),
+    path('metrics', metrics_view, name="metrics"),
     path('', welcome_view),
 ]
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# Queued by close() to stop the background thread once earlier rows are scored
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one model call.
+
+    Callers block in submit() while a background thread gathers pending rows
+    until either max_batch_size rows are waiting or the oldest row has waited
+    max_wait_ms, then scores them together and hands each caller its own row
+    of probabilities.
+
+    close() stops the thread and releases predict_fn (and the model it is
+    bound to) once pending rows are scored; rows submitted afterwards are
+    scored directly by the caller.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0, stats_window=1024):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        # Stats: batch size histogram, recent queue waits in seconds, totals
+        self._batch_sizes = Counter()
+        self._waits = deque(maxlen=stats_window)
+        self._rows = 0
+        self._errors = 0
+
+    def submit(self, row):
+        """
+        Scores one feature row and returns its class probabilities.
+        """
+        row = np.asarray(row, dtype=np.float32)
+        future = Future()
+        with self._lock:
+            # Checked under the lock, so no row is queued behind the stop marker
+            queued = not self._closed
+            if queued:
+                self._ensure_started()
+                self._queue.put((time.perf_counter(), row, future))
+        if not queued:
+            return self.predict_fn(row[np.newaxis])[0]
+        return future.result()
+
+    def close(self):
+        """
+        Stops the background thread after the rows already queued are scored.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(_STOP)
+
+    def _ensure_started(self):
+        # Called with self._lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+            self._thread.start()
+
+    def _collect(self):
+        """
+        Blocks for the first pending row, then gathers more until the batch is full or its wait budget is spent.
+
+        Returns:
+        tuple: (items, stop), stop being True once close() was called; items may then be empty.
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        items = [item]
+        deadline = items[0][0] + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            items, stop = self._collect()
+            if not items:
+                continue
+            dispatched = time.perf_counter()
+
+            try:
+                predictions = self.predict_fn(np.stack([row for _, row, _ in items]))
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                predictions = None
+
+            with self._lock:
+                self._batch_sizes[len(items)] += 1
+                self._waits.extend(dispatched - enqueued for enqueued, _, _ in items)
+                if predictions is None:
+                    self._errors += 1
+                else:
+                    self._rows += len(items)
+
+            if predictions is not None:
+                for (_, _, future), prediction in zip(items, predictions):
+                    future.set_result(prediction)
+
+    def stats(self):
+        """
+        Batch-size histogram and queue-wait percentiles (in milliseconds) for tuning max_batch_size and max_wait_ms.
+        """
+        with self._lock:
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            waits = np.array(self._waits) * 1000
+            rows, errors = self._rows, self._errors
+
+        batches = sum(batch_sizes.values())
+        batched_rows = sum(size * count for size, count in batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": batches,
+            "rows": rows,
+            "errors": errors,
+            "mean_batch_size": batched_rows / batches if batches else 0.0,
+            "batch_size_histogram": batch_sizes,
+            "queue_wait_ms": {
+                f"p{q}": float(np.percentile(waits, q)) if len(waits) else 0.0 for q in (50, 90, 99)
+            } | {"max": float(waits.max()) if len(waits) else 0.0},
+        }
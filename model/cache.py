@@ -0,0 +1,341 @@
+import asyncio
+import collections
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+from .metrics import PREDICTION_CACHE_LOOKUPS
+
+
+class SQLiteLRUCache(BaseCache):
+    """
+    Django cache backend kept in a local SQLite file, so every gunicorn worker
+    on the host shares the same entries.
+
+    Entries expire after their timeout, and once the table grows past
+    MAX_ENTRIES the least recently read entries are evicted. The size check
+    runs every CULL_CHECK_INTERVAL writes per process, so the table may
+    briefly exceed MAX_ENTRIES by that many rows. A read only refreshes an
+    entry's access time once it is ACCESS_REFRESH_SECONDS old, so most hits
+    take no write lock; recency is tracked to that granularity.
+    """
+
+    CULL_CHECK_INTERVAL = 64
+    ACCESS_REFRESH_SECONDS = 60
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+            return default
+        if now - accessed >= self.ACCESS_REFRESH_SECONDS:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def _write(self, key, value, timeout, replace):
+        conn = self._connection()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        if not replace:
+            # An expired entry must not block add()
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, time.time()))
+        cursor = conn.execute(
+            f"{verb} INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout), time.time()),
+        )
+
+        self._writes += 1
+        if self._writes % self.CULL_CHECK_INTERVAL == 0:
+            self._cull(conn)
+        return cursor.rowcount > 0
+
+    def _cull(self, conn):
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self._max_entries:
+            excess = count - self._max_entries + self._max_entries // self._cull_frequency
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)", (excess,)
+            )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self.make_and_validate_key(key, version=version), value, timeout, replace=True)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(self.make_and_validate_key(key, version=version), value, timeout, replace=False)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            "UPDATE cache SET expires = ? WHERE key = ?", (self.get_backend_timeout(timeout), key)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing_key, version=version) is not self._missing_key
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Atomically increments an integer entry, across processes.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            conn.execute(
+                "UPDATE cache SET value = ?, accessed = ? WHERE key = ?",
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time(), key),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+
+def file_fingerprint(path):
+    """
+    Short content hash of a file, used to tie cached predictions to the model that produced them.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Caches predicted classes keyed by a hash of the encoded feature row.
+
+    Keys are versioned with the fingerprint of the loaded model, so entries
+    written for an older model.h5 are never read back once the model changes;
+    they age out through the backend's TTL and LRU eviction. Hit and miss
+    counts are kept per process, off the shared cache, so a lookup never
+    writes to it; the fraud_prediction_cache_lookups metric sums them across
+    workers.
+    """
+
+    # (model_version, "hit" | "miss") -> lookups in this process
+    _counts = collections.Counter()
+    _counts_lock = threading.Lock()
+
+    def __init__(self, cache, model_version):
+        self.cache = cache
+        self.model_version = model_version
+
+    @staticmethod
+    def key(features):
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        return "prediction:" + hashlib.blake2b(features.tobytes(), digest_size=16).hexdigest()
+
+    def _count(self, result):
+        with self._counts_lock:
+            self._counts[(self.model_version, result)] += 1
+        PREDICTION_CACHE_LOOKUPS.labels(result).inc()
+
+    def get(self, features):
+        """
+        Returns the cached predicted class for a feature row, or None.
+        """
+        predicted_class = self.cache.get(self.key(features), version=self.model_version)
+        self._count("miss" if predicted_class is None else "hit")
+        return predicted_class
+
+    def set(self, features, predicted_class):
+        self.cache.set(self.key(features), int(predicted_class), version=self.model_version)
+
+    def stats(self):
+        """
+        Hit and miss counts of this process for the model version.
+        """
+        with self._counts_lock:
+            hits = self._counts[(self.model_version, "hit")]
+            misses = self._counts[(self.model_version, "miss")]
+        lookups = hits + misses
+        return {
+            "model_version": self.model_version,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class SignatureResultCache:
+    """
+    Caches parsed signature verification results, keyed by a digest of the
+    image bytes and the reference number.
+
+    Concurrent lookups for the same key are single-flighted: within a process
+    followers wait on the leader's Future, and across processes the leader
+    holds a short lease in the shared cache while the others poll for its
+    result. Failed verifications are not cached.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, cache, lease_timeout=60.0):
+        self.cache = cache
+        self.lease_timeout = lease_timeout
+        self._inflight = {}
+        self._async_inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image_bytes, reference_number):
+        return f"signature:{hashlib.blake2b(image_bytes, digest_size=16).hexdigest()}:{reference_number}"
+
+    def get_or_verify(self, image_bytes, reference_number, verify_fn):
+        """
+        Returns the cached result for an image and reference number, calling verify_fn() on a miss.
+        """
+        key = self.key(image_bytes, reference_number)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._verify_once(key, verify_fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _verify_once(self, key, verify_fn):
+        lease_key = f"lease:{key}"
+        deadline = time.monotonic() + self.lease_timeout
+        while not (leased := self.cache.add(lease_key, os.getpid(), timeout=self.lease_timeout)):
+            # Another worker is verifying this image; wait for its result or for the lease to lapse
+            time.sleep(self.POLL_INTERVAL)
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+            if time.monotonic() > deadline:
+                break
+
+        try:
+            result = self.cache.get(key)
+            if result is None:
+                result = verify_fn()
+                self.cache.set(key, result)
+            return result
+        finally:
+            if leased:
+                self.cache.delete(lease_key)
+
+    async def get_or_verify_async(self, image_bytes, reference_number, verify_fn):
+        """
+        Async version of get_or_verify for ASGI views; verify_fn() returns an awaitable.
+
+        Followers on the same event loop await the leader's asyncio Future and
+        other processes are polled with asyncio.sleep, so waiting never blocks
+        the loop. Cache calls run on a worker thread, as the SQLite backend can
+        wait up to its busy timeout for another process's write lock.
+        """
+        key = self.key(image_bytes, reference_number)
+        result = await asyncio.to_thread(self.cache.get, key)
+        if result is not None:
+            return result
+
+        future = self._async_inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved, so a failure nobody else awaited is not logged again
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        try:
+            result = await self._verify_once_async(key, verify_fn)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._async_inflight[key]
+
+    async def _verify_once_async(self, key, verify_fn):
+        lease_key = f"lease:{key}"
+        deadline = time.monotonic() + self.lease_timeout
+        while not (leased := await asyncio.to_thread(
+            self.cache.add, lease_key, os.getpid(), timeout=self.lease_timeout
+        )):
+            await asyncio.sleep(self.POLL_INTERVAL)
+            result = await asyncio.to_thread(self.cache.get, key)
+            if result is not None:
+                return result
+            if time.monotonic() > deadline:
+                break
+
+        try:
+            result = await asyncio.to_thread(self.cache.get, key)
+            if result is None:
+                result = await verify_fn()
+                await asyncio.to_thread(self.cache.set, key, result)
+            return result
+        finally:
+            if leased:
+                await asyncio.to_thread(self.cache.delete, lease_key)
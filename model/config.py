@@ -1,3 +1,14 @@
+# Raw input columns expected by the model, in training order
+REQUIRED_COLUMNS = [
+    "assured_age", "nominee_relation", "occupation", "policy_sum_assured", "premium",
+    "premium_payment_mode", "annual_income", "holder_marital_status", "indiv_requirement_flag",
+    "policy_term", "policy_payment_term", "product_type", "channel", "bank_code",
+    "policy_risk_commencement_date", "date_of_death", "intimation_date", "status", "sub_status"
+]
+
+# Date columns used to derive the day-difference features
+DATE_COLUMNS = ["policy_risk_commencement_date", "date_of_death", "intimation_date"]
+
 # One-hot encoding categories
 ONE_HOT_COLUMNS = {
     'premium_payment_mode': ['Quarterly', 'Yearly', 'Half yearly', 'Monthly', 'Single'],
@@ -103,3 +114,14 @@ MIN_MAX = {
     'death_to_intimation_days': (-1.0, 420.0),
     'policy_to_intimation_days': (-1.0, 1244.0)
 }
+
+# Accepted ranges of the numeric input columns, as (min, max) with None for no
+# bound; uploaded rows outside them are rejected before scoring
+VALID_RANGES = {
+    'assured_age': (0, 120),
+    'policy_sum_assured': (0, None),
+    'premium': (0, None),
+    'annual_income': (0, None),
+    'policy_term': (0, 100),
+    'policy_payment_term': (0, 100),
+}
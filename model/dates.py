@@ -0,0 +1,145 @@
+import datetime
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10**9
+
+# Day-difference features derived by preprocess_dates, as (name, later date, earlier date)
+DAY_FEATURES = [
+    ("policy_to_death_days", "date_of_death", "policy_risk_commencement_date"),
+    ("death_to_intimation_days", "intimation_date", "date_of_death"),
+    ("policy_to_intimation_days", "intimation_date", "policy_risk_commencement_date"),
+]
+
+# Known layouts, each with the fixed formats that reproduce pandas' dayfirst
+# inference for them, tried in order. For ISO-like strings that inference
+# reads "2020-01-05" as %Y-%d-%m (5 January becomes 1 May) and only falls
+# back to %Y-%m-%d when the middle part cannot be a day; slash dates are read
+# as %d/%m/%Y unless only %m/%d/%Y is valid. The model was trained on dates
+# parsed this way, so the quirk is kept.
+KNOWN_FORMATS = [
+    (r"\d{4}-\d{1,2}-\d{1,2}", ["%Y-%d-%m", "%Y-%m-%d"]),
+    (r"\d{1,2}/\d{1,2}/\d{4}", ["%d/%m/%Y", "%m/%d/%Y"]),
+]
+_KNOWN_PATTERNS = [(re.compile(pattern), formats) for pattern, formats in KNOWN_FORMATS]
+
+# Columns with at most this many distinct values are parsed value by value
+SMALL_COLUMN_UNIQUES = 8
+
+
+def in_timestamp_range(value):
+    """
+    Whether a parsed date fits datetime64[ns]; pd.to_datetime(..., errors='coerce')
+    turns dates outside it, such as 9999-12-31 placeholders, into NaT.
+    """
+    return pd.Timestamp.min <= value <= pd.Timestamp.max
+
+
+def _coerce_date_value(value):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # per-value format inference warnings
+        return pd.to_datetime(pd.Series([value]), errors='coerce', dayfirst=True).iloc[0]
+
+
+def parse_date_value(value):
+    """
+    Parses one raw date value the way preprocess_dates does for a single-row frame.
+
+    Strings in a known layout are parsed with strptime; anything else goes
+    through pd.to_datetime(..., errors='coerce', dayfirst=True). Dates outside
+    the datetime64[ns] range are NaT either way.
+
+    Returns:
+    pd.Timestamp or pd.NaT
+    """
+    if isinstance(value, str):
+        for pattern, formats in _KNOWN_PATTERNS:
+            if pattern.fullmatch(value):
+                for fmt in formats:
+                    try:
+                        parsed = datetime.datetime.strptime(value, fmt)
+                    except ValueError:
+                        continue
+                    if in_timestamp_range(parsed):
+                        return pd.Timestamp(parsed)
+                return pd.NaT
+    return _coerce_date_value(value)
+
+
+def parse_date_column(series):
+    """
+    Converts a raw date column to datetime64, giving each value the result
+    parse_date_value would give it on its own.
+
+    Distinct values are classified once: strings in a known layout are parsed
+    with vectorized fixed-format pd.to_datetime calls, date and datetime
+    objects are converted directly, and only what is left falls back to the
+    coercing per-value path.
+
+    Parameters:
+    series (pd.Series): Raw date values.
+
+    Returns:
+    pd.Series: datetime64[ns] values, NaT where a value cannot be parsed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    codes, uniques = pd.factorize(series)
+    if len(uniques) <= SMALL_COLUMN_UNIQUES:
+        # Too few values to amortize the vectorized calls, e.g. a single request
+        parsed = pd.Series([parse_date_value(value) for value in uniques], dtype="datetime64[ns]")
+        return _take(parsed, codes, series)
+
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    pending = pd.Series(True, index=uniques.index)
+
+    is_str = uniques.map(lambda value: isinstance(value, str))
+    strings = uniques[is_str].astype(str)
+    for pattern, formats in KNOWN_FORMATS:
+        matched = strings[strings.str.fullmatch(pattern)]
+        pending[matched.index] = False
+        for fmt in formats:
+            if matched.empty:
+                break
+            values = pd.to_datetime(matched, format=fmt, errors='coerce')
+            parsed[values.index] = values
+            matched = matched[values.isna()]
+
+    is_date = uniques.map(lambda value: isinstance(value, (datetime.date, np.datetime64)))
+    if is_date.any():
+        parsed[is_date] = pd.to_datetime(uniques[is_date].tolist(), errors='coerce')
+        pending[is_date] = False
+
+    for i in pending.index[pending]:
+        parsed[i] = _coerce_date_value(uniques[i])
+
+    return _take(parsed, codes, series)
+
+
+def _take(parsed, codes, series):
+    # Missing values have code -1, which picks the NaT appended at the end
+    values = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+
+def day_difference(later, earlier):
+    """
+    Whole days from earlier to later, like (later - earlier).dt.days, with -1 where either date is missing.
+
+    Parameters:
+    later, earlier (pd.Series): datetime64 columns.
+
+    Returns:
+    np.ndarray: int64 day counts.
+    """
+    later = later.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    earlier = earlier.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    missing = (later == np.iinfo(np.int64).min) | (earlier == np.iinfo(np.int64).min)
+    days = (later - earlier) // NS_PER_DAY
+    days[missing] = -1
+    return days
@@ -0,0 +1,130 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .config import MEAN_STD, MIN_MAX, ONE_HOT_COLUMNS, LABEL_ENCODINGS, REQUIRED_COLUMNS, DATE_COLUMNS
+from .dates import DAY_FEATURES, NS_PER_DAY, in_timestamp_range, parse_date_value
+
+
+@lru_cache(maxsize=8192)
+def date_value_ns(value):
+    """
+    Parses a raw date value once and caches it as nanoseconds since the epoch (None if unparseable).
+    """
+    parsed = parse_date_value(value)
+    if pd.isna(parsed) or not in_timestamp_range(parsed):
+        return None
+    return parsed.as_unit("ns").value
+
+
+class FeatureEncoder:
+    """
+    Feature plan compiled once from config.py that encodes a single request dict
+    straight into a float32 row, without building a DataFrame.
+
+    The output matches preprocess_input(data) for a record whose keys follow
+    REQUIRED_COLUMNS order: the plain and label-encoded columns come first in
+    that order, then the three day-difference features, then the one-hot blocks
+    in ONE_HOT_COLUMNS order. Extra keys in the record are ignored.
+    """
+
+    def __init__(self, required_columns=REQUIRED_COLUMNS, mean_std=MEAN_STD, min_max=MIN_MAX,
+                 one_hot_columns=ONE_HOT_COLUMNS, label_encodings=LABEL_ENCODINGS):
+        self.feature_names = []
+
+        # Numeric slots: raw numbers and day differences, scaled then rounded to 3 places
+        self._numeric_columns = []
+        numeric_slots, offsets, scales = [], [], []
+
+        def add_numeric(name):
+            numeric_slots.append(len(self.feature_names))
+            if name in mean_std:
+                offset, scale = mean_std[name]
+            elif name in min_max:
+                min_val, max_val = min_max[name]
+                offset, scale = min_val, max_val - min_val
+            else:
+                offset, scale = 0.0, 1.0
+            offsets.append(offset)
+            scales.append(scale)
+            self.feature_names.append(name)
+
+        # Label-encoded slots: (column, slot, mapping)
+        self._label_slots = []
+
+        for col in required_columns:
+            if col in DATE_COLUMNS or col in one_hot_columns:
+                continue
+            if col in label_encodings:
+                self._label_slots.append((col, len(self.feature_names), dict(label_encodings[col])))
+                self.feature_names.append(col)
+            else:
+                self._numeric_columns.append(col)
+                add_numeric(col)
+
+        for name, _, _ in DAY_FEATURES:
+            add_numeric(name)
+
+        # One-hot blocks: (column, block start, block stop, category -> slot)
+        self._one_hot_blocks = []
+        for col, categories in one_hot_columns.items():
+            start = len(self.feature_names)
+            lookup = {category: start + i for i, category in enumerate(categories)}
+            self.feature_names.extend(f"{col}_{category}" for category in categories)
+            self._one_hot_blocks.append((col, start, len(self.feature_names), lookup))
+
+        self.n_features = len(self.feature_names)
+        self._numeric_slots = np.array(numeric_slots, dtype=np.intp)
+        self._offsets = np.array(offsets, dtype=np.float64)
+        self._scales = np.array(scales, dtype=np.float64)
+        self._local = threading.local()
+
+    def encode_into(self, data, row):
+        """
+        Writes the features for one request dict into row (a float32 array of length n_features).
+        """
+        numeric = np.empty(len(self._numeric_slots), dtype=np.float64)
+        try:
+            for i, col in enumerate(self._numeric_columns):
+                numeric[i] = float(data[col])
+
+            dates = {col: date_value_ns(data[col]) for col in DATE_COLUMNS}
+
+            for col, slot, mapping in self._label_slots:
+                row[slot] = mapping.get(data[col], -1)
+
+            for col, start, stop, lookup in self._one_hot_blocks:
+                row[start:stop] = 0
+                slot = lookup.get(data[col])
+                if slot is not None:
+                    row[slot] = 1
+        except KeyError as e:
+            raise ValueError(f"Missing required field: {e.args[0]}") from None
+
+        offset = len(self._numeric_columns)
+        for i, (_, later, earlier) in enumerate(DAY_FEATURES):
+            if dates[later] is None or dates[earlier] is None:
+                numeric[offset + i] = -1
+            else:
+                numeric[offset + i] = (dates[later] - dates[earlier]) // NS_PER_DAY
+
+        numeric -= self._offsets
+        numeric /= self._scales
+        row[self._numeric_slots] = np.round(numeric, 3)
+
+        return row
+
+    def encode(self, data):
+        """
+        Encodes one request dict into a (1, n_features) float32 matrix.
+
+        The matrix is a per-thread buffer reused by the next call on the same
+        thread; copy it if it has to outlive the current request.
+        """
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, self.n_features), dtype=np.float32)
+        self.encode_into(data, row[0])
+        return row
@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ExecutorBusyError(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Runs blocking work (preprocessing, inference, file scoring) off the event loop.
+
+    At most `max_workers` calls run at once and at most `max_pending` wait
+    for a thread; beyond that run() fails fast with ExecutorBusyError, so a
+    burst of uploads cannot queue up minutes of work behind quick requests.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Awaits fn(*args, **kwargs) on a worker thread, with the caller's context variables.
+        """
+        with self._lock:
+            if self._inflight >= self.max_workers + self.max_pending:
+                raise ExecutorBusyError("Too many requests are waiting for inference; retry shortly")
+            self._inflight += 1
+        try:
+            # The copied context keeps the metrics endpoint label for stages timed in fn
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+            return await asyncio.wrap_future(self._pool.submit(call))
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+    def stats(self):
+        with self._lock:
+            inflight = self._inflight
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(inflight, self.max_workers),
+            "waiting": max(inflight - self.max_workers, 0),
+        }
+
+
+def get_inference_executor():
+    """
+    Returns the process-wide executor for async views, sized by the ASYNC_INFERENCE_* settings.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = BoundedExecutor(settings.ASYNC_INFERENCE_WORKERS, settings.ASYNC_INFERENCE_MAX_PENDING)
+        return _executor
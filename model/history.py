@@ -0,0 +1,129 @@
+import base64
+import datetime as dt
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import InsuranceData, PredictionSummary
+
+# Filters shared by the history and summary endpoints: query parameter -> field
+HISTORY_FILTERS = {
+    "category": "predicted_category",
+    "channel": "channel",
+    "product_type": "product_type",
+    "model_version": "model_version",
+}
+SUMMARY_DIMENSIONS = ["day", "channel", "product_type", "predicted_category"]
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _day_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD).")
+    return day
+
+
+def _start_of_day(day):
+    start = dt.datetime.combine(day, dt.time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def _field_filters(params):
+    return {field: params[param] for param, field in HISTORY_FILTERS.items() if params.get(param)}
+
+
+def prediction_page(params):
+    """
+    Returns one page of stored predictions, newest first, using keyset pagination.
+
+    Pages are selected with "id < cursor" instead of an offset, so every page
+    costs the same however deep into the history it is.
+
+    Parameters:
+    params (QueryDict): Query parameters: cursor, limit, since and until (days,
+    inclusive) and any of HISTORY_FILTERS.
+
+    Returns:
+    dict: "results" (records as dicts) and "next_cursor" (None on the last page).
+
+    Raises:
+    ValueError: If a parameter is malformed.
+    """
+    try:
+        limit = int(params.get("limit", settings.HISTORY_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+    limit = max(1, min(limit, settings.HISTORY_MAX_PAGE_SIZE))
+
+    queryset = InsuranceData.objects.filter(predicted_at__isnull=False, **_field_filters(params))
+    since, until = _day_param(params, "since"), _day_param(params, "until")
+    if since:
+        queryset = queryset.filter(predicted_at__gte=_start_of_day(since))
+    if until:
+        queryset = queryset.filter(predicted_at__lt=_start_of_day(until + dt.timedelta(days=1)))
+    if params.get("cursor"):
+        queryset = queryset.filter(id__lt=decode_cursor(params["cursor"]))
+
+    # values() skips building model instances; one extra row tells whether another page follows
+    results = list(queryset.order_by("-id").values()[:limit + 1])
+    next_cursor = encode_cursor(results[limit - 1]["id"]) if len(results) > limit else None
+    return {"results": results[:limit], "next_cursor": next_cursor}
+
+
+def prediction_summary(params):
+    """
+    Returns prediction counts from PredictionSummary, grouped by the requested dimensions.
+
+    Only summary rows are read, so the cost depends on the number of days,
+    channels, product types and categories, not on the size of the history.
+
+    Parameters:
+    params (QueryDict): Query parameters: group_by (comma-separated
+    SUMMARY_DIMENSIONS, all by default; empty for the total only), since and
+    until (days, inclusive) and any of HISTORY_FILTERS except model_version.
+
+    Returns:
+    dict: "results" (one dict per group, with its count) and "total".
+
+    Raises:
+    ValueError: If a parameter is malformed.
+    """
+    group_by = [name.strip() for name in params.get("group_by", ",".join(SUMMARY_DIMENSIONS)).split(",") if name.strip()]
+    unknown = sorted(set(group_by) - set(SUMMARY_DIMENSIONS))
+    if unknown:
+        raise ValueError(f"Unknown group_by dimension(s): {', '.join(unknown)}")
+    if params.get("model_version"):
+        raise ValueError("The summary is not broken down by model_version.")
+
+    queryset = PredictionSummary.objects.filter(**_field_filters(params))
+    since, until = _day_param(params, "since"), _day_param(params, "until")
+    if since:
+        queryset = queryset.filter(day__gte=since)
+    if until:
+        queryset = queryset.filter(day__lte=until)
+
+    if group_by:
+        results = list(queryset.values(*group_by).annotate(count=Sum("count")).order_by(*group_by))
+    else:
+        results = [{"count": queryset.aggregate(count=Sum("count"))["count"] or 0}]
+    return {"results": results, "total": sum(row["count"] for row in results)}
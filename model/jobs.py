@@ -0,0 +1,201 @@
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import connections
+from loguru import logger
+
+from .metrics import count_rows, endpoint_context
+from .persistence import prediction_persister
+from .scoring import OUTPUT_EXTENSIONS, active_model, score_file
+from .validation import RejectedRows
+
+# Each job lives in its own directory with its input, output and a status.json.
+# Keeping the state on disk lets any gunicorn worker answer status and download
+# requests for a job scored by another worker.
+JOBS_DIR = settings.SCORING_JOBS_DIR
+STATUS_FILE = "status.json"
+REJECTED_FILE = "rejected.csv"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _job_dir(job_id):
+    return os.path.join(JOBS_DIR, str(uuid.UUID(str(job_id))))
+
+
+def _write_status(job_id, **fields):
+    """
+    Merges fields into the job's status.json, replacing the file atomically.
+    """
+    path = os.path.join(_job_dir(job_id), STATUS_FILE)
+    status = read_job_status(job_id) or {}
+    status.update(fields, job_id=str(job_id), updated_at=time.time())
+
+    partial_path = f"{path}.{threading.get_ident()}.part"
+    with open(partial_path, "w") as f:
+        json.dump(status, f)
+    os.replace(partial_path, path)
+    return status
+
+
+def read_job_status(job_id):
+    """
+    Returns the status dict of a job, or None if it does not exist (or has been cleaned up).
+    """
+    try:
+        with open(os.path.join(_job_dir(job_id), STATUS_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def job_output_path(job_id, rejected=False):
+    """
+    Returns the path of a finished job's output file, or of its rejected rows
+    if rejected is set, or None if it is not ready.
+    """
+    status = read_job_status(job_id)
+    if not status or status["status"] != "done":
+        return None
+    return os.path.join(_job_dir(job_id), REJECTED_FILE if rejected else status["output_file"])
+
+
+def purge_expired_jobs(retention_seconds=None):
+    """
+    Deletes jobs whose status has not changed for longer than the retention period.
+
+    Returns:
+    int: Number of jobs removed.
+    """
+    if retention_seconds is None:
+        retention_seconds = settings.SCORING_JOB_RETENTION_HOURS * 3600
+    if not os.path.isdir(JOBS_DIR):
+        return 0
+
+    cutoff = time.time() - retention_seconds
+    removed = 0
+    for name in os.listdir(JOBS_DIR):
+        job_dir = os.path.join(JOBS_DIR, name)
+        status_path = os.path.join(job_dir, STATUS_FILE)
+        last_update = os.path.getmtime(status_path if os.path.exists(status_path) else job_dir)
+        if last_update < cutoff:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def fail_stale_jobs(stale_seconds=None):
+    """
+    Marks running jobs whose status has not changed for longer than stale_seconds
+    as failed. A running job updates its status after every chunk, so such a job
+    was lost with the worker that ran it (restart or crash) and would otherwise
+    report "running" forever.
+
+    Returns:
+    int: Number of jobs marked as failed.
+    """
+    if stale_seconds is None:
+        stale_seconds = settings.SCORING_JOB_STALE_MINUTES * 60
+    if not os.path.isdir(JOBS_DIR):
+        return 0
+
+    cutoff = time.time() - stale_seconds
+    failed = 0
+    for name in os.listdir(JOBS_DIR):
+        status = read_job_status(name)
+        if status and status["status"] == "running" and status["updated_at"] < cutoff:
+            _write_status(name, status="failed", error="The worker running this job stopped; submit it again",
+                          finished_at=time.time())
+            failed += 1
+    return failed
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.SCORING_JOB_WORKERS, thread_name_prefix="scoring-job")
+        return _executor
+
+
+def run_job(job_id, input_file, output_file):
+    """
+    Scores a job's input file, recording progress in its status as chunks complete.
+
+    Rows that fail validation are saved to the job's rejected.csv and counted
+    as rows_rejected instead of failing the job.
+    """
+    job_dir = _job_dir(job_id)
+    input_path = os.path.join(job_dir, input_file)
+    output_path = os.path.join(job_dir, output_file)
+    started = time.time()
+
+    def on_progress(rows_done):
+        elapsed = time.time() - started
+        _write_status(job_id, rows_done=rows_done, rows_per_second=rows_done / elapsed if elapsed else 0.0)
+
+    _write_status(job_id, status="running", started_at=started)
+    try:
+        # The whole job is scored by the version active when it starts
+        active = active_model()
+        _write_status(job_id, model_version=active.version)
+        with endpoint_context("scoring_job"), prediction_persister(active.version) as on_scored, \
+                RejectedRows(os.path.join(job_dir, REJECTED_FILE)) as rejects:
+            rows = score_file(
+                input_path, input_file, output_path,
+                on_progress=on_progress, on_scored=on_scored, active=active, rejects=rejects,
+            )
+            count_rows(rows)
+        _write_status(job_id, status="done", rows_scored=rows, rows_rejected=rejects.rows, finished_at=time.time())
+    except Exception as e:
+        logger.error(f"Scoring job {job_id} failed: {e}")
+        _write_status(job_id, status="failed", error=str(e), finished_at=time.time())
+    finally:
+        # The input may already be gone if the job directory was purged
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(input_path)
+        connections.close_all()  # this worker thread's database connections
+
+
+def create_job(uploaded_file):
+    """
+    Saves an uploaded file as a new scoring job and queues it on the local worker pool.
+
+    Returns:
+    str: The job ID.
+    """
+    purge_expired_jobs()
+    fail_stale_jobs()
+
+    job_id = str(uuid.uuid4())
+    job_dir = _job_dir(job_id)
+    os.makedirs(job_dir)
+
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    input_file = f"input{extension}"
+    output_file = f"output{OUTPUT_EXTENSIONS[extension]}"
+
+    input_path = os.path.join(job_dir, input_file)
+    if hasattr(uploaded_file, "temporary_file_path"):
+        # Already streamed to disk by the upload handler; move it instead of copying
+        file_move_safe(uploaded_file.temporary_file_path(), input_path)
+    else:
+        with open(input_path, "wb") as f:
+            for chunk in uploaded_file.chunks():
+                f.write(chunk)
+
+    _write_status(
+        job_id, status="queued", filename=uploaded_file.name, output_file=output_file,
+        rows_done=0, rows_per_second=0.0, created_at=time.time(),
+    )
+    _get_executor().submit(run_job, job_id, input_file, output_file)
+    return job_id
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from model.registry import activate_version, list_versions, read_active_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Activate a published model version; running workers load it in the background and swap it in. "
+        "Without a version, list the published versions."
+    )
+    # Only files are written here; skip the URL checks that would load the served model
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("version", nargs="?", help="Version to activate (e.g. a previous one, to roll back).")
+
+    def handle(self, *args, **options):
+        registry_dir = settings.MODEL_REGISTRY_DIR
+        if options["version"]:
+            try:
+                activate_version(registry_dir, options["version"])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Activated {options['version']}")
+            return
+
+        active = read_active_version(registry_dir)
+        versions = list_versions(registry_dir)
+        if not versions:
+            self.stdout.write(f"No versions published to {registry_dir}; serving the built-in model")
+        for manifest in versions:
+            marker = "*" if manifest["version"] == active else " "
+            self.stdout.write(f"{marker} {manifest['version']:<24} {manifest['fingerprint'][:12]}  {manifest['source']}")
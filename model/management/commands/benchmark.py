@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from model.synthetic import generate_claims
+
+CASES = ["preprocess_input", "predict_json", "predict_file", "predict_file_pandas"]
+
+# predict_file cases: upload size sweep, with the CSV reader each one uses
+FILE_CASES = {"predict_file": "arrow", "predict_file_pandas": "pandas"}
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, "benchmarks", "baseline.json")
+
+# Metrics compared against the baseline, and whether a higher value is better
+COMPARED_METRICS = {"rows_per_second": True, "latency_ms.p50": False, "peak_rss_mb": False}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def summarize(name, rows, latencies, total_rows, total_seconds):
+    """
+    Builds one result entry from per-call latencies in seconds.
+    """
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "case": name,
+        "rows": rows,
+        "calls": len(latencies),
+        "latency_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p90": float(np.percentile(latencies_ms, 90)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "mean": float(latencies_ms.mean()),
+            "max": float(latencies_ms.max()),
+        },
+        "rows_per_second": total_rows / total_seconds if total_seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def time_calls(fn, args_list, warmup=5):
+    for args in args_list[:warmup]:
+        fn(*args)
+    latencies = []
+    started = time.perf_counter()
+    for args in args_list:
+        call_started = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - call_started)
+    return latencies, time.perf_counter() - started
+
+
+def bench_preprocess_input(rows, seed):
+    from model.utils import preprocess_input
+
+    records = generate_claims(rows, seed=seed).to_dict("records")
+    latencies, seconds = time_calls(lambda record: preprocess_input(dict(record)), [(r,) for r in records])
+    return summarize("preprocess_input", rows, latencies, rows, seconds)
+
+
+def bench_predict_json(rows, seed):
+    from django.test import Client
+
+    client = Client()
+    records = generate_claims(rows, seed=seed).to_dict("records")
+
+    def post(record):
+        response = client.post("/model/predict/", json.dumps(record, default=str), content_type="application/json")
+        if response.status_code != 200:
+            raise CommandError(f"predict_json returned {response.status_code}: {response.content[:200]!r}")
+
+    latencies, seconds = time_calls(post, [(r,) for r in records])
+    return summarize("predict_json", rows, latencies, rows, seconds)
+
+
+def write_claims_csv(path, rows, seed):
+    generate_claims(rows, seed=seed).to_csv(path, index=False)
+
+
+def bench_predict_file(rows, seed, repeats=1, case="predict_file", input_path=None):
+    from django.test import Client, override_settings
+    from model import views
+
+    client = Client()
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(views, "UPLOAD_DIR", tmp_dir), \
+            override_settings(PREDICT_FILE_CSV_READER=FILE_CASES[case]):
+        if input_path is None:
+            input_path = os.path.join(tmp_dir, "claims.csv")
+            write_claims_csv(input_path, rows, seed)
+
+        def post():
+            with open(input_path, "rb") as f:
+                response = client.post("/model/predict_file/", {"file": f})
+            if response.status_code != 200:
+                raise CommandError(f"{case} returned {response.status_code}: {response.content[:200]!r}")
+
+        latencies, seconds = time_calls(post, [()] * repeats, warmup=0)
+    return summarize(case, rows, latencies, rows * repeats, seconds)
+
+
+def get_metric(result, path):
+    value = result
+    for part in path.split("."):
+        value = value[part]
+    return value
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compares results with a baseline run, case by case.
+
+    Returns:
+    list: (case, rows, metric, baseline value, current value, relative change, regressed) rows
+    for every metric present in both runs.
+    """
+    baseline_by_key = {(entry["case"], entry["rows"]): entry for entry in baseline["results"]}
+    comparisons = []
+    for result in results:
+        reference = baseline_by_key.get((result["case"], result["rows"]))
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = get_metric(reference, metric), get_metric(result, metric)
+            change = (new - old) / old if old else 0.0
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            comparisons.append((result["case"], result["rows"], metric, old, new, change, regressed))
+    return comparisons
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark preprocess_input, the predict_json view and the predict_file view on synthetic claims, "
+        "and compare the results with a stored baseline. predict_file_pandas repeats the upload sizes "
+        "with the chunked pd.read_csv reader, for comparison with the Arrow reader."
+    )
+    # The parent process only orchestrates; skip the URL checks that would load the model
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+        parser.add_argument("--requests", type=int, default=1000,
+                            help="Single records timed for preprocess_input and predict_json.")
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                            help="Row counts of the files uploaded to predict_file.")
+        parser.add_argument("--file-repeats", type=int, default=1, help="Uploads per predict_file size.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+        parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Allowed relative change before a metric counts as a regression.")
+        parser.add_argument("--run-case", nargs=2, metavar=("CASE", "ROWS"), help=argparse.SUPPRESS)
+        parser.add_argument("--input-file", help=argparse.SUPPRESS)
+        parser.add_argument("--write-claims", nargs=2, metavar=("PATH", "ROWS"), help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["write_claims"]:
+            write_claims_csv(options["write_claims"][0], int(options["write_claims"][1]), options["seed"])
+            return
+        if options["run_case"]:
+            # Child process: run one case and print its result as JSON on the last line
+            case, rows = options["run_case"][0], int(options["run_case"][1])
+            runner = {"preprocess_input": bench_preprocess_input, "predict_json": bench_predict_json}.get(case)
+            if runner is not None:
+                result = runner(rows, options["seed"])
+            else:
+                result = bench_predict_file(rows, options["seed"], options["file_repeats"], case, options["input_file"])
+            self.stdout.write(json.dumps(result))
+            return
+
+        runs = []
+        for case in options["cases"]:
+            sizes = options["sizes"] if case in FILE_CASES else [options["requests"]]
+            runs.extend((case, rows) for rows in sizes)
+
+        with tempfile.TemporaryDirectory() as input_dir:
+            # Upload files are generated once per size in a separate process, so the
+            # peak RSS of a predict_file case covers the upload and scoring only
+            # (child processes start with the peak RSS of their parent)
+            input_files = {}
+            for case, rows in runs:
+                if case in FILE_CASES and rows not in input_files:
+                    input_files[rows] = os.path.join(input_dir, f"claims_{rows}.csv")
+                    self.manage_py("--write-claims", input_files[rows], str(rows), "--seed", str(options["seed"]))
+            results = [
+                self.run_in_subprocess(case, rows, options, input_files.get(rows) if case in FILE_CASES else None)
+                for case, rows in runs
+            ]
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "model_runtime": settings.MODEL_RUNTIME,
+                "predict_batching": settings.PREDICT_BATCHING,
+                "prediction_cache": settings.PREDICTION_CACHE_ENABLED,
+            },
+            "results": results,
+        }
+        self.print_results(results)
+
+        if options["output"]:
+            self.write_json(options["output"], report)
+        if options["save_baseline"]:
+            self.write_json(options["baseline"], report)
+            self.stdout.write(f"Saved baseline to {options['baseline']}")
+            return
+
+        if not os.path.exists(options["baseline"]):
+            self.stdout.write(f"No baseline at {options['baseline']}; run with --save-baseline to store one.")
+            return
+        with open(options["baseline"]) as f:
+            baseline = json.load(f)
+        comparisons = compare_to_baseline(results, baseline, options["tolerance"])
+        self.print_comparisons(comparisons)
+        regressions = [c for c in comparisons if c[-1]]
+        if regressions:
+            raise CommandError(f"{len(regressions)} metric(s) regressed by more than {options['tolerance']:.0%}")
+
+    def run_in_subprocess(self, case, rows, options, input_file=None):
+        """
+        Runs one case in a fresh interpreter, so its peak RSS is not inflated by earlier cases.
+        """
+        self.stderr.write(f"Running {case} with {rows} rows...")
+        arguments = [
+            "--run-case", case, str(rows), "--seed", str(options["seed"]),
+            "--file-repeats", str(options["file_repeats"]),
+        ]
+        if input_file:
+            arguments += ["--input-file", input_file]
+        completed = self.manage_py(*arguments, description=f"{case} ({rows} rows)")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    @staticmethod
+    def manage_py(*arguments, description="benchmark"):
+        """
+        Runs this command with the given arguments in a fresh interpreter.
+        """
+        command = [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "benchmark", *arguments]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"{description} failed:\n{completed.stderr[-2000:]}")
+        return completed
+
+    @staticmethod
+    def write_json(path, report):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'case':<20} {'rows':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'rows/s':>11} {'peak MB':>8}"
+        )
+        for r in results:
+            latency = r["latency_ms"]
+            self.stdout.write(
+                f"{r['case']:<20} {r['rows']:>9} {latency['p50']:>9.2f} {latency['p90']:>9.2f} "
+                f"{latency['p99']:>9.2f} {r['rows_per_second']:>11.0f} {r['peak_rss_mb']:>8.0f}"
+            )
+
+    def print_comparisons(self, comparisons):
+        self.stdout.write("")
+        self.stdout.write(f"{'case':<20} {'rows':>9} {'metric':<16} {'baseline':>11} {'current':>11} {'change':>8}")
+        for case, rows, metric, old, new, change, regressed in comparisons:
+            flag = "  REGRESSION" if regressed else ""
+            self.stdout.write(f"{case:<20} {rows:>9} {metric:<16} {old:>11.2f} {new:>11.2f} {change:>+8.1%}{flag}")
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from model.scoring import score_excel_stream, score_frame
+from model.synthetic import generate_claims
+
+
+def pandas_excel_path(input_path, output_path):
+    """
+    The original predict_file path: whole-sheet pd.read_excel, score, df.to_excel.
+    """
+    df = score_frame(pd.read_excel(input_path))
+    df.to_excel(output_path, index=False)
+    return len(df)
+
+
+def streaming_excel_path(input_path, output_path, chunk_rows):
+    return score_excel_stream(input_path, output_path, chunk_rows)
+
+
+class Command(BaseCommand):
+    help = "Compare the streaming Excel scoring path with whole-sheet pandas read_excel/to_excel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic workbook.")
+        parser.add_argument("--chunk-rows", type=int, default=50_000, help="Chunk size for the streaming path.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc peak-memory runs.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "claims.xlsx")
+            self.write_workbook(generate_claims(options["rows"], seed=options["seed"]), input_path)
+
+            paths = {
+                "pandas": lambda out: pandas_excel_path(input_path, out),
+                "streaming": lambda out: streaming_excel_path(input_path, out, options["chunk_rows"]),
+            }
+            results = {}
+            for name, run in paths.items():
+                output_path = os.path.join(tmp_dir, f"{name}.xlsx")
+                started = time.perf_counter()
+                rows = run(output_path)
+                elapsed = time.perf_counter() - started
+
+                peak_mb = None
+                if not options["skip_memory"]:
+                    tracemalloc.start()
+                    run(os.path.join(tmp_dir, f"{name}_traced.xlsx"))
+                    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+
+                results[name] = (rows, elapsed, peak_mb, output_path)
+
+            predicted = [
+                pd.read_excel(output_path, usecols=["Predicted"])["Predicted"].tolist()
+                for _, _, _, output_path in results.values()
+            ]
+            if predicted[0] != predicted[1]:
+                self.stderr.write("Predictions differ between the two paths")
+                raise SystemExit(1)
+
+        self.stdout.write(f"{'path':<10} {'rows':>9} {'seconds':>9} {'rows/s':>10} {'peak MB':>9}")
+        for name, (rows, elapsed, peak_mb, _) in results.items():
+            peak = f"{peak_mb:9.1f}" if peak_mb is not None else f"{'-':>9}"
+            self.stdout.write(f"{name:<10} {rows:>9} {elapsed:>9.2f} {rows / elapsed:>10.0f} {peak}")
+
+    @staticmethod
+    def write_workbook(df, path):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(df.columns))
+        for row in df.itertuples(index=False):
+            sheet.append(list(row))
+        workbook.save(path)
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from model.runtime import PRECISIONS, load_numpy_model, variant_path
+from model.synthetic import generate_claims
+
+DEFAULT_H5_PATH = os.path.join(settings.BASE_DIR, "model", "model.h5")
+
+
+def time_batches(model, features, batch_size, repeats):
+    """
+    Times model.predict over features in batches of batch_size.
+
+    Returns:
+    dict: Median and p99 latency per call in milliseconds, and rows per second.
+    """
+    batches = [features[start:start + batch_size] for start in range(0, len(features), batch_size)]
+    model.predict(batches[0])  # warm-up
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for batch in batches:
+            call_started = time.perf_counter()
+            model.predict(batch, batch_size=len(batch), verbose=0)
+            latencies.append(time.perf_counter() - call_started)
+    seconds = time.perf_counter() - started
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "rows_per_second": len(features) * repeats / seconds if seconds else 0.0,
+    }
+
+
+def compare_variant(reference_probabilities, probabilities):
+    """
+    Agreement on the predicted class and the largest probability deviation against the reference.
+    """
+    agreement = float((reference_probabilities.argmax(axis=1) == probabilities.argmax(axis=1)).mean())
+    return {
+        "agreement": agreement,
+        "max_probability_deviation": float(np.abs(reference_probabilities - probabilities).max()),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Build float16 and int8 variants of the NumPy model and compare them with the float32 export: "
+        "agreement on the predicted category, largest probability deviation, latency and memory."
+    )
+    # Only the runtime is loaded here; skip the URL checks that would load the served model
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--h5", default=DEFAULT_H5_PATH, help="Keras model the variants are derived from.")
+        parser.add_argument("--npz", default=settings.NUMPY_MODEL_PATH, help="Float32 export; variants are written next to it.")
+        parser.add_argument("--precisions", nargs="+", choices=PRECISIONS[1:], default=list(PRECISIONS[1:]))
+        parser.add_argument("--input", help="CSV of held-out claims with the required columns (synthetic claims by default).")
+        parser.add_argument("--rows", type=int, default=20_000, help="Synthetic claims to generate without --input.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 256, 8192])
+        parser.add_argument("--latency-rows", type=int, default=2_000,
+                            help="Rows timed per batch size, so single-row timing stays quick.")
+        parser.add_argument("--repeats", type=int, default=3)
+        parser.add_argument("--min-agreement", type=float,
+                            help="Fail if any variant agrees with float32 on fewer than this fraction of claims.")
+        parser.add_argument("--output", help="Write the report as JSON to this path.")
+
+    def handle(self, *args, **options):
+        from model.utils import preprocess_batch
+
+        if options["input"]:
+            claims = pd.read_csv(options["input"])
+        else:
+            claims = generate_claims(options["rows"], seed=options["seed"])
+        features = preprocess_batch(claims).astype(np.float32)
+        timed = features[:options["latency_rows"]]
+
+        results = []
+        reference = None
+        for precision in ["float32", *options["precisions"]]:
+            model = load_numpy_model(options["h5"], options["npz"], precision)
+            probabilities = model.predict(features)
+            if reference is None:
+                reference = probabilities
+
+            results.append({
+                "precision": precision,
+                "path": variant_path(options["npz"], precision),
+                **compare_variant(reference, probabilities),
+                "weight_bytes": model.weight_bytes,
+                "file_bytes": os.path.getsize(variant_path(options["npz"], precision)),
+                "latency": {
+                    str(batch_size): time_batches(model, timed, batch_size, options["repeats"])
+                    for batch_size in options["batch_sizes"]
+                },
+            })
+
+        self.print_results(results, len(features), options["batch_sizes"])
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"rows": len(features), "results": results}, f, indent=2)
+
+        if options["min_agreement"] is not None:
+            failed = [r["precision"] for r in results if r["agreement"] < options["min_agreement"]]
+            if failed:
+                raise CommandError(f"Agreement below {options['min_agreement']:.2%} for: {', '.join(failed)}")
+
+    def print_results(self, results, rows, batch_sizes):
+        self.stdout.write(f"Compared on {rows} claims against float32")
+        header = f"{'precision':<10} {'agree':>8} {'max dev':>9} {'weights KB':>11} {'file KB':>8}"
+        header += "".join(f" {f'p50 ms @{b}':>13}" for b in batch_sizes)
+        self.stdout.write(header + f" {'rows/s @' + str(batch_sizes[-1]):>14}")
+        for r in results:
+            line = (
+                f"{r['precision']:<10} {r['agreement']:>8.2%} {r['max_probability_deviation']:>9.2e} "
+                f"{r['weight_bytes'] / 1024:>11.1f} {r['file_bytes'] / 1024:>8.1f}"
+            )
+            line += "".join(f" {r['latency'][str(b)]['p50_ms']:>13.3f}" for b in batch_sizes)
+            self.stdout.write(line + f" {r['latency'][str(batch_sizes[-1])]['rows_per_second']:>14.0f}")
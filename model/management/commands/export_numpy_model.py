@@ -0,0 +1,38 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from model.runtime import export_npz, NumpyModel, PREDICT_TOLERANCE
+
+DEFAULT_H5_PATH = os.path.join(settings.BASE_DIR, "model", "model.h5")
+
+
+class Command(BaseCommand):
+    help = "Export model.h5 weights to the .npz file used by the NumPy inference runtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--h5", default=DEFAULT_H5_PATH, help="Keras model to export.")
+        parser.add_argument("--output", default=settings.NUMPY_MODEL_PATH, help="Destination .npz file.")
+        parser.add_argument(
+            "--verify", type=int, default=0, metavar="ROWS",
+            help="Compare against model.predict on this many random rows (requires TensorFlow).",
+        )
+
+    def handle(self, *args, **options):
+        n_layers = export_npz(options["h5"], options["output"])
+        self.stdout.write(f"Exported {n_layers} dense layers to {options['output']}")
+
+        if options["verify"]:
+            import numpy as np
+            import tensorflow as tf
+
+            keras_model = tf.keras.models.load_model(options["h5"])
+            numpy_model = NumpyModel(options["output"])
+            x = np.random.default_rng(0).normal(size=(options["verify"], numpy_model.input_dim)).astype(np.float32)
+
+            deviation = float(np.abs(keras_model.predict(x, verbose=0) - numpy_model.predict(x)).max())
+            if deviation > PREDICT_TOLERANCE:
+                self.stderr.write(f"Max probability deviation {deviation:.2e} exceeds {PREDICT_TOLERANCE:.0e}")
+                raise SystemExit(1)
+            self.stdout.write(f"Max probability deviation {deviation:.2e} (tolerance {PREDICT_TOLERANCE:.0e})")
@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from model.registry import FeatureConfig, activate_version, publish_version
+
+DEFAULT_H5_PATH = os.path.join(settings.BASE_DIR, "model", "model.h5")
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish a Keras model and its feature config to the model registry as a new version. "
+        "Running workers switch to it once it is activated (--activate or activate_model)."
+    )
+    # Only files are written here; skip the URL checks that would load the served model
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--h5", default=DEFAULT_H5_PATH, help="Keras model to publish.")
+        parser.add_argument("--name", help="Version name (default: date and model fingerprint).")
+        parser.add_argument(
+            "--features",
+            help="JSON feature config the model was trained with (see features.json of a published version); "
+                 "config.py by default.",
+        )
+        parser.add_argument("--activate", action="store_true", help="Make the new version the active one.")
+
+    def handle(self, *args, **options):
+        try:
+            features = FeatureConfig.load(options["features"]) if options["features"] else None
+            manifest = publish_version(
+                settings.MODEL_REGISTRY_DIR, options["h5"], version=options["name"], features=features
+            )
+            self.stdout.write(f"Published model version {manifest['version']} to {settings.MODEL_REGISTRY_DIR}")
+            if options["activate"]:
+                activate_version(settings.MODEL_REGISTRY_DIR, manifest["version"])
+                self.stdout.write(f"Activated {manifest['version']}")
+        except (OSError, ValueError, TypeError) as e:
+            raise CommandError(str(e))
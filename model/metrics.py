@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from django.http import HttpResponse
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY, multiprocess
+
+# Stage timings span tens of microseconds (encoding one record) to minutes (large uploads)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+REQUEST_SECONDS = Histogram(
+    "fraud_request_seconds", "Time spent handling a request, including rendering the response.",
+    ["endpoint"], buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "fraud_stage_seconds", "Time spent in each stage of a request or scoring job.",
+    ["endpoint", "stage"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter("fraud_requests", "Requests handled, by response status.", ["endpoint", "status"])
+REQUEST_ERRORS = Counter("fraud_request_errors", "Requests that raised or returned a 5xx response.", ["endpoint"])
+ROWS_SCORED = Counter("fraud_rows_scored", "Claim records scored by the model.", ["endpoint"])
+MODEL_LOAD_SECONDS = Gauge(
+    "fraud_model_load_seconds", "Time taken to load and warm the most recently loaded model.", multiprocess_mode="max"
+)
+ACTIVE_MODEL = Gauge(
+    "fraud_active_model", "1 for the model version being served, 0 for versions swapped out.",
+    ["version"], multiprocess_mode="max",
+)
+MODEL_RELOADS = Counter("fraud_model_reloads", "Background model version loads, by outcome.", ["status"])
+PREDICTION_CACHE_LOOKUPS = Counter(
+    "fraud_prediction_cache_lookups", "predict_json result cache lookups, by result (hit or miss).", ["result"]
+)
+
+# Endpoint label for stages timed below the view, e.g. inside preprocess_batch
+current_endpoint = contextvars.ContextVar("current_endpoint", default="other")
+
+# Label children resolved once, since .labels() takes a lock on every call
+_stage_children = {}
+
+
+def _stage_child(endpoint, name):
+    child = _stage_children.get((endpoint, name))
+    if child is None:
+        child = _stage_children[(endpoint, name)] = STAGE_SECONDS.labels(endpoint, name)
+    return child
+
+
+@contextmanager
+def stage(name, endpoint=None):
+    """
+    Times a block as one stage of the current endpoint.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_child(endpoint or current_endpoint.get(), name).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def endpoint_context(endpoint):
+    """
+    Labels stages timed inside the block, including in called helpers, with the given endpoint.
+    """
+    token = current_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        current_endpoint.reset(token)
+
+
+def count_rows(rows, endpoint=None):
+    ROWS_SCORED.labels(endpoint or current_endpoint.get()).inc(rows)
+
+
+def instrumented(endpoint):
+    """
+    Decorates a view to record its request latency, status and errors.
+
+    The response is rendered inside the timer, so the "render" stage covers
+    serializing the body as well. Async views get an async wrapper.
+    """
+    request_seconds = REQUEST_SECONDS.labels(endpoint)
+    errors = REQUEST_ERRORS.labels(endpoint)
+
+    def record(response):
+        if response.status_code >= 500:
+            errors.inc()
+        REQUESTS.labels(endpoint, str(response.status_code)).inc()
+        return response
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                started = time.perf_counter()
+                with endpoint_context(endpoint):
+                    try:
+                        response = await view(request, *args, **kwargs)
+                    except Exception:
+                        errors.inc()
+                        raise
+                    finally:
+                        request_seconds.observe(time.perf_counter() - started)
+                return record(response)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started = time.perf_counter()
+            with endpoint_context(endpoint):
+                try:
+                    response = view(request, *args, **kwargs)
+                    if hasattr(response, "render") and not response.is_rendered:
+                        with stage("render"):
+                            response.render()
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    request_seconds.observe(time.perf_counter() - started)
+            return record(response)
+        return wrapper
+    return decorator
+
+
+def metrics_view(request):
+    """
+    Serves all metrics in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (one directory shared by all gunicorn
+    workers), the values are aggregated across workers.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
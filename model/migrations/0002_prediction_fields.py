@@ -0,0 +1,131 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='insurancedata',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='insurancedata',
+            name='predicted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='insurancedata',
+            name='predicted_category',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='annual_income',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='assured_age',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='channel',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='date_of_death',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='holder_marital_status',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='indiv_requirement_flag',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='intimation_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='nominee_relation',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='occupation',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='policy_no',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='policy_payment_term',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='policy_risk_commencement_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='policy_sum_assured',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='policy_term',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='premium',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='premium_payment_mode',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='product_type',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='status',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='insurancedata',
+            name='sub_status',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='insurancedata',
+            index=models.Index(fields=['policy_no'], name='insurance_policy_no_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insurancedata',
+            index=models.Index(fields=['predicted_at'], name='insurance_predicted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:12
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_summary(apps, schema_editor):
+    # Predictions stored before the summary table existed
+    InsuranceData = apps.get_model('model', 'InsuranceData')
+    PredictionSummary = apps.get_model('model', 'PredictionSummary')
+    groups = (
+        InsuranceData.objects.filter(predicted_at__isnull=False)
+        .values('channel', 'product_type', 'predicted_category', day=TruncDate('predicted_at'))
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    PredictionSummary.objects.bulk_create(PredictionSummary(**group) for group in groups.iterator())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model', '0002_prediction_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('channel', models.CharField(blank=True, max_length=100)),
+                ('product_type', models.CharField(blank=True, max_length=100)),
+                ('predicted_category', models.CharField(blank=True, max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'channel', 'product_type', 'predicted_category'), name='prediction_summary_key')],
+            },
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
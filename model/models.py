@@ -2,32 +2,68 @@ from django.db import models
 import datetime as dt
 
 class InsuranceData(models.Model):
-    policy_no = models.IntegerField()
-    assured_age = models.IntegerField()
-    nominee_relation = models.CharField(max_length=100)
-    occupation = models.CharField(max_length=100)
-    policy_sum_assured = models.IntegerField()
-    premium = models.FloatField()
-    premium_payment_mode = models.CharField(max_length=50)
-    annual_income = models.IntegerField()
-    holder_marital_status = models.CharField(max_length=50)
-    indiv_requirement_flag = models.CharField(max_length=10)
-    policy_term = models.IntegerField()
-    policy_payment_term = models.IntegerField()
+    # Input fields are nullable because scored uploads may have gaps in any column
+    policy_no = models.IntegerField(null=True, blank=True)
+    assured_age = models.IntegerField(null=True, blank=True)
+    nominee_relation = models.CharField(max_length=100, blank=True)
+    occupation = models.CharField(max_length=100, blank=True)
+    policy_sum_assured = models.IntegerField(null=True, blank=True)
+    premium = models.FloatField(null=True, blank=True)
+    premium_payment_mode = models.CharField(max_length=50, blank=True)
+    annual_income = models.IntegerField(null=True, blank=True)
+    holder_marital_status = models.CharField(max_length=50, blank=True)
+    indiv_requirement_flag = models.CharField(max_length=10, blank=True)
+    policy_term = models.IntegerField(null=True, blank=True)
+    policy_payment_term = models.IntegerField(null=True, blank=True)
     # correspondence_city = models.CharField(max_length=100)
     # correspondence_state = models.CharField(max_length=100)
     # correspondence_postcode = models.CharField(max_length=20)
-    product_type = models.CharField(max_length=100)
-    channel = models.CharField(max_length=100)
+    product_type = models.CharField(max_length=100, blank=True)
+    channel = models.CharField(max_length=100, blank=True)
     bank_code = models.FloatField(null=True, blank=True)
 
-    policy_risk_commencement_date = models.DateTimeField(auto_now_add=False)
-    date_of_death = models.DateTimeField(auto_now_add=False)
-    intimation_date =  models.DateTimeField(auto_now_add=False)
+    policy_risk_commencement_date = models.DateTimeField(auto_now_add=False, null=True, blank=True)
+    date_of_death = models.DateTimeField(auto_now_add=False, null=True, blank=True)
+    intimation_date =  models.DateTimeField(auto_now_add=False, null=True, blank=True)
     
-    status = models.CharField(max_length=100)
-    sub_status = models.CharField(max_length=100)
+    status = models.CharField(max_length=100, blank=True)
+    sub_status = models.CharField(max_length=100, blank=True)
     # fraud_category = models.CharField(max_length=100)
 
+    # Prediction made for the record
+    predicted_category = models.CharField(max_length=100, blank=True)
+    model_version = models.CharField(max_length=32, blank=True)
+    predicted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["policy_no"], name="insurance_policy_no_idx"),
+            models.Index(fields=["predicted_at"], name="insurance_predicted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Policy No: {self.policy_no}"
+
+
+class PredictionSummary(models.Model):
+    """
+    Count of stored predictions per day, channel, product type and predicted category.
+
+    Updated in the same transaction as the predictions themselves, so dashboard
+    queries read a few rows per day instead of grouping the whole history.
+    """
+    day = models.DateField()
+    channel = models.CharField(max_length=100, blank=True)
+    product_type = models.CharField(max_length=100, blank=True)
+    predicted_category = models.CharField(max_length=100, blank=True)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "channel", "product_type", "predicted_category"], name="prediction_summary_key",
+            ),
+        ]
+
     def __str__(self):
-        return f"Policy No: {self.dummy_policy_no}"
+        return f"{self.day} {self.channel} {self.product_type} {self.predicted_category}: {self.count}"
@@ -0,0 +1,183 @@
+import pickle
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .dates import parse_date_column
+from .metrics import stage
+from .models import InsuranceData, PredictionSummary
+
+PREDICTION_FIELDS = ["predicted_category", "model_version", "predicted_at"]
+
+# Record fields copied from the scored input, in model field order
+INPUT_FIELDS = [
+    field for field in InsuranceData._meta.concrete_fields
+    if not field.primary_key and field.name not in PREDICTION_FIELDS
+]
+
+# Positions of the summary key values in the row tuples built by prediction_rows
+CHANNEL_INDEX = INPUT_FIELDS.index(InsuranceData._meta.get_field("channel"))
+PRODUCT_TYPE_INDEX = INPUT_FIELDS.index(InsuranceData._meta.get_field("product_type"))
+CATEGORY_INDEX = len(INPUT_FIELDS)
+
+
+def _column_values(field, df):
+    """
+    Converts one input column to a list of database-ready values, None where missing.
+    """
+    if field.name not in df.columns:
+        return [None if field.null else field.get_default()] * len(df)
+    column = df[field.name]
+
+    if isinstance(field, models.DateTimeField):
+        # Same parsing as the features the model saw; each distinct date is adapted once
+        column = parse_date_column(column)
+        if settings.USE_TZ:
+            column = column.dt.tz_localize(timezone.get_default_timezone())
+        codes, uniques = pd.factorize(column)
+        prepared = [field.get_db_prep_save(value, connection) for value in uniques] + [None]
+        return np.array(prepared, dtype=object)[codes].tolist()
+
+    if isinstance(field, models.IntegerField):
+        column = pd.to_numeric(column, errors="coerce").round()
+        return [int(value) if value == value else None for value in column.tolist()]
+    if isinstance(field, models.FloatField):
+        column = pd.to_numeric(column, errors="coerce")
+        return [value if value == value else None for value in column.tolist()]
+    return column.where(column.notna(), "").astype(str).str.slice(0, field.max_length).tolist()
+
+
+def prediction_rows(df, categories, model_version, predicted_at=None):
+    """
+    Converts raw records and their predicted categories into InsuranceData
+    row tuples, in the column order used by insert_prediction_rows.
+
+    Parameters:
+    df (pd.DataFrame): Raw input records; columns without a matching field are ignored.
+    categories (sequence): Predicted fraud category per row.
+    model_version (str): Fingerprint of the model that made the predictions.
+    predicted_at (datetime): Prediction time, now by default.
+
+    Returns:
+    list: One tuple per record.
+    """
+    predicted_at_field = InsuranceData._meta.get_field("predicted_at")
+    predicted_at = predicted_at_field.get_db_prep_save(predicted_at or timezone.now(), connection)
+    columns = [_column_values(field, df) for field in INPUT_FIELDS]
+    return [
+        (*values, str(category), model_version, predicted_at)
+        for values, category in zip(zip(*columns), categories)
+    ]
+
+
+def insert_prediction_rows(rows):
+    """
+    Inserts row tuples from prediction_rows with a single executemany.
+
+    This skips the per-instance ORM work of bulk_create (building model
+    instances, pre_save and adapting every value), which dominates at
+    upload-sized row counts.
+    """
+    quote = connection.ops.quote_name
+    fields = INPUT_FIELDS + [InsuranceData._meta.get_field(name) for name in PREDICTION_FIELDS]
+    sql = (
+        f"INSERT INTO {quote(InsuranceData._meta.db_table)} ({', '.join(quote(f.column) for f in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))})"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def add_to_summary(day, counts):
+    """
+    Adds prediction counts to the PredictionSummary rows of one day.
+
+    Parameters:
+    day (date): Day the predictions were made.
+    counts (dict): Number of predictions per (channel, product_type, predicted_category).
+    """
+    for (channel, product_type, category), count in counts.items():
+        key = {"day": day, "channel": channel, "product_type": product_type, "predicted_category": category}
+        if PredictionSummary.objects.filter(**key).update(count=F("count") + count):
+            continue
+        try:
+            with transaction.atomic():
+                PredictionSummary.objects.create(count=count, **key)
+        except IntegrityError:
+            # Another writer created the row first
+            PredictionSummary.objects.filter(**key).update(count=F("count") + count)
+
+
+def persist_predictions(df, categories, model_version, predicted_at=None, chunk_rows=None):
+    """
+    Stores scored records with bulk inserts, one transaction per chunk of chunk_rows rows,
+    and adds them to the PredictionSummary counts in the same transaction.
+
+    The default chunk size is PERSIST_CHUNK_ROWS.
+
+    Returns:
+    int: Number of rows stored.
+    """
+    predicted_at = predicted_at or timezone.now()
+    return store_prediction_rows(prediction_rows(df, categories, model_version, predicted_at), predicted_at, chunk_rows)
+
+
+def store_prediction_rows(rows, predicted_at, chunk_rows=None):
+    """
+    Inserts row tuples from prediction_rows and adds them to the summary of
+    the predicted_at day, one transaction per chunk of chunk_rows rows.
+
+    Returns:
+    int: Number of rows stored.
+    """
+    chunk_rows = chunk_rows or settings.PERSIST_CHUNK_ROWS
+    day = timezone.localdate(predicted_at) if timezone.is_aware(predicted_at) else predicted_at.date()
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        with transaction.atomic():
+            insert_prediction_rows(chunk)
+            add_to_summary(day, Counter(
+                (row[CHANNEL_INDEX], row[PRODUCT_TYPE_INDEX], row[CATEGORY_INDEX]) for row in chunk
+            ))
+    return len(rows)
+
+
+@contextmanager
+def prediction_persister(model_version):
+    """
+    Context manager yielding an on_scored callback for score_file, or None
+    when PERSIST_PREDICTIONS is off.
+
+    Scored chunks are converted to row tuples as they arrive and spooled to a
+    temporary file, so memory stays bounded by the chunk size. They are only
+    stored once the block exits without an error, so a file that fails part
+    way through leaves nothing behind to be counted twice when it is re-uploaded.
+    """
+    if not settings.PERSIST_PREDICTIONS:
+        yield None
+        return
+
+    with tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR) as spool:
+        def on_scored(df, categories):
+            with stage("persist"):
+                predicted_at = timezone.now()
+                rows = prediction_rows(df, categories, model_version, predicted_at)
+                pickle.dump((predicted_at, rows), spool, pickle.HIGHEST_PROTOCOL)
+
+        yield on_scored
+
+        spool.seek(0)
+        with stage("persist"):
+            while True:
+                try:
+                    predicted_at, rows = pickle.load(spool)
+                except EOFError:
+                    break
+                store_prediction_rows(rows, predicted_at)
@@ -0,0 +1,187 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from loguru import logger
+
+# Saved profiles: <id>.prof (pstats data) next to <id>.json (request details)
+PROFILE_DIR = os.path.join(settings.MEDIA_ROOT, "profiles")
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[a-z0-9_]+-[0-9a-f]{8}$")
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_QUERY_PARAM = "profile"
+
+_prune_lock = threading.Lock()
+
+
+def profile_requested(request):
+    """
+    Whether the request asked to be profiled and is allowed to be.
+
+    Profiling is off unless PROFILING_ENABLED is set. The X-Profile header or
+    ?profile= query value must then be "1", or equal PROFILING_TOKEN when one
+    is configured.
+    """
+    if not settings.PROFILING_ENABLED:
+        return False
+    value = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM)
+    if not value:
+        return False
+    return value == settings.PROFILING_TOKEN if settings.PROFILING_TOKEN else value == "1"
+
+
+def save_profile(profiler, request, response, duration):
+    """
+    Writes a finished profile to the store and prunes the oldest ones past PROFILE_MAX_FILES.
+
+    Returns:
+    str: The profile ID.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = re.sub(r"[^a-z0-9]+", "_", request.path.lower()).strip("_") or "root"
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}"
+
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+    details = {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "created_at": time.time(),
+    }
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump(details, f)
+
+    prune_profiles()
+    return profile_id
+
+
+def list_profiles():
+    """
+    Details of every stored profile, newest first.
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (FileNotFoundError, ValueError):
+            continue  # pruned or half-written
+    return sorted(profiles, key=lambda details: details["created_at"], reverse=True)
+
+
+def prune_profiles(max_files=None):
+    """
+    Deletes the oldest profiles beyond max_files (PROFILE_MAX_FILES by default).
+    """
+    max_files = settings.PROFILE_MAX_FILES if max_files is None else max_files
+    with _prune_lock:
+        for details in list_profiles()[max_files:]:
+            for extension in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, details["id"] + extension))
+                except FileNotFoundError:
+                    pass
+
+
+def profile_path(profile_id):
+    """
+    Returns the .prof path of a stored profile, or None if the ID is unknown or malformed.
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
+
+
+def profile_text(path, limit=50):
+    """
+    Renders a stored profile as pstats text, sorted by cumulative time.
+    """
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests to the model API on demand with cProfile.
+
+    Only the request's own thread is profiled: work handed to the
+    micro-batcher, the async inference executor or background job threads
+    does not show up. Under ASGI the profile of an async view also includes
+    whatever else ran on the event loop meanwhile.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith("/model/") or not profile_requested(request):
+            return self.get_response(request)
+
+        profiler = self._start()
+        if profiler is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        finally:
+            profiler.disable()
+        return self._finish(profiler, request, response, started)
+
+    async def __acall__(self, request):
+        if not request.path.startswith("/model/") or not profile_requested(request):
+            return await self.get_response(request)
+
+        profiler = self._start()
+        if profiler is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        finally:
+            profiler.disable()
+        return self._finish(profiler, request, response, started)
+
+    @staticmethod
+    def _start():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return None
+        return profiler
+
+    @staticmethod
+    def _finish(profiler, request, response, started):
+        try:
+            response["X-Profile-Id"] = save_profile(profiler, request, response, time.perf_counter() - started)
+        except OSError as e:
+            logger.error(f"Could not save request profile: {e}")
+        return response
@@ -0,0 +1,370 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from loguru import logger
+
+from . import config
+from .cache import file_fingerprint
+from .encoder import FeatureEncoder
+from .metrics import ACTIVE_MODEL, MODEL_LOAD_SECONDS, MODEL_RELOADS
+from .runtime import SMALL_BATCH_BUCKETS, SmallBatchPredictor, load_model
+
+# Registry layout: versions/<version>/{model.h5, features.json, manifest.json},
+# plus an ACTIVE file naming the version workers should serve
+VERSIONS_DIR = "versions"
+ACTIVE_FILE = "ACTIVE"
+MODEL_FILE = "model.h5"
+FEATURES_FILE = "features.json"
+MANIFEST_FILE = "manifest.json"
+
+# Versions end up in InsuranceData.model_version (32 characters) with a precision suffix
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,23}$")
+
+# Batch sizes run through model.predict once after loading, so the first upload
+# does not pay for warm-up; small batches are warmed per SmallBatchPredictor bucket
+WARMUP_BATCH_SIZES = (1024,)
+
+
+class FeatureConfig:
+    """
+    Feature settings a model version was trained with: the raw columns, the
+    scaling statistics, the categorical encodings, the class labels and the
+    accepted ranges of the numeric inputs.
+
+    The model built into the repo uses config.py; registry versions carry
+    their own copy in features.json.
+    """
+
+    def __init__(self, required_columns, mean_std, min_max, one_hot_columns, label_encodings, fraud_category,
+                 valid_ranges=None):
+        self.required_columns = list(required_columns)
+        self.mean_std = {col: tuple(values) for col, values in mean_std.items()}
+        self.min_max = {col: tuple(values) for col, values in min_max.items()}
+        self.one_hot_columns = {col: list(values) for col, values in one_hot_columns.items()}
+        self.label_encodings = {col: dict(mapping) for col, mapping in label_encodings.items()}
+        self.fraud_category = {int(label): name for label, name in fraud_category.items()}
+        # Versions published before validation ranges existed use the ones in config.py
+        valid_ranges = config.VALID_RANGES if valid_ranges is None else valid_ranges
+        self.valid_ranges = {col: tuple(values) for col, values in valid_ranges.items()}
+        # Category names indexed by predicted class, for mapping whole batches at once
+        self.category_labels = np.array([self.fraud_category[i] for i in sorted(self.fraud_category)], dtype=object)
+
+    @classmethod
+    def from_config_module(cls):
+        return cls(
+            config.REQUIRED_COLUMNS, config.MEAN_STD, config.MIN_MAX,
+            config.ONE_HOT_COLUMNS, config.LABEL_ENCODINGS, config.FRAUD_CATEGORY, config.VALID_RANGES,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def as_dict(self):
+        return {
+            "required_columns": self.required_columns,
+            "mean_std": self.mean_std,
+            "min_max": self.min_max,
+            "one_hot_columns": self.one_hot_columns,
+            "label_encodings": self.label_encodings,
+            "fraud_category": self.fraud_category,
+            "valid_ranges": self.valid_ranges,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class LoadedModel:
+    """
+    A model version that is fully loaded and ready to serve, with its feature
+    plan and labels. Requests take one LoadedModel at the start and use it
+    throughout, so a swap never mixes two versions within a request.
+    """
+
+    def __init__(self, version, model, features, registry_version=None, small_batch_buckets=SMALL_BATCH_BUCKETS):
+        self.version = version
+        self.registry_version = registry_version
+        self.model = model
+        self.small_batch = SmallBatchPredictor(model, small_batch_buckets)
+        self.features = features
+        self.encoder = FeatureEncoder(
+            features.required_columns, features.mean_std, features.min_max,
+            features.one_hot_columns, features.label_encodings,
+        )
+        self.loaded_at = time.time()
+
+    def predict(self, features):
+        """
+        Returns the class probabilities of a feature matrix, using the compiled
+        small-batch path when it fits and model.predict otherwise.
+        """
+        return self.small_batch.predict(features)
+
+    def warm(self):
+        """
+        Runs every small-batch bucket and WARMUP_BATCH_SIZES once, so graph
+        tracing and buffer allocation happen before the version serves requests.
+        """
+        self.small_batch.warm()
+        n_features = len(self.encoder.feature_names)
+        for batch_size in WARMUP_BATCH_SIZES:
+            self.model.predict(np.zeros((batch_size, n_features), dtype=np.float32), batch_size=batch_size, verbose=0)
+
+
+def _version_dir(registry_dir, version):
+    return os.path.join(registry_dir, VERSIONS_DIR, version)
+
+
+def publish_version(registry_dir, h5_path, version=None, features=None):
+    """
+    Copies a model into the registry as a new, inactive version.
+
+    The files are staged in a temporary directory and renamed into place, so
+    a worker never sees a version without all of its files.
+
+    Parameters:
+    registry_dir (str): Registry root (MODEL_REGISTRY_DIR).
+    h5_path (str): Keras model to publish.
+    version (str): Version name; defaults to the date and the model fingerprint.
+    features (FeatureConfig): Feature config the model was trained with; config.py by default.
+
+    Returns:
+    dict: The version's manifest.
+    """
+    fingerprint = file_fingerprint(h5_path)
+    version = version or f"{time.strftime('%Y%m%d')}-{fingerprint[:8]}"
+    if not VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid version name: {version!r} (letters, digits, '.', '_' and '-', at most 24)")
+    final_dir = _version_dir(registry_dir, version)
+    if os.path.exists(final_dir):
+        raise ValueError(f"Version {version} already exists")
+
+    staging_dir = os.path.join(registry_dir, VERSIONS_DIR, f".staging-{uuid.uuid4().hex}")
+    os.makedirs(staging_dir)
+    try:
+        shutil.copyfile(h5_path, os.path.join(staging_dir, MODEL_FILE))
+        (features or FeatureConfig.from_config_module()).save(os.path.join(staging_dir, FEATURES_FILE))
+        manifest = {
+            "version": version,
+            "fingerprint": fingerprint,
+            "source": os.path.basename(h5_path),
+            "created_at": time.time(),
+        }
+        with open(os.path.join(staging_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def list_versions(registry_dir):
+    """
+    Manifests of every published version, oldest first.
+    """
+    versions_dir = os.path.join(registry_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    manifests = []
+    for name in os.listdir(versions_dir):
+        manifest_path = os.path.join(versions_dir, name, MANIFEST_FILE)
+        if name.startswith(".") or not os.path.exists(manifest_path):
+            continue
+        with open(manifest_path) as f:
+            manifests.append(json.load(f))
+    return sorted(manifests, key=lambda manifest: manifest["created_at"])
+
+
+def read_active_version(registry_dir):
+    """
+    Returns the version named in the ACTIVE file, or None if no version was activated.
+    """
+    try:
+        with open(os.path.join(registry_dir, ACTIVE_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def activate_version(registry_dir, version):
+    """
+    Points ACTIVE at a published version; workers pick it up on their next poll.
+    """
+    if not os.path.exists(os.path.join(_version_dir(registry_dir, version), MANIFEST_FILE)):
+        raise ValueError(f"Unknown version: {version}")
+    partial_path = os.path.join(registry_dir, f"{ACTIVE_FILE}.{os.getpid()}.partial")
+    with open(partial_path, "w") as f:
+        f.write(version)
+    os.replace(partial_path, os.path.join(registry_dir, ACTIVE_FILE))
+
+
+class ModelHolder:
+    """
+    Holds the model version this process serves and swaps in newly activated
+    versions without a restart.
+
+    A new version is loaded and warmed on a background thread while the
+    current one keeps serving; the swap is a single reference assignment once
+    it is ready. If loading fails, the current version stays in place and the
+    error is reported in status(). Without an activated registry version, the
+    model built into the repo (model/model.h5 with config.py) is served.
+    """
+
+    def __init__(self, registry_dir, builtin_h5_path, runtime, precision, builtin_npz_path=None,
+                 small_batch_buckets=SMALL_BATCH_BUCKETS):
+        self.registry_dir = registry_dir
+        self.builtin_h5_path = builtin_h5_path
+        self.builtin_npz_path = builtin_npz_path or os.path.splitext(builtin_h5_path)[0] + ".npz"
+        self.runtime = runtime
+        self.precision = precision
+        self.small_batch_buckets = small_batch_buckets
+
+        self._current = None
+        self._loading = None
+        self._last_error = None
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    @property
+    def current(self):
+        """
+        The LoadedModel to serve; the first access loads it synchronously.
+        """
+        loaded = self._current
+        if loaded is None:
+            with self._lock:
+                if self._current is None:
+                    self._swap(self._load_startup_version())
+                loaded = self._current
+        return loaded
+
+    def ensure_loaded(self):
+        """
+        Loads the startup version now, so the first request does not pay for it.
+        """
+        return self.current
+
+    def _serving_version(self, name):
+        # Reduced-precision variants can predict differently, so they get their own version
+        return name if self.precision == "float32" else f"{name}-{self.precision}"
+
+    def load(self, version):
+        """
+        Loads and warms a registry version, or the built-in model when version is None.
+        """
+        started = time.perf_counter()
+        if version is None:
+            model = load_model(self.runtime, self.builtin_h5_path, self.builtin_npz_path, self.precision)
+            loaded = LoadedModel(
+                self._serving_version(file_fingerprint(self.builtin_h5_path)), model,
+                FeatureConfig.from_config_module(), small_batch_buckets=self.small_batch_buckets,
+            )
+        else:
+            version_dir = _version_dir(self.registry_dir, version)
+            h5_path = os.path.join(version_dir, MODEL_FILE)
+            model = load_model(self.runtime, h5_path, os.path.splitext(h5_path)[0] + ".npz", self.precision)
+            loaded = LoadedModel(
+                self._serving_version(version), model, FeatureConfig.load(os.path.join(version_dir, FEATURES_FILE)),
+                registry_version=version, small_batch_buckets=self.small_batch_buckets,
+            )
+        loaded.warm()
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
+        return loaded
+
+    def _load_startup_version(self):
+        version = read_active_version(self.registry_dir)
+        if version is not None:
+            try:
+                return self.load(version)
+            except Exception as e:
+                self._last_error = f"{version}: {e}"
+                logger.error(f"Could not load active model version {version}, serving the built-in model: {e}")
+        return self.load(None)
+
+    def _swap(self, loaded):
+        previous = self._current
+        self._current = loaded
+        if previous is not None:
+            ACTIVE_MODEL.labels(previous.version).set(0)
+        ACTIVE_MODEL.labels(loaded.version).set(1)
+
+    def refresh(self, wait=False):
+        """
+        Starts loading the activated version in the background if it is not the one being served.
+
+        Returns:
+        threading.Thread: The loading thread, or None if nothing needed loading.
+        """
+        version = read_active_version(self.registry_dir)
+        current = self.current
+        if version is None or current.registry_version == version:
+            return None
+        with self._lock:
+            if self._loading is not None:
+                return None
+            self._loading = version
+        thread = threading.Thread(target=self._load_and_swap, args=(version,), name="model-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def _load_and_swap(self, version):
+        try:
+            loaded = self.load(version)
+        except Exception as e:
+            self._last_error = f"{version}: {e}"
+            MODEL_RELOADS.labels("failed").inc()
+            logger.error(f"Could not load model version {version}; still serving {self._current.version}: {e}")
+            # Do not retry a broken version on every poll; a new activation is needed
+            self._failed_version = version
+        else:
+            with self._lock:
+                self._swap(loaded)
+            self._last_error = None
+            MODEL_RELOADS.labels("loaded").inc()
+            logger.info(f"Now serving model version {loaded.version}")
+        finally:
+            with self._lock:
+                self._loading = None
+
+    def start_watching(self, poll_seconds):
+        """
+        Polls the ACTIVE file every poll_seconds on a daemon thread.
+        """
+        if poll_seconds <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(poll_seconds)
+                try:
+                    if read_active_version(self.registry_dir) != self._failed_version:
+                        self.refresh()
+                except Exception as e:
+                    logger.error(f"Model registry poll failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="model-registry-watch", daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        current = self.current
+        return {
+            "active": current.version,
+            "registry_version": current.registry_version,
+            "loaded_at": current.loaded_at,
+            "loading": self._loading,
+            "last_error": self._last_error,
+            "registry_active": read_active_version(self.registry_dir),
+        }
@@ -0,0 +1,288 @@
+import json
+import os
+
+import h5py
+import numpy as np
+
+# Largest absolute difference in class probabilities allowed between NumpyModel and model.predict
+PREDICT_TOLERANCE = 1e-5
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    # fmax maps NaN to 0, as the fused relu in model.predict does
+    "relu": lambda x: np.fmax(x, 0, out=x),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": lambda x: softmax(x),
+}
+
+# Layers that do nothing at inference time
+PASSTHROUGH_LAYERS = {"InputLayer", "Dropout"}
+
+# Weight precisions the NumPy runtime can serve; float32 is the exact export
+PRECISIONS = ("float32", "float16", "int8")
+
+# Padded batch sizes scored by SmallBatchPredictor; larger batches go through model.predict
+SMALL_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+def softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+def _savez_atomic(path, **arrays):
+    """
+    Writes an .npz next to its destination and renames it into place, so
+    another worker never loads a half-written file.
+    """
+    partial_path = f"{os.path.splitext(path)[0]}.{os.getpid()}.partial.npz"
+    np.savez(partial_path, **arrays)
+    os.replace(partial_path, path)
+
+
+def _layer_weights(group):
+    """
+    Collects the datasets stored under a layer's weight group, keyed by their short name (kernel, bias).
+    """
+    weights = {}
+
+    def collect(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            weights[name.rsplit("/", 1)[-1].split(":")[0]] = obj[()]
+
+    group.visititems(collect)
+    return weights
+
+
+def export_npz(h5_path, npz_path):
+    """
+    Reads the dense layers of a Keras Sequential .h5 file and saves their weights
+    and activations to a compact .npz file.
+
+    Parameters:
+    h5_path (str): Path to the Keras model saved in HDF5 format.
+    npz_path (str): Destination of the exported weights.
+
+    Returns:
+    int: Number of dense layers exported.
+    """
+    arrays = {}
+    activations = []
+
+    with h5py.File(h5_path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        if config["class_name"] != "Sequential":
+            raise ValueError(f"Only Sequential models can be exported, got {config['class_name']}")
+
+        for layer in config["config"]["layers"]:
+            class_name, layer_config = layer["class_name"], layer["config"]
+            if class_name in PASSTHROUGH_LAYERS:
+                continue
+            if class_name != "Dense":
+                raise ValueError(f"Unsupported layer type: {class_name}")
+
+            activation = layer_config.get("activation", "linear")
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+
+            weights = _layer_weights(f["model_weights"][layer_config["name"]])
+            index = len(activations)
+            arrays[f"kernel_{index}"] = weights["kernel"].astype(np.float32)
+            if layer_config.get("use_bias", True):
+                arrays[f"bias_{index}"] = weights["bias"].astype(np.float32)
+            activations.append(activation)
+
+    _savez_atomic(npz_path, activations=np.array(activations), **arrays)
+    return len(activations)
+
+
+def quantize_npz(npz_path, output_path, precision):
+    """
+    Writes a reduced-precision variant of an export_npz file.
+
+    "float16" stores kernels and biases as float16. "int8" stores each kernel
+    as int8 with one float32 scale per output unit (symmetric, max |w| -> 127)
+    and keeps biases in float32, as they are few and sensitive to rounding.
+
+    Parameters:
+    npz_path (str): Float32 weights written by export_npz.
+    output_path (str): Destination of the variant.
+    precision (str): "float16" or "int8".
+    """
+    if precision not in PRECISIONS[1:]:
+        raise ValueError(f"Unknown reduced precision: {precision}")
+
+    arrays = {}
+    with np.load(npz_path) as data:
+        for name in data.files:
+            array = data[name]
+            if name == "activations":
+                arrays[name] = array
+            elif precision == "float16":
+                arrays[name] = array.astype(np.float16)
+            elif name.startswith("kernel_"):
+                scale = np.abs(array).max(axis=0) / 127
+                scale[scale == 0] = 1
+                arrays[name] = np.round(array / scale).astype(np.int8)
+                arrays[name.replace("kernel_", "scale_")] = scale.astype(np.float32)
+            else:
+                arrays[name] = array
+
+    _savez_atomic(output_path, precision=np.array(precision), **arrays)
+
+
+def variant_path(npz_path, precision):
+    """
+    Path of a precision variant next to the float32 export, e.g. model.int8.npz.
+    """
+    if precision == "float32":
+        return npz_path
+    root, extension = os.path.splitext(npz_path)
+    return f"{root}.{precision}{extension}"
+
+
+class NumpyModel:
+    """
+    Pure-NumPy forward pass over weights exported by export_npz or quantize_npz.
+
+    predict() mirrors the Keras signature used by the views, so the object can
+    stand in for the loaded Keras model without importing TensorFlow.
+
+    Reduced-precision kernels stay in their stored type in memory and are
+    widened to float32 one layer at a time inside predict(), since NumPy has
+    no fast float16 or int8 matrix products on CPU. That makes them slower
+    than float32; they exist to measure accuracy loss (compare_model_variants),
+    not to be served.
+    """
+
+    def __init__(self, npz_path):
+        with np.load(npz_path) as data:
+            self.precision = str(data["precision"]) if "precision" in data else "float32"
+            self.layers = [
+                (
+                    data[f"kernel_{i}"],
+                    data[f"scale_{i}"] if f"scale_{i}" in data else None,
+                    data[f"bias_{i}"].astype(np.float32) if f"bias_{i}" in data else None,
+                    ACTIVATIONS[str(name)],
+                )
+                for i, name in enumerate(data["activations"])
+            ]
+
+    @property
+    def input_dim(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def weight_bytes(self):
+        """
+        Memory held by the weights, in bytes.
+        """
+        return sum(array.nbytes for layer in self.layers for array in layer[:3] if array is not None)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        for kernel, scale, bias, activation in self.layers:
+            x = x @ (kernel if kernel.dtype == np.float32 else kernel.astype(np.float32))
+            if scale is not None:
+                x *= scale
+            if bias is not None:
+                x += bias
+            x = activation(x)
+        return x
+
+
+class SmallBatchPredictor:
+    """
+    Scores small batches (single predict_json records, micro-batches) without
+    the per-call overhead of model.predict.
+
+    For a Keras model, the forward pass is compiled once per bucket size into
+    a concrete function with a fixed input signature, and each batch is padded
+    with zero rows up to the smallest bucket that holds it. model.predict
+    instead rebuilds its data adapter on every call, which costs far more than
+    the network itself at a few rows. The NumPy runtime already scores with a
+    plain function call, so its batches are passed straight through.
+
+    Batches larger than the biggest bucket fall back to model.predict.
+    """
+
+    def __init__(self, model, buckets=SMALL_BATCH_BUCKETS):
+        self.model = model
+        self.buckets = tuple(sorted(buckets))
+        self._functions = {}
+
+        if isinstance(model, NumpyModel):
+            self.input_dim = model.input_dim
+        else:
+            import tensorflow as tf
+
+            self.input_dim = model.input_shape[-1]
+            forward = tf.function(lambda x: model(x, training=False))
+            self._functions = {
+                size: forward.get_concrete_function(tf.TensorSpec([size, self.input_dim], tf.float32))
+                for size in self.buckets
+            }
+
+    def bucket(self, rows):
+        """
+        Smallest bucket that holds rows, or None if the batch is too large for the fast path.
+        """
+        for size in self.buckets:
+            if rows <= size:
+                return size
+        return None
+
+    def predict(self, x):
+        """
+        Returns the class probabilities of a feature matrix, like model.predict.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        rows = len(x)
+        size = self.bucket(rows)
+        if size is None:
+            return self.model.predict(x, batch_size=rows, verbose=0)
+        if not self._functions:
+            return self.model.predict(x)
+        if rows < size:
+            x = np.concatenate([x, np.zeros((size - rows, self.input_dim), dtype=np.float32)])
+        return self._functions[size](x).numpy()[:rows]
+
+    def warm(self):
+        """
+        Runs a zero batch through every bucket, so no request pays for the first call.
+        """
+        for size in self.buckets:
+            self.predict(np.zeros((size, self.input_dim), dtype=np.float32))
+
+
+def load_numpy_model(h5_path, npz_path, precision="float32"):
+    """
+    Loads the NumPy runtime, exporting the .h5 weights first if the .npz is missing or older,
+    and deriving the precision variant the same way.
+    """
+    if not os.path.exists(npz_path) or os.path.getmtime(npz_path) < os.path.getmtime(h5_path):
+        export_npz(h5_path, npz_path)
+    path = variant_path(npz_path, precision)
+    if path != npz_path and (not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(npz_path)):
+        quantize_npz(npz_path, path, precision)
+    return NumpyModel(path)
+
+
+def load_model(runtime, h5_path, npz_path, precision="float32"):
+    """
+    Loads the scoring model for the configured runtime ("keras" or "numpy")
+    and weight precision (one of PRECISIONS; reduced precisions need the NumPy runtime).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown MODEL_PRECISION: {precision}")
+    if runtime == "numpy":
+        return load_numpy_model(h5_path, npz_path, precision)
+    if runtime == "keras":
+        if precision != "float32":
+            raise ValueError("Reduced-precision models are served by the NumPy runtime; set MODEL_RUNTIME=numpy")
+        import tensorflow as tf
+        return tf.keras.models.load_model(h5_path)
+    raise ValueError(f"Unknown MODEL_RUNTIME: {runtime}")
@@ -0,0 +1,557 @@
+import csv
+import os
+
+from itertools import islice
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from .config import REQUIRED_COLUMNS
+from .metrics import stage
+from .registry import ModelHolder
+from .utils import preprocess_batch
+from .validation import numeric_columns, quarantine, validate_records
+
+# Load the active model version once when Django starts; serving processes
+# then follow the registry (see start_serving)
+model_path = os.path.join(os.path.dirname(__file__), "model.h5")
+model_holder = ModelHolder(
+    settings.MODEL_REGISTRY_DIR, model_path, settings.MODEL_RUNTIME, settings.MODEL_PRECISION,
+    builtin_npz_path=settings.NUMPY_MODEL_PATH, small_batch_buckets=settings.SMALL_BATCH_BUCKETS,
+)
+model_holder.ensure_loaded()
+
+
+def start_serving():
+    """
+    Follows the model registry: newly activated versions are loaded in the
+    background and swapped in. Called by the WSGI and ASGI entry points, so
+    management commands and tests do not start the polling thread.
+    """
+    model_holder.start_watching(settings.MODEL_REGISTRY_POLL_SECONDS)
+
+
+def active_model():
+    """
+    Returns the LoadedModel to use for a request; callers keep it for the whole request.
+    """
+    return model_holder.current
+
+
+# Output format written for each accepted upload format
+OUTPUT_EXTENSIONS = {
+    ".csv": ".csv",
+    ".xls": ".xlsx",
+    ".xlsx": ".xlsx",
+    ".parquet": ".parquet",
+    ".arrow": ".arrow",
+    ".feather": ".arrow",
+}
+
+
+def predict_probabilities(features, active=None):
+    """
+    Scores a feature matrix in fixed-size chunks and returns the class probabilities per row.
+
+    active (LoadedModel): Model version to use, the active one by default.
+    """
+    active = active or active_model()
+    features = np.asarray(features, dtype=np.float32)
+    chunk_size = settings.PREDICT_CHUNK_SIZE
+    probabilities = None
+
+    for start in range(0, len(features), chunk_size):
+        chunk = features[start:start + chunk_size]
+        with stage("predict"):
+            predictions = active.predict(chunk)
+        if probabilities is None:
+            # The model's output width, which may be narrower than its fraud categories
+            probabilities = np.empty((len(features), predictions.shape[1]), dtype=np.float32)
+        probabilities[start:start + len(chunk)] = predictions
+
+    return probabilities
+
+
+def predict_classes(features, active=None):
+    """
+    Scores a feature matrix in fixed-size chunks and returns the predicted class per row.
+
+    active (LoadedModel): Model version to use, the active one by default.
+    """
+    active = active or active_model()
+    features = np.asarray(features, dtype=np.float32)
+    chunk_size = settings.PREDICT_CHUNK_SIZE
+    classes = np.empty(len(features), dtype=np.int64)
+
+    for start in range(0, len(features), chunk_size):
+        chunk = features[start:start + chunk_size]
+        with stage("predict"):
+            predictions = active.predict(chunk)
+        classes[start:start + len(chunk)] = np.argmax(predictions, axis=1)
+
+    return classes
+
+
+def payload_frame(payload, max_records, required_columns=REQUIRED_COLUMNS):
+    """
+    Builds a DataFrame of raw records from a JSON batch payload.
+
+    Parameters:
+    payload (list | dict): Either a list of records (field -> value) or a
+    column-oriented dict (field -> list of values, all the same length).
+    max_records (int): Largest number of records accepted.
+    required_columns (list): Columns every record must have.
+
+    Returns:
+    pd.DataFrame: One row per record.
+
+    Raises:
+    ValueError: If the payload has the wrong shape, too many records or misses required columns.
+    """
+    if isinstance(payload, list):
+        if not all(isinstance(record, dict) for record in payload):
+            raise ValueError("Every record must be an object of field values.")
+        n_records = len(payload)
+    elif isinstance(payload, dict):
+        lengths = {len(values) if isinstance(values, list) else None for values in payload.values()}
+        if None in lengths or len(lengths) > 1:
+            raise ValueError("Column-oriented payloads need a list of values per field, all the same length.")
+        n_records = lengths.pop() if lengths else 0
+    else:
+        raise ValueError("Send a list of records or an object of columns.")
+
+    if n_records == 0:
+        raise ValueError("No records to score.")
+    if n_records > max_records:
+        raise ValueError(f"Too many records: {n_records} (at most {max_records} per request).")
+
+    df = pd.DataFrame.from_records(payload) if isinstance(payload, list) else pd.DataFrame(payload)
+    missing = [column for column in required_columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return df
+
+
+def score_records(df, top_k=0, active=None):
+    """
+    Scores raw records with one preprocessing pass and one inference call.
+
+    Parameters:
+    df (pd.DataFrame): Raw records with the REQUIRED_COLUMNS.
+    top_k (int): Number of most likely categories to return per record, 0 for none.
+    active (LoadedModel): Model version to use, the active one by default.
+
+    Returns:
+    tuple: Predicted category per record, and per record a list of
+    (category, probability) pairs, most likely first (None when top_k is 0).
+    """
+    active = active or active_model()
+    probabilities = predict_probabilities(preprocess_batch(df, active.features), active)
+    labels = active.features.category_labels[np.argmax(probabilities, axis=1)]
+    if not top_k:
+        return labels.tolist(), None
+
+    top_k = min(top_k, probabilities.shape[1])
+    top_classes = np.argsort(-probabilities, axis=1, kind="stable")[:, :top_k]
+    top_probabilities = np.take_along_axis(probabilities, top_classes, axis=1).round(6).tolist()
+    top_labels = active.features.category_labels[top_classes].tolist()
+    return labels.tolist(), [list(zip(names, values)) for names, values in zip(top_labels, top_probabilities)]
+
+
+def score_frame(df, active=None):
+    """
+    Appends the predicted fraud category of every row to df as a "Predicted" column.
+    """
+    active = active or active_model()
+    if not all(col in df.columns for col in active.features.required_columns):
+        raise ValueError("Missing required columns")
+
+    df["Predicted"] = active.features.category_labels[predict_classes(preprocess_batch(df, active.features), active)]
+    return df
+
+
+def _predict_labels(clean, active):
+    """
+    Predicted fraud category of each validated record.
+    """
+    if not len(clean):
+        return np.array([], dtype=object)
+    return active.features.category_labels[predict_classes(preprocess_batch(clean, active.features), active)]
+
+
+def score_valid_rows(df, active=None, rejects=None):
+    """
+    Validates raw records (see validate_records), quarantines the invalid ones
+    in rejects and returns the valid rows with a "Predicted" column appended.
+
+    Raises:
+    ValueError: If required columns are missing, or rows are invalid and rejects is None.
+    """
+    active = active or active_model()
+    if not all(col in df.columns for col in active.features.required_columns):
+        raise ValueError("Missing required columns")
+
+    with stage("validate"):
+        clean, valid, reasons = validate_records(df, active.features)
+    if reasons:
+        quarantine(lambda: df[~valid], reasons, rejects)
+        df, clean = df[valid].copy(), clean[valid]
+    df["Predicted"] = _predict_labels(clean, active)
+    return df
+
+
+def score_csv_stream(source, output_path, chunk_rows, on_progress=None, on_scored=None, active=None, rejects=None):
+    """
+    Reads a CSV in chunks of chunk_rows, scores each chunk and appends it to output_path
+    straight away, so peak memory is bounded by the chunk size rather than the file size.
+
+    The output is written to a ".part" file and renamed once complete, so a
+    failed upload never leaves a half-written file behind for download.
+    on_progress, if given, is called with the running count of rows read after
+    each chunk, and on_scored with each chunk's valid records and predicted
+    categories. Invalid rows go to rejects (see score_valid_rows).
+
+    Returns:
+    int: Number of rows scored.
+    """
+    partial_path = output_path + ".part"
+    rows = processed = 0
+
+    try:
+        with pd.read_csv(source, chunksize=chunk_rows) as reader, open(partial_path, "w", newline="") as out:
+            for i, chunk in enumerate(reader):
+                scored = score_valid_rows(chunk, active, rejects)
+                scored.to_csv(out, header=(i == 0), index=False)
+                if on_scored is not None:
+                    on_scored(scored, scored["Predicted"])
+                rows += len(scored)
+                processed += len(chunk)
+                if on_progress is not None:
+                    on_progress(processed)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    return rows
+
+
+def _csv_header(source):
+    """
+    Returns the column names on the first line of a CSV path or binary file object.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            line = f.readline()
+    else:
+        line = source.readline()
+        source.seek(0)
+    return next(csv.reader([line.decode("utf-8-sig")]), [])
+
+
+def _csv_column_types(header):
+    """
+    Arrow types to read a CSV with: string for every column.
+
+    Numbers and dates are parsed by validate_records, which rejects bad values
+    row by row where a typed read would fail the whole file. Fixing the types
+    up front also means a later block can never disagree with types inferred
+    from the first one, and passthrough columns are written back exactly as
+    they were uploaded.
+    """
+    return {name: pa.string() for name in header}
+
+
+def _rebatch(batches, chunk_rows):
+    """
+    Yields record batches of chunk_rows rows (the last one may be shorter),
+    slicing large batches and concatenating small ones, so scoring works on
+    full chunks whatever the block size the file was read in.
+    """
+    pending, pending_rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_rows:
+            table = pa.Table.from_batches(pending).combine_chunks()
+            yield from table.slice(0, chunk_rows).to_batches()
+            rest = table.slice(chunk_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield from pa.Table.from_batches(pending).combine_chunks().to_batches()
+
+
+def _open_columnar(source, extension):
+    """
+    Opens a Parquet, Arrow IPC or CSV file and returns its schema and a
+    function yielding record batches of at most chunk_rows rows.
+
+    Parquet and Arrow IPC files on disk (source is a path) are memory-mapped,
+    so IPC batches are read without copying. CSV is parsed block by block by
+    Arrow's multithreaded reader.
+    """
+    on_disk = isinstance(source, str)
+    if extension == ".parquet":
+        parquet_file = pq.ParquetFile(source, memory_map=on_disk)
+        return parquet_file.schema_arrow, lambda chunk_rows: parquet_file.iter_batches(batch_size=chunk_rows)
+
+    if extension == ".csv":
+        types = _csv_column_types(_csv_header(source))
+        # Read through a buffered stream, not a memory map: a mapped CSV would count
+        # fully towards RSS once parsed, while blocks are only needed once
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(use_threads=True, block_size=settings.PREDICT_FILE_CSV_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(column_types=types, strings_can_be_null=True),
+        )
+        return reader.schema, lambda chunk_rows: _rebatch(reader, chunk_rows)
+
+    reader = pa.ipc.open_file(pa.memory_map(source) if on_disk else source)
+
+    batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return reader.schema, lambda chunk_rows: _rebatch(batches, chunk_rows)
+
+
+def _required_frame(batch, features):
+    """
+    Converts the required columns of a record batch to pandas.
+
+    String columns that should be numeric (CSV is read as strings) are cast by
+    Arrow first, which is much faster than parsing them in pandas; a column
+    holding a non-number stays as strings for validate_records to flag row by row.
+    """
+    required = batch.select(features.required_columns)
+    for col in numeric_columns(features):
+        index = required.schema.get_field_index(col)
+        if pa.types.is_string(required.schema.field(index).type):
+            try:
+                required = required.set_column(index, col, pc.cast(required.column(index), pa.float64()))
+            except pa.ArrowInvalid:
+                pass
+    return required.to_pandas(date_as_object=False)
+
+
+def score_record_batch(batch, active=None, rejects=None):
+    """
+    Returns the valid rows of an Arrow record batch with a "Predicted" column
+    appended; invalid rows go to rejects (see score_valid_rows).
+
+    Only the required columns are converted to pandas for validation and
+    preprocessing; the other columns pass through to the output untouched.
+    """
+    active = active or active_model()
+    with stage("validate"):
+        required = _required_frame(batch, active.features)
+        clean, valid, reasons = validate_records(required, active.features)
+    if reasons:
+        quarantine(lambda: batch.filter(pa.array(~valid)).to_pandas(date_as_object=False), reasons, rejects)
+        batch, clean = batch.filter(pa.array(valid)), clean[valid]
+    return batch.append_column("Predicted", pa.array(_predict_labels(clean, active), type=pa.string()))
+
+
+class _CsvBatchWriter:
+    """
+    Writes record batches to a CSV file through pandas, which quotes only the
+    fields that need it. Arrow's CSV writer quotes every string, and CSV
+    uploads are read as strings, so its output would quote every value.
+    """
+
+    def __init__(self, path, schema):
+        self._file = open(path, "w", newline="")
+        pd.DataFrame(columns=schema.names).to_csv(self._file, index=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def write_batch(self, batch):
+        batch.to_pandas().to_csv(self._file, header=False, index=False)
+
+
+def score_columnar_stream(source, output_path, chunk_rows, extension, on_progress=None, on_scored=None, active=None,
+                          rejects=None):
+    """
+    Scores a Parquet (.parquet), Arrow IPC (.arrow/.feather) or CSV file batch
+    by batch with Arrow and writes the result in the same format family as the input.
+
+    Only the required columns are converted to pandas for scoring; the others
+    stay in Arrow buffers until the batch is written. CSV output is written
+    like score_csv_stream's, with passthrough columns as they were uploaded.
+
+    Returns:
+    int: Number of rows scored.
+    """
+    active = active or active_model()
+    schema, iter_batches = _open_columnar(source, extension)
+    if not all(col in schema.names for col in active.features.required_columns):
+        raise ValueError("Missing required columns")
+
+    output_schema = schema.append(pa.field("Predicted", pa.string()))
+    partial_path = output_path + ".part"
+    rows = processed = 0
+
+    try:
+        if extension == ".parquet":
+            writer = pq.ParquetWriter(partial_path, output_schema)
+        elif extension == ".csv":
+            writer = _CsvBatchWriter(partial_path, output_schema)
+        else:
+            writer = pa.ipc.new_file(partial_path, output_schema)
+
+        with writer:
+            for batch in iter_batches(chunk_rows):
+                scored = score_record_batch(batch, active, rejects)
+                writer.write_batch(scored)
+                if on_scored is not None:
+                    on_scored(
+                        scored.drop_columns(["Predicted"]).to_pandas(date_as_object=False),
+                        scored.column("Predicted").to_pylist(),
+                    )
+                rows += scored.num_rows
+                processed += batch.num_rows
+                if on_progress is not None:
+                    on_progress(processed)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    return rows
+
+
+def _without_trailing_empty_rows(sheet_rows):
+    """
+    Yields sheet rows, dropping only the empty rows at the end of the sheet
+    (read-only worksheets report formatted but empty rows there); empty rows
+    between records are kept, as pd.read_excel keeps them.
+    """
+    empty = []
+    for row in sheet_rows:
+        if all(value is None for value in row):
+            empty.append(row)
+            continue
+        yield from empty
+        empty.clear()
+        yield row
+
+
+def score_excel_stream(source, output_path, chunk_rows, on_progress=None, on_scored=None, active=None, rejects=None):
+    """
+    Scores the first sheet of an .xlsx workbook without loading it whole.
+
+    The sheet is read row by row in openpyxl's read-only mode, only the
+    required columns of each chunk are turned into a DataFrame for scoring, and
+    the original rows plus "Predicted" are streamed into a write-only workbook,
+    so memory stays bounded by the chunk size. Invalid rows go to rejects (see
+    score_valid_rows).
+
+    Returns:
+    int: Number of rows scored.
+    """
+    active = active or active_model()
+    required_columns = active.features.required_columns
+    partial_path = output_path + ".part"
+    rows = processed = 0
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet_rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(sheet_rows, ()))
+        while header and header[-1] is None:  # trailing empty header cells
+            header.pop()
+
+        if not all(col in header for col in required_columns):
+            raise ValueError("Missing required columns")
+        indices = [header.index(col) for col in required_columns]
+
+        output = openpyxl.Workbook(write_only=True)
+        output_sheet = output.create_sheet()
+        output_sheet.append(header + ["Predicted"])
+
+        sheet_rows = _without_trailing_empty_rows(sheet_rows)
+        while chunk := list(islice(sheet_rows, chunk_rows)):
+            chunk = [row[:len(header)] for row in chunk]
+
+            df = pd.DataFrame([[row[i] for i in indices] for row in chunk], columns=required_columns)
+            df[df.columns[df.isna().all()]] = np.nan  # empty columns read as float NaN, as in pd.read_excel
+            processed += len(chunk)
+            with stage("validate"):
+                clean, valid, reasons = validate_records(df, active.features)
+            if reasons:
+                rejected = [row for row, ok in zip(chunk, valid) if not ok]
+                quarantine(lambda: pd.DataFrame(rejected, columns=header), reasons, rejects)
+                chunk, clean = [row for row, ok in zip(chunk, valid) if ok], clean[valid]
+            labels = _predict_labels(clean, active)
+            for row, label in zip(chunk, labels):
+                output_sheet.append(list(row) + [label])
+            if on_scored is not None:
+                on_scored(pd.DataFrame(chunk, columns=header), labels)
+
+            rows += len(chunk)
+            if on_progress is not None:
+                on_progress(processed)
+
+        output.save(partial_path)
+        os.replace(partial_path, output_path)
+    finally:
+        workbook.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    return rows
+
+
+def score_file(source, filename, output_path, on_progress=None, on_scored=None, active=None, rejects=None):
+    """
+    Scores an uploaded CSV, Excel, Parquet or Arrow file and writes the result
+    to output_path in the format given by OUTPUT_EXTENSIONS.
+
+    source is a path or a file object; pass the path of uploads spooled to
+    disk, so they are memory-mapped rather than read through Python.
+    on_scored, if given, is called with each chunk's raw records and predicted categories.
+    active (LoadedModel), if given, scores the whole file; otherwise the model
+    active when scoring starts does, even if a new version is swapped in meanwhile.
+    rejects (RejectedRows), if given, receives the rows that fail validation
+    with their reasons; without it, any invalid row fails the whole file
+    before that chunk is scored.
+
+    Returns:
+    int: Number of rows scored.
+    """
+    active = active or active_model()
+    extension = os.path.splitext(filename)[1].lower()
+    chunk_rows = settings.PREDICT_FILE_CHUNK_ROWS
+
+    if extension == ".csv" and settings.PREDICT_FILE_CSV_READER == "pandas":
+        return score_csv_stream(
+            source, output_path, chunk_rows, on_progress=on_progress, on_scored=on_scored, active=active,
+            rejects=rejects,
+        )
+    if extension in (".csv", ".parquet", ".arrow", ".feather"):
+        return score_columnar_stream(
+            source, output_path, chunk_rows, extension, on_progress=on_progress, on_scored=on_scored, active=active,
+            rejects=rejects,
+        )
+    if extension == ".xlsx":
+        return score_excel_stream(
+            source, output_path, chunk_rows, on_progress=on_progress, on_scored=on_scored, active=active,
+            rejects=rejects,
+        )
+    if extension == ".xls":
+        # Legacy binary workbooks are not supported by openpyxl
+        df = score_valid_rows(pd.read_excel(source), active, rejects)
+        df.to_excel(output_path, index=False)
+        if on_scored is not None:
+            on_scored(df, df["Predicted"])
+        if on_progress is not None:
+            on_progress(len(df))
+        return len(df)
+    raise ValueError(f"Unsupported file type: {extension}")
@@ -0,0 +1,395 @@
+import asyncio
+import csv
+import io
+import os
+import queue
+import threading
+import time
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from django.conf import settings
+from gradio_client import Client
+from loguru import logger
+
+# Errors after which a pooled client is dropped instead of reused, since its
+# session with the Space may be broken
+CONNECTION_ERRORS = (httpx.TransportError, TimeoutError)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class SignatureClientPool:
+    """
+    Long-lived pool of gradio clients for the signature verification Space.
+
+    Building a Client fetches the Space config and API info over the network,
+    so up to `size` clients are created on demand and reused, each handed to
+    one request at a time. Images are uploaded from memory through a shared
+    keep-alive HTTP connection pool rather than via a temporary file.
+    """
+
+    def __init__(self, src, size=4, connect_timeout=5.0, read_timeout=60.0, client_factory=None):
+        self.src = src
+        self.size = size
+        self.read_timeout = read_timeout
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.client_factory = client_factory or self._new_client
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._http = httpx.Client(timeout=self.timeout, limits=self._limits())
+        # AsyncClients are tied to the event loop they were first used on
+        self._async_http = weakref.WeakKeyDictionary()
+
+    def _limits(self):
+        return httpx.Limits(max_keepalive_connections=self.size)
+
+    def _new_client(self):
+        return Client(self.src, verbose=False, httpx_kwargs={"timeout": self.timeout})
+
+    @staticmethod
+    def _remaining(deadline):
+        # Never zero, which httpx would read as "no timeout" for some phases
+        return max(deadline - time.monotonic(), 0.001)
+
+    def _acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.client_factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.read_timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise TimeoutError("No signature verification client became available") from None
+
+    def _release(self, client, reusable):
+        if reusable:
+            self._idle.put(client)
+        else:
+            with self._lock:
+                self._created -= 1
+
+    def warm(self):
+        """
+        Creates the remaining clients up front, so the first requests do not pay for the config fetch.
+        """
+        clients = [self._acquire() for _ in range(self.size - self._idle.qsize())]
+        for client in clients:
+            self._release(client, reusable=True)
+
+    @staticmethod
+    def _upload_headers(client):
+        headers = dict(client.headers)
+        if client.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in client.cookies.items())
+        return headers
+
+    def _request_timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        return httpx.Timeout(timeout, connect=min(self.timeout.connect, timeout))
+
+    def upload(self, client, image_bytes, filename, timeout=None):
+        """
+        Uploads image bytes to the Space and returns a file reference for its API.
+
+        The reference carries no FileData meta, so gradio_client passes it through
+        as-is instead of trying to upload the (server-side) path again.
+        """
+        response = self._http.post(
+            client.upload_url, files=[("files", (filename, image_bytes))], headers=self._upload_headers(client),
+            timeout=self._request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return {"path": response.json()[0], "orig_name": filename}
+
+    async def upload_async(self, client, image_bytes, filename, timeout=None):
+        """
+        Same as upload, through an AsyncClient bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        http = self._async_http.get(loop)
+        if http is None:
+            http = self._async_http[loop] = httpx.AsyncClient(timeout=self.timeout, limits=self._limits())
+        response = await http.post(
+            client.upload_url, files=[("files", (filename, image_bytes))], headers=self._upload_headers(client),
+            timeout=self._request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return {"path": response.json()[0], "orig_name": filename}
+
+    def predict(self, image_bytes, reference_number, filename="signature.png", timeout=None):
+        """
+        Runs the Space's /predict endpoint on an image and returns its raw result.
+
+        timeout (float): Seconds for the whole call (waiting for a free client,
+        the upload and the prediction), overriding the pool's read timeout.
+        Creating a new client is bounded by the connect and read timeouts instead.
+        """
+        deadline = time.monotonic() + (timeout or self.read_timeout)
+        client = self._acquire(timeout=self._remaining(deadline))
+        reusable = True
+        try:
+            document = self.upload(client, image_bytes, filename, timeout=self._remaining(deadline))
+            job = client.submit(document_image=document, reference_number=reference_number, api_name="/predict")
+            try:
+                return job.result(timeout=self._remaining(deadline))
+            except TimeoutError:
+                job.cancel()
+                raise
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Dropping signature verification client after error: {e!r}")
+            reusable = False
+            raise
+        finally:
+            self._release(client, reusable)
+
+    async def predict_async(self, image_bytes, reference_number, filename="signature.png", timeout=None):
+        """
+        Async version of predict for ASGI views.
+
+        The upload and the wait for the prediction are awaited on the event
+        loop; only creating a client or waiting for a free one uses a thread.
+        timeout covers the whole call, as in predict.
+        """
+        deadline = time.monotonic() + (timeout or self.read_timeout)
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            client = await asyncio.to_thread(self._acquire, self._remaining(deadline))
+        reusable = True
+        try:
+            document = await self.upload_async(client, image_bytes, filename, timeout=self._remaining(deadline))
+            job = client.submit(document_image=document, reference_number=reference_number, api_name="/predict")
+            try:
+                # gradio Jobs are concurrent.futures Futures, so they can be awaited directly
+                return await asyncio.wait_for(asyncio.wrap_future(job), self._remaining(deadline))
+            except TimeoutError:
+                job.cancel()
+                raise
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Dropping signature verification client after error: {e!r}")
+            reusable = False
+            raise
+        finally:
+            self._release(client, reusable)
+
+
+def get_signature_pool():
+    """
+    Returns the process-wide client pool, configured from the SIGNATURE_* settings.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SignatureClientPool(
+                settings.SIGNATURE_API_SRC,
+                size=settings.SIGNATURE_POOL_SIZE,
+                connect_timeout=settings.SIGNATURE_CONNECT_TIMEOUT,
+                read_timeout=settings.SIGNATURE_READ_TIMEOUT,
+            )
+        return _pool
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast once the upstream looks down.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() refuses calls for `reset_seconds`. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError("Signature verification service is unavailable; circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+def _check_member_size(archive, name, max_bytes):
+    size = archive.getinfo(name).file_size
+    if max_bytes is not None and size > max_bytes:
+        raise ValueError(f"{name} is {size} bytes uncompressed; at most {max_bytes} are allowed per file")
+    return size
+
+
+def read_bulk_manifest(archive, manifest_file=None, max_items=None, max_file_bytes=None, max_total_bytes=None):
+    """
+    Reads the (filename, reference_number) rows of a bulk verification request.
+
+    The manifest is a CSV with `filename` and `reference_number` columns,
+    uploaded alongside the zip or stored in it as manifest.csv. Rows are
+    returned in manifest order; problems with a single row are recorded in its
+    "error" field so the rest of the batch still runs.
+
+    Uncompressed sizes are checked against max_file_bytes (per member) and
+    max_total_bytes (all images read for the rows) before anything is
+    decompressed; zipfile never inflates a member beyond its declared size, so
+    a zip bomb is refused up front.
+
+    Raises:
+    ValueError: If the manifest is missing, lacks the required columns, has
+    too many rows, or the members it names are too large.
+    """
+    if manifest_file is None:
+        names = [name for name in archive.namelist() if os.path.basename(name).lower() == "manifest.csv"]
+        if not names:
+            raise ValueError("A manifest CSV is required, either uploaded as 'manifest' or as manifest.csv in the zip")
+        _check_member_size(archive, names[0], max_file_bytes)
+        text = archive.read(names[0]).decode("utf-8-sig")
+    else:
+        text = b"".join(manifest_file.chunks()).decode("utf-8-sig")
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not {"filename", "reference_number"} <= set(reader.fieldnames or []):
+        raise ValueError("Manifest must have 'filename' and 'reference_number' columns")
+    rows = list(reader)
+    if max_items is not None and len(rows) > max_items:
+        raise ValueError(f"Manifest has {len(rows)} rows; at most {max_items} are allowed per request")
+
+    members = set(archive.namelist())
+    items = []
+    for index, row in enumerate(rows):
+        filename = (row["filename"] or "").strip()
+        item = {"row": index, "filename": filename, "reference_number": (row["reference_number"] or "").strip()}
+        try:
+            item["reference_number"] = int(item["reference_number"])
+        except ValueError:
+            item["error"] = "reference_number must be an integer"
+        if filename not in members:
+            item["error"] = f"{filename or 'filename'} not found in the zip"
+        items.append(item)
+
+    total = sum(_check_member_size(archive, item["filename"], max_file_bytes) for item in items if not item.get("error"))
+    if max_total_bytes is not None and total > max_total_bytes:
+        raise ValueError(f"The images are {total} bytes uncompressed; at most {max_total_bytes} are allowed per request")
+    return items
+
+
+def verify_bulk(archive, items, verify_fn, breaker, max_workers=8, timeout=60.0, retries=2, backoff=0.5):
+    """
+    Verifies the signature images of a bulk request concurrently.
+
+    Each item is tried up to `retries + 1` times, with exponential backoff, and
+    every attempt goes through the circuit breaker, so once the upstream is
+    down the remaining items fail fast instead of waiting out their timeouts.
+
+    Parameters:
+    archive (zipfile.ZipFile): The uploaded images.
+    items (list): Rows from read_bulk_manifest.
+    verify_fn (callable): verify_fn(image_bytes, reference_number, filename, timeout) -> parsed result dict.
+    breaker (CircuitBreaker): Shared breaker for the upstream verifier.
+
+    Returns:
+    list: One result row per item, in manifest order.
+    """
+    archive_lock = threading.Lock()
+
+    def verify_item(item):
+        result = {
+            "row": item["row"], "filename": item["filename"], "reference_number": item["reference_number"],
+            "status": "error", "attempts": 0, "Similarity score": None, "Result": None, "error": item.get("error"),
+        }
+        if result["error"]:
+            return result
+
+        with archive_lock:
+            image_bytes = archive.read(item["filename"])
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            result["attempts"] = attempt + 1
+            try:
+                parsed = breaker.call(
+                    verify_fn, image_bytes, item["reference_number"], os.path.basename(item["filename"]), timeout
+                )
+            except CircuitOpenError as e:
+                result["error"] = str(e)
+                break
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                continue
+            result.update(parsed, status="ok", error=None)
+            break
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="signature-bulk") as executor:
+        return list(executor.map(verify_item, items))
+
+
+def open_bulk_archive(uploaded_file):
+    """
+    Opens an uploaded zip of signature images.
+
+    Raises:
+    ValueError: If the upload is not a zip file.
+    """
+    try:
+        return zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile:
+        raise ValueError("images must be a zip file") from None
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from .config import ONE_HOT_COLUMNS, LABEL_ENCODINGS, REQUIRED_COLUMNS
+
+# Realistic value ranges for the numeric columns, as (low, high)
+NUMERIC_RANGES = {
+    "assured_age": (18, 80),
+    "policy_sum_assured": (50_000, 5_000_000),
+    "premium": (1_000.0, 500_000.0),
+    "annual_income": (100_000, 10_000_000),
+    "policy_term": (5, 40),
+    "policy_payment_term": (3, 10),
+    "bank_code": (1_000.0, 9_999.0),
+}
+
+
+def generate_claims(n_rows, seed=0, date_format="%d/%m/%Y"):
+    """
+    Generates synthetic raw claim records for tests and benchmarks.
+
+    Categorical columns are drawn from the domains in config.py, numeric
+    columns from NUMERIC_RANGES, and the three dates are ordered as
+    commencement < death < intimation with realistic gaps.
+
+    Parameters:
+    n_rows (int): Number of records.
+    seed (int): Random seed, so runs are reproducible.
+    date_format (str): strftime format for the date columns (None keeps them as datetime64).
+
+    Returns:
+    pd.DataFrame: Records with the REQUIRED_COLUMNS in training order.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    for col, (low, high) in NUMERIC_RANGES.items():
+        if isinstance(low, float):
+            data[col] = np.round(rng.uniform(low, high, n_rows), 2)
+        else:
+            data[col] = rng.integers(low, high + 1, n_rows)
+
+    for col, categories in ONE_HOT_COLUMNS.items():
+        data[col] = rng.choice(categories, n_rows)
+    for col, mapping in LABEL_ENCODINGS.items():
+        data[col] = rng.choice(list(mapping), n_rows)
+
+    commencement = np.datetime64("2010-01-01") + rng.integers(0, 13 * 365, n_rows).astype("timedelta64[D]")
+    death = commencement + rng.integers(0, 1_000, n_rows).astype("timedelta64[D]")
+    intimation = death + rng.integers(0, 400, n_rows).astype("timedelta64[D]")
+    for col, values in [("policy_risk_commencement_date", commencement), ("date_of_death", death),
+                        ("intimation_date", intimation)]:
+        values = pd.Series(values)
+        data[col] = values.dt.strftime(date_format) if date_format else values
+
+    return pd.DataFrame(data)[REQUIRED_COLUMNS]
@@ -1,3 +1,1418 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, SimpleTestCase, TestCase
+
+from .batching import MicroBatcher
+from .cache import PredictionCache, SignatureResultCache, SQLiteLRUCache
+from .dates import _coerce_date_value, day_difference, parse_date_column, parse_date_value
+from .encoder import FeatureEncoder
+from .executor import BoundedExecutor, ExecutorBusyError
+from .runtime import export_npz, load_model, load_numpy_model, NumpyModel, PREDICT_TOLERANCE, SmallBatchPredictor
+from .signature import CircuitBreaker, SignatureClientPool, read_bulk_manifest, verify_bulk
+from .utils import preprocess_input, preprocess_batch
+
+
+MODEL_H5_PATH = os.path.join(os.path.dirname(__file__), "model.h5")
+
+
+def sample_records():
+    """
+    A handful of raw records covering the date formats and edge cases seen in practice.
+    """
+    base = {
+        "assured_age": 45, "nominee_relation": "Wife", "occupation": "Service",
+        "policy_sum_assured": 500000, "premium": 12000.5, "premium_payment_mode": "Yearly",
+        "annual_income": 800000, "holder_marital_status": "Married",
+        "indiv_requirement_flag": "Non Medical", "policy_term": 20, "policy_payment_term": 10,
+        "product_type": "ULIP", "channel": "Bancassurance", "bank_code": 1234.0,
+        "policy_risk_commencement_date": "2019-03-15", "date_of_death": "2020-01-05",
+        "intimation_date": "2020-02-10", "status": "Claim", "sub_status": "Death Claim Paid",
+    }
+    return [
+        base,
+        {**base, "policy_risk_commencement_date": "15/03/2019", "date_of_death": "05/01/2020",
+         "intimation_date": "10/02/2020"},
+        {**base, "date_of_death": "not a date", "occupation": "Astronaut", "channel": "Online"},
+        {**base, "intimation_date": None, "bank_code": np.nan, "sub_status": " "},
+        {**base, "premium_payment_mode": "Monthly", "status": "Lapse", "date_of_death": "12/31/2019"},
+    ]
+
+
+def valid_records():
+    """
+    sample_records() without the record that file scoring rejects (bad date, unknown categories).
+    """
+    return [record for i, record in enumerate(sample_records()) if i != 2]
+
+
+class PreprocessBatchTests(SimpleTestCase):
+    def test_matches_preprocess_input_row_for_row(self):
+        df = pd.DataFrame(sample_records())
+
+        batch = preprocess_batch(df)
+
+        self.assertEqual(batch.shape[0], len(df))
+        for i, (_, row) in enumerate(df.iterrows()):
+            single = preprocess_input(row.to_dict()).astype(np.float64)[0]
+            np.testing.assert_array_equal(batch[i], single)
+
+    def test_ignores_extra_and_reordered_columns(self):
+        df = pd.DataFrame(sample_records())
+        shuffled = df[df.columns[::-1]].assign(policy_no=1)
+
+        np.testing.assert_array_equal(preprocess_batch(shuffled), preprocess_batch(df))
+
+
+class DateParsingTests(SimpleTestCase):
+    VALUES = [
+        "2020-01-05", "2020-01-25", "2020-1-5", "2020-02-30", "05/01/2020", "12/31/2019", "5/1/2020",
+        "31/02/2020", "05-01-2020", "2020-01-05 00:00:00", "", "garbage", None, np.nan,
+        datetime.date(2020, 1, 5), pd.Timestamp("2021-03-04 10:00"),
+        # Outside the datetime64[ns] range
+        "9999-12-31", "0001-01-01", "31/12/9999", datetime.date(9999, 12, 31), pd.Timestamp("9999-12-31"),
+    ]
+
+    def test_column_matches_coercing_per_value_parse(self):
+        series = pd.Series(self.VALUES * 3)
+        parsed = parse_date_column(series)
+
+        self.assertEqual(parsed.dtype, "datetime64[ns]")
+        for value, result in zip(series, parsed):
+            expected = _coerce_date_value(value)
+            self.assertTrue(pd.isna(result) if pd.isna(expected) else result == expected, value)
+            self.assertTrue(pd.isna(parse_date_value(value)) if pd.isna(expected) else parse_date_value(value) == expected)
+
+    def test_day_difference_fills_missing_with_minus_one(self):
+        later = pd.Series(pd.to_datetime(["2020-01-10 00:00", None, "2020-01-01 06:00"]))
+        earlier = pd.Series(pd.to_datetime(["2020-01-01 00:00", "2020-01-01 00:00", "2020-01-02 00:00"]))
+
+        self.assertEqual(day_difference(later, earlier).tolist(), [9, -1, -1])
+
+
+class FeatureEncoderTests(SimpleTestCase):
+    def setUp(self):
+        self.encoder = FeatureEncoder()
+
+    def test_matches_preprocess_input(self):
+        for record in sample_records():
+            expected = preprocess_input(record).astype(np.float32)
+            encoded = self.encoder.encode(record)
+
+            self.assertEqual(encoded.dtype, np.float32)
+            np.testing.assert_array_equal(encoded, expected)
+
+    def test_feature_names_match_preprocessed_columns(self):
+        self.assertEqual(self.encoder.n_features, preprocess_input(sample_records()[0]).shape[1])
+
+    def test_ignores_extra_fields(self):
+        record = sample_records()[0]
+
+        np.testing.assert_array_equal(
+            self.encoder.encode({"policy_no": 42, **record}).copy(), self.encoder.encode(record)
+        )
+
+    def test_dates_beyond_timestamp_range_are_missing(self):
+        record = {**sample_records()[0], "date_of_death": "9999-12-31", "intimation_date": "0001-01-01"}
+
+        np.testing.assert_array_equal(self.encoder.encode(record), preprocess_input(record).astype(np.float32))
+
+    def test_missing_field_raises(self):
+        record = sample_records()[0]
+        del record["channel"]
+
+        with self.assertRaisesMessage(ValueError, "channel"):
+            self.encoder.encode(record)
+
+
+class NumpyRuntimeTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.npz_path = os.path.join(tmp_dir.name, "model.npz")
+        export_npz(MODEL_H5_PATH, self.npz_path)
+        self.model = NumpyModel(self.npz_path)
+
+    def test_outputs_probabilities(self):
+        features = preprocess_batch(pd.DataFrame(sample_records()))
+
+        probabilities = self.model.predict(features)
+
+        self.assertFalse(np.isnan(probabilities).any())
+
+        self.assertEqual(probabilities.shape[0], len(features))
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1, rtol=1e-5)
+
+    @unittest.skipUnless(importlib.util.find_spec("tensorflow"), "TensorFlow is not installed")
+    def test_matches_keras_predict(self):
+        import tensorflow as tf
+
+        keras_model = tf.keras.models.load_model(MODEL_H5_PATH)
+        rng = np.random.default_rng(0)
+        features = np.vstack([
+            preprocess_batch(pd.DataFrame(sample_records())),
+            rng.normal(size=(1000, self.model.input_dim)),
+        ]).astype(np.float32)
+
+        expected = keras_model.predict(features, verbose=0)
+
+        np.testing.assert_allclose(self.model.predict(features), expected, atol=PREDICT_TOLERANCE)
+
+    def test_reduced_precision_variants_stay_close(self):
+        from .management.commands.compare_model_variants import compare_variant
+
+        features = np.random.default_rng(0).normal(size=(2000, self.model.input_dim)).astype(np.float32)
+        reference = self.model.predict(features)
+
+        for precision, min_agreement, max_deviation in [("float16", 0.999, 0.02), ("int8", 0.98, 0.5)]:
+            variant = load_numpy_model(MODEL_H5_PATH, self.npz_path, precision)
+            comparison = compare_variant(reference, variant.predict(features))
+
+            self.assertEqual(variant.precision, precision)
+            self.assertLess(variant.weight_bytes, self.model.weight_bytes * 0.6)
+            self.assertGreaterEqual(comparison["agreement"], min_agreement)
+            self.assertLess(comparison["max_probability_deviation"], max_deviation)
+
+        self.assertTrue(os.path.exists(self.npz_path.replace(".npz", ".int8.npz")))
+        with self.assertRaisesMessage(ValueError, "MODEL_RUNTIME=numpy"):
+            load_model("keras", MODEL_H5_PATH, self.npz_path, "int8")
+
+
+class SmallBatchPredictorTests(SimpleTestCase):
+    def test_numpy_model_is_scored_directly(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npz_path = os.path.join(tmp_dir, "model.npz")
+            export_npz(MODEL_H5_PATH, npz_path)
+            model = NumpyModel(npz_path)
+        predictor = SmallBatchPredictor(model, buckets=(4, 1, 2))
+        features = np.random.default_rng(0).normal(size=(6, model.input_dim)).astype(np.float32)
+
+        self.assertEqual(predictor.buckets, (1, 2, 4))
+        self.assertEqual([predictor.bucket(rows) for rows in (1, 2, 3, 4, 5)], [1, 2, 4, 4, None])
+        np.testing.assert_array_equal(predictor.predict(features[:3]), model.predict(features[:3]))
+        np.testing.assert_array_equal(predictor.predict(features), model.predict(features))
+
+    @unittest.skipUnless(importlib.util.find_spec("tensorflow"), "TensorFlow is not installed")
+    def test_compiled_buckets_match_keras_predict(self):
+        import tensorflow as tf
+
+        keras_model = tf.keras.models.load_model(MODEL_H5_PATH)
+        predictor = SmallBatchPredictor(keras_model, buckets=(1, 4, 8))
+        predictor.warm()
+        features = np.random.default_rng(0).normal(size=(12, predictor.input_dim)).astype(np.float32)
+        expected = keras_model.predict(features, verbose=0)
+
+        for rows in (1, 3, 8, 12):
+            np.testing.assert_allclose(predictor.predict(features[:rows]), expected[:rows], atol=PREDICT_TOLERANCE)
+        self.assertEqual(sorted(predictor._functions), [1, 4, 8])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_routes_each_result_to_its_caller(self):
+        calls = []
+
+        def predict(features):
+            calls.append(len(features))
+            return features * 2
+
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+        rows = [np.full(3, i, dtype=np.float32) for i in range(32)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(batcher.submit, rows))
+
+        for row, result in zip(rows, results):
+            np.testing.assert_array_equal(result, row * 2)
+        self.assertLessEqual(max(calls), 8)
+        self.assertLess(len(calls), len(rows))
+
+        stats = batcher.stats()
+        self.assertEqual(stats["rows"], len(rows))
+        self.assertEqual(stats["batches"], len(calls))
+        self.assertGreater(stats["mean_batch_size"], 1)
+
+    def test_propagates_model_errors(self):
+        def predict(features):
+            raise RuntimeError("model unavailable")
+
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+
+        with self.assertRaisesMessage(RuntimeError, "model unavailable"):
+            batcher.submit(np.zeros(3))
+        self.assertEqual(batcher.stats()["errors"], 1)
+
+    def test_close_stops_the_thread_after_pending_rows(self):
+        batcher = MicroBatcher(lambda features: features * 2, max_batch_size=4, max_wait_ms=50)
+        np.testing.assert_array_equal(batcher.submit(np.ones(3)), np.full(3, 2))
+
+        batcher.close()
+        batcher._thread.join(5)
+
+        self.assertFalse(batcher._thread.is_alive())
+        np.testing.assert_array_equal(batcher.submit(np.ones(3)), np.full(3, 2))  # scored directly
+        self.assertEqual(batcher.stats()["rows"], 1)
+
+
+class StreamingCsvTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.output_path = os.path.join(tmp_dir.name, "predicted_output.csv")
+
+    def test_chunked_output_matches_whole_file_scoring(self):
+        from .scoring import score_csv_stream, score_frame
+
+        df = pd.DataFrame(valid_records() * 7).assign(policy_no=range(28))
+        csv = df.to_csv(index=False)
+
+        rows = score_csv_stream(io.StringIO(csv), self.output_path, chunk_rows=4)
+
+        self.assertEqual(rows, len(df))
+        expected = score_frame(pd.read_csv(io.StringIO(csv)))
+        pd.testing.assert_frame_equal(pd.read_csv(self.output_path), expected)
+
+    def test_missing_columns_leave_no_output(self):
+        from .scoring import score_csv_stream
+
+        csv = pd.DataFrame(sample_records()).drop(columns=["premium"]).to_csv(index=False)
+
+        with self.assertRaisesMessage(ValueError, "Missing required columns"):
+            score_csv_stream(io.StringIO(csv), self.output_path, chunk_rows=2)
+        self.assertEqual(os.listdir(os.path.dirname(self.output_path)), [])
+
+
+class ArrowCsvTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.input_path = os.path.join(self.tmp_dir, "claims.csv")
+        pd.DataFrame(valid_records() * 50).assign(policy_no=range(200)).to_csv(self.input_path, index=False)
+
+    def score(self, source, reader):
+        from .scoring import score_file
+
+        output_path = os.path.join(self.tmp_dir, f"{reader}.csv")
+        scored = []
+        with self.settings(PREDICT_FILE_CSV_READER=reader, PREDICT_FILE_CHUNK_ROWS=30, PREDICT_FILE_CSV_BLOCK_BYTES=4096):
+            rows = score_file(source, "claims.csv", output_path, on_scored=lambda df, categories: scored.append(len(df)))
+        self.assertEqual(rows, 200)
+        self.assertLessEqual(max(scored), 30)
+        return pd.read_csv(output_path)
+
+    def test_matches_pandas_reader_from_path_and_file_object(self):
+        expected = self.score(self.input_path, "pandas")
+
+        pd.testing.assert_frame_equal(self.score(self.input_path, "arrow"), expected)
+        with open(self.input_path, "rb") as f:
+            pd.testing.assert_frame_equal(self.score(f, "arrow"), expected)
+
+    def test_csv_output_matches_pandas_reader_byte_for_byte(self):
+        from .scoring import score_file
+        from .validation import RejectedRows
+
+        df = pd.DataFrame(sample_records() * 20).assign(
+            policy_no=range(100),
+            nominee_relation="Grand Son",
+            remarks=['said "no", twice', None, "ok", "", "7"] * 20,
+        )
+        df.to_csv(self.input_path, index=False)
+
+        outputs = []
+        for reader in ("pandas", "arrow"):
+            output_path = os.path.join(self.tmp_dir, f"{reader}.csv")
+            with self.settings(PREDICT_FILE_CSV_READER=reader, PREDICT_FILE_CHUNK_ROWS=30,
+                               PREDICT_FILE_CSV_BLOCK_BYTES=4096), \
+                    RejectedRows(os.path.join(self.tmp_dir, f"{reader}_rejected.csv")) as rejects:
+                score_file(self.input_path, "claims.csv", output_path, rejects=rejects)
+            self.assertEqual(rejects.rows, 20)
+            with open(output_path, "rb") as f:
+                outputs.append(f.read())
+
+        self.assertEqual(outputs[1], outputs[0])
+        self.assertIn(b"\n45,Grand Son,", outputs[1])
+
+    def test_large_uploads_are_scored_from_disk_and_capped(self):
+        from . import views
+
+        with open(self.input_path, "rb") as f:
+            content = f.read()
+        with mock.patch.object(views, "UPLOAD_DIR", self.tmp_dir), \
+                mock.patch.object(views, "score_file", wraps=views.score_file) as score_file, \
+                self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024):
+            response = self.client.post("/model/predict_file/", {"file": SimpleUploadedFile("claims.csv", content)})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(score_file.call_args.args[0], str)
+
+            with self.settings(UPLOAD_MAX_BYTES=len(content) - 1):
+                response = self.client.post("/model/predict_file/", {"file": SimpleUploadedFile("claims.csv", content)})
+            self.assertEqual(response.status_code, 413)
+
+
+class ScoringJobTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch("model.jobs.JOBS_DIR", tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for(self, job_id, timeout=30):
+        from .jobs import read_job_status
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job_status = read_job_status(job_id)
+            if job_status["status"] in ("done", "failed"):
+                return job_status
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_job_scores_file_and_reports_progress(self):
+        from .jobs import create_job, job_output_path
+
+        df = pd.DataFrame(sample_records() * 3)
+        job_id = create_job(SimpleUploadedFile("claims.csv", df.to_csv(index=False).encode()))
+
+        job_status = self.wait_for(job_id)
+
+        self.assertEqual(job_status["status"], "done")
+        self.assertEqual(job_status["rows_done"], len(df))
+        self.assertEqual((job_status["rows_scored"], job_status["rows_rejected"]), (12, 3))
+        self.assertEqual(len(pd.read_csv(job_output_path(job_id))), 12)
+        self.assertEqual(len(pd.read_csv(job_output_path(job_id, rejected=True))), 3)
+
+    def test_failed_job_records_error(self):
+        from .jobs import create_job, job_output_path
+
+        csv = pd.DataFrame(sample_records()).drop(columns=["premium"]).to_csv(index=False)
+        job_id = create_job(SimpleUploadedFile("claims.csv", csv.encode()))
+
+        job_status = self.wait_for(job_id)
+
+        self.assertEqual(job_status["status"], "failed")
+        self.assertEqual(job_status["error"], "Missing required columns")
+        self.assertIsNone(job_output_path(job_id))
+
+    def test_missing_input_fails_the_job(self):
+        from .jobs import _job_dir, _write_status, read_job_status, run_job
+
+        job_id = str(uuid.uuid4())
+        os.makedirs(_job_dir(job_id))
+        _write_status(job_id, status="queued", output_file="output.csv")
+
+        with mock.patch("model.jobs.connections") as connections:
+            run_job(job_id, "input.csv", "output.csv")
+
+        self.assertEqual(read_job_status(job_id)["status"], "failed")
+        connections.close_all.assert_called_once()
+
+    def test_stale_running_jobs_are_marked_failed(self):
+        from .jobs import _job_dir, _write_status, fail_stale_jobs, read_job_status
+
+        job_ids = {state: str(uuid.uuid4()) for state in ("running", "queued", "done")}
+        for state, job_id in job_ids.items():
+            os.makedirs(_job_dir(job_id))
+            _write_status(job_id, status=state)
+
+        self.assertEqual(fail_stale_jobs(stale_seconds=3600), 0)
+        self.assertEqual(fail_stale_jobs(stale_seconds=-1), 1)
+        self.assertEqual({state: read_job_status(job_id)["status"] for state, job_id in job_ids.items()},
+                         {"running": "failed", "queued": "queued", "done": "done"})
+
+    def test_purge_removes_expired_jobs(self):
+        from .jobs import create_job, purge_expired_jobs, read_job_status
+
+        job_id = create_job(SimpleUploadedFile("claims.csv", pd.DataFrame(sample_records()).to_csv(index=False).encode()))
+        self.wait_for(job_id)
+
+        self.assertEqual(purge_expired_jobs(retention_seconds=3600), 0)
+        self.assertEqual(purge_expired_jobs(retention_seconds=-1), 1)
+        self.assertIsNone(read_job_status(job_id))
+
+
+class ColumnarScoringTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.df = pd.DataFrame(valid_records() * 5).assign(policy_no=range(20))
+
+    def assert_scores_like_csv(self, input_name, output_name, read):
+        from .scoring import score_file, score_frame
+
+        input_path = os.path.join(self.tmp_dir, input_name)
+        output_path = os.path.join(self.tmp_dir, output_name)
+        with self.settings(PREDICT_FILE_CHUNK_ROWS=4):
+            rows = score_file(input_path, input_name, output_path)
+
+        scored = read(output_path)
+        self.assertEqual(rows, len(self.df))
+        self.assertEqual(list(scored.columns), list(self.df.columns) + ["Predicted"])
+        self.assertEqual(scored["Predicted"].tolist(), score_frame(self.df.copy())["Predicted"].tolist())
+
+    def test_parquet(self):
+        self.df.to_parquet(os.path.join(self.tmp_dir, "claims.parquet"))
+
+        self.assert_scores_like_csv("claims.parquet", "out.parquet", pd.read_parquet)
+
+    def test_arrow_ipc(self):
+        self.df.to_feather(os.path.join(self.tmp_dir, "claims.feather"))
+
+        self.assert_scores_like_csv("claims.feather", "out.arrow", pd.read_feather)
+
+    def test_xlsx(self):
+        self.df.to_excel(os.path.join(self.tmp_dir, "claims.xlsx"), index=False)
+
+        self.assert_scores_like_csv("claims.xlsx", "out.xlsx", pd.read_excel)
+
+    def test_xlsx_keeps_empty_rows_between_records(self):
+        import openpyxl
+
+        self.df.iloc[[5, 6]] = np.nan  # empty rows in the middle, as pd.read_excel keeps them
+        input_path = os.path.join(self.tmp_dir, "claims.xlsx")
+        self.df.to_excel(input_path, index=False)
+        workbook = openpyxl.load_workbook(input_path)
+        workbook.worksheets[0].cell(row=40, column=1).number_format = "0.00"  # formatted but empty trailing row
+        workbook.save(input_path)
+
+        self.assert_scores_like_csv("claims.xlsx", "out.xlsx", pd.read_excel)
+
+
+class ValidationTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        base = valid_records()[0]
+        self.df = pd.DataFrame(valid_records() + [
+            {**base, "premium": "twelve"},
+            {**base, "assured_age": 150, "policy_sum_assured": -1},
+            {**base, "intimation_date": "not a date"},
+            {**base, "product_type": "Crypto"},
+            {**base, "date_of_death": "9999-12-31"},  # beyond datetime64[ns]
+        ]).assign(policy_no=range(9))
+
+    def test_flags_each_invalid_value(self):
+        from .scoring import active_model
+        from .validation import validate_records
+
+        clean, valid, reasons = validate_records(self.df, active_model().features)
+
+        self.assertEqual(valid.tolist(), [True] * 4 + [False] * 5)
+        self.assertEqual(reasons, [
+            "premium: not a number",
+            "assured_age: above 120; policy_sum_assured: below 0",
+            "intimation_date: not a date",
+            "product_type: unknown category",
+            "date_of_death: not a date",
+        ])
+        np.testing.assert_array_equal(preprocess_batch(clean[valid]), preprocess_batch(pd.DataFrame(valid_records())))
+
+    def test_invalid_rows_are_quarantined_or_fail_the_file(self):
+        from .scoring import score_file, score_frame
+        from .validation import REASON_COLUMN, RejectedRows
+
+        input_path = os.path.join(self.tmp_dir, "claims.csv")
+        output_path = os.path.join(self.tmp_dir, "out.csv")
+        rejects_path = os.path.join(self.tmp_dir, "rejected.csv")
+        self.df.to_csv(input_path, index=False)
+
+        with self.settings(PREDICT_FILE_CHUNK_ROWS=3), RejectedRows(rejects_path) as rejects:
+            rows = score_file(input_path, "claims.csv", output_path, rejects=rejects)
+
+        self.assertEqual((rows, rejects.rows), (4, 5))
+        scored = pd.read_csv(output_path)
+        self.assertEqual(scored["policy_no"].tolist(), [0, 1, 2, 3])
+        self.assertEqual(scored["Predicted"].tolist(), score_frame(pd.DataFrame(valid_records()))["Predicted"].tolist())
+        rejected = pd.read_csv(rejects_path)
+        self.assertEqual(rejected["policy_no"].tolist(), [4, 5, 6, 7, 8])
+        self.assertEqual(rejected[REASON_COLUMN][0], "premium: not a number")
+
+        os.remove(output_path)
+        with self.assertRaisesMessage(ValueError, "5 invalid row(s), e.g. premium: not a number"):
+            score_file(input_path, "claims.csv", output_path)
+        self.assertFalse(os.path.exists(output_path))
+
+    def test_predict_file_reports_and_serves_rejected_rows(self):
+        from . import views
+
+        upload = SimpleUploadedFile("claims.csv", self.df.to_csv(index=False).encode())
+        with mock.patch.object(views, "UPLOAD_DIR", self.tmp_dir):
+            response = self.client.post("/model/predict_file/", {"file": upload})
+            self.assertEqual((response.json()["rows"], response.json()["rejected_rows"]), (4, 5))
+
+            download = self.client.get("/model/download_file/", {"file_format": "rejected"})
+            rejected = pd.read_csv(io.BytesIO(b"".join(download.streaming_content)))
+            self.assertEqual(rejected["policy_no"].tolist(), [4, 5, 6, 7, 8])
+
+            upload = SimpleUploadedFile("claims.csv", self.df.iloc[:4].to_csv(index=False).encode())
+            self.assertEqual(self.client.post("/model/predict_file/", {"file": upload}).json()["rejected_rows"], 0)
+            self.assertEqual(self.client.get("/model/download_file/", {"file_format": "rejected"}).status_code, 404)
+
+
+class SQLiteLRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "cache.sqlite3")
+
+    def make_cache(self, **options):
+        cache = SQLiteLRUCache(self.path, {"TIMEOUT": 60, "OPTIONS": options})
+        cache.CULL_CHECK_INTERVAL = 1
+        cache.ACCESS_REFRESH_SECONDS = 0
+        return cache
+
+    def test_entries_are_shared_between_instances(self):
+        self.make_cache().set("key", {"value": 1})
+
+        self.assertEqual(self.make_cache().get("key"), {"value": 1})
+
+    def test_expired_entries_are_not_returned(self):
+        cache = self.make_cache()
+        cache.set("key", 1, timeout=-1)
+
+        self.assertIsNone(cache.get("key"))
+        self.assertTrue(cache.add("key", 2))
+
+    def test_evicts_least_recently_used(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for key in "abc":
+            cache.set(key, key)
+            time.sleep(0.001)
+        cache.get("a")
+
+        cache.set("d", "d")
+
+        self.assertEqual(cache.get("a"), "a")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("d"), "d")
+
+    def test_incr(self):
+        cache = self.make_cache()
+        cache.set("counter", 1)
+
+        self.assertEqual(self.make_cache().incr("counter", 2), 3)
+        with self.assertRaises(ValueError):
+            cache.incr("missing")
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.backend = SQLiteLRUCache(os.path.join(tmp_dir.name, "cache.sqlite3"), {"TIMEOUT": 60})
+        self.features = FeatureEncoder().encode(sample_records()[0]).copy()
+
+    def test_hit_after_set_and_counters(self):
+        cache = PredictionCache(self.backend, "counted")  # counts are per process and version
+
+        self.assertIsNone(cache.get(self.features))
+        cache.set(self.features, 4)
+
+        self.assertEqual(cache.get(self.features), 4)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_recent_hits_do_not_write(self):
+        cache = PredictionCache(self.backend, "v1")
+        cache.set(self.features, 4)
+        changes = self.backend._connection().total_changes
+
+        for _ in range(3):
+            self.assertEqual(cache.get(self.features), 4)
+        self.assertEqual(self.backend._connection().total_changes, changes)
+
+    def test_new_model_version_invalidates_entries(self):
+        PredictionCache(self.backend, "v1").set(self.features, 4)
+
+        self.assertIsNone(PredictionCache(self.backend, "v2").get(self.features))
+
+
+class FakeSignatureSpace:
+    """
+    Local stand-in for the signature verification Space: an HTTP server that
+    accepts uploads, and a client factory whose predictions echo the upload.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.uploads = {}
+        self.clients_created = 0
+        space = self
+
+        class UploadHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                path = f"/tmp/gradio/upload-{len(space.uploads)}"
+                space.uploads[path] = body
+                payload = json.dumps([path]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), UploadHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.upload_url = f"http://127.0.0.1:{self.server.server_port}/gradio_api/upload"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client_factory(self):
+        self.clients_created += 1
+        return FakeGradioClient(self)
+
+
+class FakeGradioClient:
+    headers = {}
+    cookies = {}
+
+    def __init__(self, space):
+        self.space = space
+        self.upload_url = space.upload_url
+
+    def submit(self, document_image, reference_number, api_name):
+        time.sleep(self.space.delay)
+        body = self.space.uploads[document_image["path"]]
+        job = Future()
+        job.set_result((f"Similarity Score: {len(body)}% Matched {reference_number}",))
+        return job
+
+
+class SignatureClientPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.space = FakeSignatureSpace(delay=0.02)
+        self.addCleanup(self.space.close)
+
+    def test_reuses_clients_and_uploads_bytes(self):
+        pool = SignatureClientPool("unused", size=2, client_factory=self.space.client_factory)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda i: pool.predict(b"x" * i, i, filename=f"{i}.png"), range(1, 17)))
+
+        self.assertEqual(self.space.clients_created, 2)
+        self.assertTrue(all(result[0].endswith(f"Matched {i}") for i, result in zip(range(1, 17), results)))
+        self.assertTrue(any(b'filename="3.png"' in body and b"xxx" in body for body in self.space.uploads.values()))
+
+    def test_drops_client_after_connection_error(self):
+        pool = SignatureClientPool("unused", size=1, connect_timeout=0.5, client_factory=self.space.client_factory)
+        pool.predict(b"image", 1)
+        self.space.close()
+
+        with self.assertRaises(httpx.TransportError):
+            pool.predict(b"image", 1)
+        self.assertEqual(pool._created, 0)
+
+    def test_timeout_covers_waiting_for_a_client(self):
+        self.space.delay = 0.5
+        pool = SignatureClientPool("unused", size=1, read_timeout=30, client_factory=self.space.client_factory)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            busy = executor.submit(pool.predict, b"image", 1)
+            time.sleep(0.1)
+            started = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                pool.predict(b"image", 2, timeout=0.1)
+            self.assertLess(time.monotonic() - started, 0.4)
+            busy.result()
+
+    def test_predict_async_shares_the_pool(self):
+        pool = SignatureClientPool("unused", size=2, client_factory=self.space.client_factory)
+
+        async def run():
+            return await asyncio.gather(*(pool.predict_async(b"x" * i, i, filename=f"{i}.png") for i in range(1, 9)))
+
+        results = asyncio.run(run())
+        self.assertLessEqual(self.space.clients_created, 2)
+        self.assertTrue(all(result[0].endswith(f"Matched {i}") for i, result in zip(range(1, 9), results)))
+
+
+class SignatureResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "signatures.sqlite3")
+        self.calls = 0
+
+    def make_cache(self):
+        return SignatureResultCache(SQLiteLRUCache(self.path, {"TIMEOUT": 60}), lease_timeout=5)
+
+    def slow_verify(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return {"Similarity score": "91.0%", "Result": "Matched"}
+
+    def test_single_flights_concurrent_requests(self):
+        # Two instances over one file stand in for two workers sharing the cache
+        workers = [self.make_cache(), self.make_cache()]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: workers[i % 2].get_or_verify(b"scan", 7, self.slow_verify), range(8)
+            ))
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result == {"Similarity score": "91.0%", "Result": "Matched"} for result in results))
+
+    def test_keyed_by_image_and_reference_number(self):
+        cache = self.make_cache()
+        for image, reference_number in [(b"scan", 7), (b"scan", 7), (b"scan", 8), (b"other", 7)]:
+            cache.get_or_verify(image, reference_number, self.slow_verify)
+
+        self.assertEqual(self.calls, 3)
+
+    def test_failures_are_not_cached(self):
+        cache = self.make_cache()
+
+        def failing_verify():
+            raise httpx.ConnectError("down")
+
+        with self.assertRaises(httpx.ConnectError):
+            cache.get_or_verify(b"scan", 7, failing_verify)
+        cache.get_or_verify(b"scan", 7, self.slow_verify)
+        self.assertEqual(self.calls, 1)
+
+    def test_single_flights_async_requests(self):
+        cache = self.make_cache()
+
+        async def slow_verify():
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return {"Similarity score": "91.0%", "Result": "Matched"}
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_verify_async(b"scan", 7, slow_verify) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len({json.dumps(result) for result in results}), 1)
+
+    def test_async_lookups_do_not_block_the_event_loop(self):
+        cache = self.make_cache()
+        get = cache.cache.get
+
+        def locked_get(*args, **kwargs):
+            time.sleep(0.2)  # e.g. waiting for another worker's write lock
+            return get(*args, **kwargs)
+
+        async def verify():
+            return {"Similarity score": "91.0%", "Result": "Matched"}
+
+        async def run():
+            task = asyncio.create_task(cache.get_or_verify_async(b"scan", 7, verify))
+            ticks = 0
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks
+
+        with mock.patch.object(cache.cache, "get", locked_get):
+            self.assertGreater(asyncio.run(run()), 20)
+
+
+def bulk_archive(images, manifest=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in images.items():
+            archive.writestr(name, data)
+        if manifest is not None:
+            archive.writestr("manifest.csv", manifest)
+    buffer.seek(0)
+    return buffer
+
+
+class BulkSignatureTests(SimpleTestCase):
+    def setUp(self):
+        images = {f"scan{i}.png": b"x" * (i + 1) for i in range(6)}
+        manifest = "filename,reference_number\n" + "".join(f"scan{i}.png,{100 + i}\n" for i in range(6))
+        self.archive = zipfile.ZipFile(bulk_archive(images, manifest))
+        self.items = read_bulk_manifest(self.archive)
+
+    def test_manifest_row_errors(self):
+        archive = zipfile.ZipFile(bulk_archive({"a.png": b"x"}, "filename,reference_number\na.png,abc\nb.png,1\n"))
+        items = read_bulk_manifest(archive)
+
+        self.assertEqual(items[0]["error"], "reference_number must be an integer")
+        self.assertEqual(items[1]["error"], "b.png not found in the zip")
+        with self.assertRaises(ValueError):
+            read_bulk_manifest(archive, max_items=1)
+
+    def test_oversized_members_are_refused(self):
+        manifest = SimpleUploadedFile("manifest.csv", b"filename,reference_number\nscan4.png,1\nscan5.png,2\n")
+        with self.assertRaisesMessage(ValueError, "scan5.png is 6 bytes uncompressed; at most 5"):
+            read_bulk_manifest(self.archive, manifest, max_file_bytes=5)
+        with self.assertRaisesMessage(ValueError, "manifest.csv is 110 bytes uncompressed"):
+            read_bulk_manifest(self.archive, max_file_bytes=50)
+        with self.assertRaisesMessage(ValueError, "The images are 21 bytes uncompressed; at most 20"):
+            read_bulk_manifest(self.archive, max_total_bytes=20)
+
+    def test_retries_transient_failures(self):
+        attempts = {}
+
+        def flaky_verify(image_bytes, reference_number, filename, timeout):
+            attempts[filename] = attempts.get(filename, 0) + 1
+            if attempts[filename] == 1:
+                raise httpx.ReadTimeout("slow")
+            return {"Similarity score": f"{len(image_bytes)}%", "Result": "Matched"}
+
+        results = verify_bulk(self.archive, self.items, flaky_verify, CircuitBreaker(failure_threshold=100),
+                              max_workers=3, retries=1, backoff=0)
+
+        self.assertEqual([result["status"] for result in results], ["ok"] * 6)
+        self.assertEqual([result["Similarity score"] for result in results], [f"{i + 1}%" for i in range(6)])
+        self.assertTrue(all(result["attempts"] == 2 for result in results))
+
+    def test_circuit_breaker_fails_fast_when_upstream_is_down(self):
+        calls = []
+
+        def down_verify(image_bytes, reference_number, filename, timeout):
+            calls.append(filename)
+            raise httpx.ConnectError("connection refused")
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        results = verify_bulk(self.archive, self.items, down_verify, breaker, max_workers=1, retries=2, backoff=0)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(breaker.state, "open")
+        self.assertTrue(all(result["status"] == "error" for result in results))
+        self.assertIn("circuit is open", results[-1]["error"])
+
+    def test_half_open_trial_closes_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_endpoint_against_local_stand_in(self):
+        from . import views
+
+        space = FakeSignatureSpace()
+        self.addCleanup(space.close)
+        pool = SignatureClientPool("unused", size=2, client_factory=space.client_factory)
+        upload = SimpleUploadedFile("scans.zip", bulk_archive({"a.png": b"abc", "b.png": b"abcdef"}).getvalue())
+        manifest = SimpleUploadedFile("manifest.csv", b"filename,reference_number\na.png,1\nmissing.png,2\nb.png,3\n")
+
+        with mock.patch.object(views, "get_signature_pool", return_value=pool), \
+                mock.patch.object(views, "signature_breaker", CircuitBreaker()):
+            response = self.client.post("/model/verify_signature_bulk/", {"images": upload, "manifest": manifest})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["verified"], body["failed"]), (2, 1))
+        self.assertEqual([row["Result"] for row in body["results"]], ["Matched", None, "Matched"])
+        self.assertEqual(body["results"][1]["error"], "missing.png not found in the zip")
+
+
+    def test_endpoint_refuses_bad_manifests_and_oversized_uploads(self):
+        from . import views
+
+        content = bulk_archive({"a.png": b"abc"}, "filename\na.png\n").getvalue()
+        archives = []
+
+        def open_bulk_archive(upload):
+            archives.append(zipfile.ZipFile(upload))
+            return archives[-1]
+
+        with mock.patch.object(views, "open_bulk_archive", open_bulk_archive):
+            response = self.client.post("/model/verify_signature_bulk/", {"images": SimpleUploadedFile("scans.zip", content)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(archives[0].fp)  # closed
+
+        with self.settings(UPLOAD_MAX_BYTES=len(content) - 1):
+            response = self.client.post("/model/verify_signature_bulk/", {"images": SimpleUploadedFile("scans.zip", content)})
+        self.assertEqual(response.status_code, 413)
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    def result(self, rows_per_second, p50, peak_rss_mb=500.0):
+        return {"case": "predict_file", "rows": 1000, "rows_per_second": rows_per_second,
+                "latency_ms": {"p50": p50}, "peak_rss_mb": peak_rss_mb}
+
+    def test_flags_regressions_beyond_tolerance(self):
+        from .management.commands.benchmark import compare_to_baseline
+
+        baseline = {"results": [self.result(1000.0, 10.0)]}
+        comparisons = compare_to_baseline([self.result(700.0, 11.0, 700.0)], baseline, tolerance=0.2)
+
+        regressed = {metric for _, _, metric, _, _, _, flag in comparisons if flag}
+        self.assertEqual(regressed, {"rows_per_second", "peak_rss_mb"})
+
+    def test_ignores_cases_missing_from_baseline(self):
+        from .management.commands.benchmark import compare_to_baseline
+
+        self.assertEqual(compare_to_baseline([self.result(1.0, 1.0)], {"results": []}, tolerance=0.2), [])
+
+
+class MetricsTests(SimpleTestCase):
+    def test_predict_stages_and_rows_are_exported(self):
+        record = {k: v for k, v in sample_records()[0].items()}
+        response = self.client.post("/model/predict/", json.dumps(record, default=str), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+        metrics = self.client.get("/metrics")
+        text = metrics.content.decode()
+
+        self.assertTrue(metrics["Content-Type"].startswith("text/plain"))
+        for stage in ("parse", "preprocess", "predict", "render"):
+            self.assertIn(f'fraud_stage_seconds_count{{endpoint="predict",stage="{stage}"}}', text)
+        self.assertIn('fraud_requests_total{endpoint="predict",status="200"}', text)
+        self.assertIn('fraud_rows_scored_total{endpoint="predict"}', text)
+        self.assertIn("fraud_model_load_seconds", text)
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch("model.profiling.PROFILE_DIR", tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.record = json.dumps(sample_records()[0], default=str)
+
+    def predict(self, **extra):
+        return self.client.post("/model/predict/", self.record, content_type="application/json", **extra)
+
+    def test_profiles_only_flagged_requests(self):
+        from .profiling import list_profiles, profile_path, profile_text
+
+        with self.settings(PROFILING_ENABLED=True, PROFILING_TOKEN=""):
+            self.assertNotIn("X-Profile-Id", self.predict())
+            response = self.predict(HTTP_X_PROFILE="1")
+
+        profile_id = response["X-Profile-Id"]
+        self.assertEqual([details["id"] for details in list_profiles()], [profile_id])
+        self.assertEqual(list_profiles()[0]["path"], "/model/predict/")
+        self.assertIn("(predict_json)", profile_text(profile_path(profile_id)))
+
+    def test_disabled_or_wrong_token_is_ignored(self):
+        with self.settings(PROFILING_ENABLED=False):
+            self.assertNotIn("X-Profile-Id", self.predict(HTTP_X_PROFILE="1"))
+        with self.settings(PROFILING_ENABLED=True, PROFILING_TOKEN="s3cret"):
+            self.assertNotIn("X-Profile-Id", self.predict(HTTP_X_PROFILE="1"))
+            self.assertIn("X-Profile-Id", self.client.post(
+                "/model/predict/?profile=s3cret", self.record, content_type="application/json"
+            ))
+
+    def test_store_keeps_newest_profiles(self):
+        from .profiling import list_profiles
+
+        with self.settings(PROFILING_ENABLED=True, PROFILING_TOKEN="", PROFILE_MAX_FILES=2):
+            ids = [self.predict(HTTP_X_PROFILE="1")["X-Profile-Id"] for _ in range(3)]
+
+        self.assertEqual([details["id"] for details in list_profiles()], ids[:0:-1])
+
+    def test_admin_endpoints_require_staff(self):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from .views import download_request_profile, request_profiles
+
+        with self.settings(PROFILING_ENABLED=True, PROFILING_TOKEN=""):
+            profile_id = self.predict(HTTP_X_PROFILE="1")["X-Profile-Id"]
+        self.assertIn(self.client.get("/model/profiles/").status_code, (401, 403))
+
+        factory = APIRequestFactory()
+        staff = mock.Mock(is_staff=True, is_authenticated=True)
+        request = factory.get("/model/profiles/")
+        force_authenticate(request, user=staff)
+        self.assertEqual(request_profiles(request).data["profiles"][0]["id"], profile_id)
+
+        request = factory.get(f"/model/profiles/{profile_id}/")
+        force_authenticate(request, user=staff)
+        response = download_request_profile(request, profile_id=profile_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content))
+
+
+class PredictionPersistenceTests(TestCase):
+    def test_bulk_insert_converts_raw_values(self):
+        from .models import InsuranceData
+        from .persistence import persist_predictions
+
+        records = pd.DataFrame(sample_records()).assign(policy_no=range(5))
+        stored = persist_predictions(records, ["Fraud"] * 5, "v1", chunk_rows=2)
+
+        self.assertEqual(stored, 5)
+        rows = {row.policy_no: row for row in InsuranceData.objects.all()}
+        self.assertEqual(rows[0].date_of_death.date(), datetime.date(2020, 5, 1))  # same dayfirst reading as the model
+        self.assertIsNone(rows[2].date_of_death)
+        self.assertIsNone(rows[3].bank_code)
+        self.assertIsNone(rows[3].intimation_date)
+        self.assertEqual((rows[4].predicted_category, rows[4].model_version), ("Fraud", "v1"))
+        self.assertIsNotNone(rows[4].predicted_at)
+
+    def test_predict_file_and_predict_json_store_predictions(self):
+        from .models import InsuranceData
+        from . import views
+
+        upload = SimpleUploadedFile("claims.csv", pd.DataFrame(sample_records()).to_csv(index=False).encode())
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(views, "UPLOAD_DIR", tmp_dir), \
+                self.settings(PERSIST_PREDICTIONS=True, PREDICT_FILE_CHUNK_ROWS=2, PERSIST_CHUNK_ROWS=2):
+            self.assertEqual(self.client.post("/model/predict_file/", {"file": upload}).status_code, 200)
+            output = pd.read_csv(os.path.join(tmp_dir, "predicted_output.csv"))
+            response = self.client.post(
+                "/model/predict/", json.dumps(sample_records()[0], default=str), content_type="application/json"
+            )
+
+        stored = list(InsuranceData.objects.order_by("id").values_list("predicted_category", flat=True))
+        self.assertEqual(stored, output["Predicted"].tolist() + [response.json()["prediction"]])
+
+    def test_failed_upload_stores_nothing(self):
+        from .models import InsuranceData, PredictionSummary
+        from . import scoring, views
+
+        score_valid_rows = scoring.score_valid_rows
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise ValueError("disk full")
+            return score_valid_rows(*args, **kwargs)
+
+        upload = SimpleUploadedFile("claims.csv", pd.DataFrame(valid_records()).to_csv(index=False).encode())
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(views, "UPLOAD_DIR", tmp_dir), \
+                mock.patch.object(scoring, "score_valid_rows", fail_second_chunk), \
+                self.settings(PERSIST_PREDICTIONS=True, PREDICT_FILE_CHUNK_ROWS=2, PREDICT_FILE_CSV_READER="pandas"):
+            self.assertEqual(self.client.post("/model/predict_file/", {"file": upload}).status_code, 400)
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(InsuranceData.objects.exists())
+        self.assertFalse(PredictionSummary.objects.exists())
+
+
+class PredictionHistoryTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from .persistence import persist_predictions
+
+        records = pd.DataFrame(sample_records()).assign(policy_no=range(5))
+        records["channel"] = ["Retail Agency", "Bancassurance", "Retail Agency", "Retail Agency", "Bancassurance"]
+        day_one = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+        persist_predictions(records, ["Fraud", "Genuine", "Fraud", "Genuine", "Fraud"], "v1", day_one, chunk_rows=2)
+        persist_predictions(records.iloc[:2], ["Fraud", "Fraud"], "v2", day_one + datetime.timedelta(days=1))
+        self.client.force_login(User.objects.create_user("analyst", is_staff=True))
+
+    def test_requires_staff(self):
+        self.client.logout()
+
+        self.assertIn(self.client.get("/model/predictions/").status_code, (401, 403))
+        self.assertIn(self.client.get("/model/predictions/summary/").status_code, (401, 403))
+
+    def test_keyset_pages_cover_history_newest_first(self):
+        from .models import InsuranceData
+
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/model/predictions/", params).json()
+            ids += [row["id"] for row in page["results"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(ids, list(InsuranceData.objects.order_by("-id").values_list("id", flat=True)))
+        filtered = self.client.get("/model/predictions/", {"category": "Fraud", "until": "2024-03-01"}).json()
+        self.assertEqual([row["policy_no"] for row in filtered["results"]], [4, 2, 0])
+        self.assertEqual(self.client.get("/model/predictions/", {"cursor": "???"}).status_code, 400)
+
+    def test_summary_is_maintained_on_write(self):
+        from .models import PredictionSummary
+
+        by_category = self.client.get("/model/predictions/summary/", {"group_by": "predicted_category"}).json()
+        self.assertEqual(by_category["results"], [
+            {"predicted_category": "Fraud", "count": 5}, {"predicted_category": "Genuine", "count": 2},
+        ])
+        self.assertEqual(by_category["total"], 7)
+
+        day_one = self.client.get(
+            "/model/predictions/summary/", {"group_by": "channel", "since": "2024-03-01", "until": "2024-03-01"}
+        ).json()
+        self.assertEqual(day_one["results"], [
+            {"channel": "Bancassurance", "count": 2}, {"channel": "Retail Agency", "count": 3},
+        ])
+        retail_fraud = PredictionSummary.objects.get(
+            day=datetime.date(2024, 3, 1), channel="Retail Agency", predicted_category="Fraud"
+        )
+        self.assertEqual(retail_fraud.count, 2)  # rows 0 and 2, written in different chunks
+        self.assertEqual(self.client.get("/model/predictions/summary/", {"group_by": "city"}).status_code, 400)
+
+
+class SlowSignaturePool:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def predict_async(self, image_bytes, reference_number, filename="signature.png", timeout=None):
+        await asyncio.sleep(self.delay)
+        return (f"Similarity Score: 91.0% Matched {reference_number}",)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        from .registry import FeatureConfig, ModelHolder, publish_version
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.registry_dir = os.path.join(tmp_dir.name, "registry")
+        self.holder = ModelHolder(
+            self.registry_dir, MODEL_H5_PATH, "numpy", "float32",
+            builtin_npz_path=os.path.join(tmp_dir.name, "model.npz"),
+        )
+        for version in ("v1", "v2"):
+            features = FeatureConfig.from_config_module()
+            features.fraud_category = {label: f"{version} {name}" for label, name in features.fraud_category.items()}
+            publish_version(self.registry_dir, MODEL_H5_PATH, version=version, features=FeatureConfig(**features.as_dict()))
+
+    def test_only_serving_entry_points_follow_the_registry(self):
+        from . import scoring
+
+        self.assertIsNone(scoring.model_holder._watcher)
+        with mock.patch.object(scoring.model_holder, "start_watching") as start_watching:
+            for entry_point in ("fraud_detection.wsgi", "fraud_detection.asgi"):
+                importlib.reload(importlib.import_module(entry_point))
+        start_watching.assert_called_with(settings.MODEL_REGISTRY_POLL_SECONDS)
+
+    def test_activated_version_is_swapped_in_after_warming(self):
+        from . import registry
+        from .scoring import score_records
+
+        self.assertIsNone(self.holder.current.registry_version)
+        registry.activate_version(self.registry_dir, "v1")
+        self.holder.refresh(wait=True)
+        self.assertEqual(self.holder.current.version, "v1")
+
+        warming, release = threading.Event(), threading.Event()
+        original_warm = registry.LoadedModel.warm
+
+        def slow_warm(loaded):
+            warming.set()
+            release.wait(5)
+            original_warm(loaded)
+
+        registry.activate_version(self.registry_dir, "v2")
+        with mock.patch.object(registry.LoadedModel, "warm", slow_warm):
+            thread = self.holder.refresh()
+            self.assertTrue(warming.wait(5))
+            # The old version keeps serving while the new one loads
+            before, _ = score_records(pd.DataFrame(sample_records()), active=self.holder.current)
+            self.assertEqual(self.holder.status()["loading"], "v2")
+            release.set()
+            thread.join()
+
+        after, _ = score_records(pd.DataFrame(sample_records()), active=self.holder.current)
+        self.assertTrue(all(category.startswith("v1 ") for category in before))
+        self.assertEqual(list(after), [category.replace("v1 ", "v2 ", 1) for category in before])
+        self.assertEqual(self.holder.status()["active"], "v2")
+
+    def test_swap_closes_the_replaced_batcher(self):
+        from . import views
+        from .registry import activate_version
+
+        row = FeatureEncoder().encode(sample_records()[0])[0]
+        with mock.patch.object(views, "model_holder", self.holder), mock.patch.object(views, "_batcher", (None, None)), \
+                self.settings(PREDICT_BATCHING=True):
+            activate_version(self.registry_dir, "v1")
+            self.holder.refresh(wait=True)
+            old = self.holder.current
+            old_batcher = views.get_batcher(old)
+            old_batcher.submit(row)
+
+            activate_version(self.registry_dir, "v2")
+            self.holder.refresh(wait=True)
+            new_batcher = views.get_batcher(self.holder.current)
+            old_batcher._thread.join(5)
+
+            self.assertIsNot(new_batcher, old_batcher)
+            self.assertFalse(old_batcher._thread.is_alive())
+            # A request still holding the old version never brings its batcher back
+            self.assertIsNone(views.get_batcher(old))
+            self.assertIs(views.get_batcher(self.holder.current), new_batcher)
+            new_batcher.close()
+
+    def test_broken_version_keeps_the_current_model(self):
+        from .registry import MODEL_FILE, VERSIONS_DIR, activate_version, publish_version
+
+        activate_version(self.registry_dir, "v1")
+        self.holder.refresh(wait=True)
+        publish_version(self.registry_dir, MODEL_H5_PATH, version="v3")
+        with open(os.path.join(self.registry_dir, VERSIONS_DIR, "v3", MODEL_FILE), "wb") as f:
+            f.write(b"not a model")
+
+        activate_version(self.registry_dir, "v3")
+        self.holder.refresh(wait=True)
+
+        status = self.holder.status()
+        self.assertEqual(status["active"], "v1")
+        self.assertEqual(status["registry_active"], "v3")
+        self.assertTrue(status["last_error"].startswith("v3: "))
+        with self.assertRaises(ValueError):
+            activate_version(self.registry_dir, "missing")
+        with self.assertRaises(ValueError):
+            publish_version(self.registry_dir, MODEL_H5_PATH, version="v1")
+
+    def test_responses_name_the_model_version(self):
+        from .scoring import active_model
+
+        version = active_model().version
+        record = json.dumps(sample_records()[0], default=str)
+        batch = json.dumps(json_records(), default=str)
+
+        self.assertEqual(self.client.post("/model/predict/", record, content_type="application/json").json()["model_version"], version)
+        self.assertEqual(self.client.post("/model/predict_batch/", batch, content_type="application/json").json()["model_version"], version)
+        self.assertEqual(self.client.get("/model/models/").json()["active"], version)
+
+
+class AsyncServingTests(SimpleTestCase):
+    async def test_predict_stays_fast_while_signature_calls_are_slow(self):
+        from . import views
+
+        client = AsyncClient()
+        record = json.dumps(sample_records()[0], default=str)
+        warm = await client.post("/model/async/predict/", record, content_type="application/json")
+        sync = self.client.post("/model/predict/", record, content_type="application/json")
+        self.assertEqual(warm.json(), sync.json())
+
+        with mock.patch.object(views, "get_signature_pool", return_value=SlowSignaturePool(delay=1.0)):
+            signatures = [
+                asyncio.create_task(client.post("/model/async/verify_signature/", {
+                    "image": SimpleUploadedFile(f"{i}.png", b"scan"), "reference_number": str(i),
+                }))
+                for i in range(8)
+            ]
+            await asyncio.sleep(0.1)
+            started = time.perf_counter()
+            response = await client.post("/model/async/predict/", record, content_type="application/json")
+            predict_seconds = time.perf_counter() - started
+            results = await asyncio.gather(*signatures)
+
+        self.assertEqual(response.json(), sync.json())
+        self.assertLess(predict_seconds, 0.5)
+        self.assertEqual([r.json()["Result"] for r in results], ["Matched"] * 8)
+
+    async def test_upload_parsing_stays_off_the_event_loop(self):
+        from django.http.multipartparser import MultiPartParser
+        from . import views
+
+        parse = MultiPartParser.parse
+
+        def slow_parse(parser):
+            time.sleep(0.5)
+            return parse(parser)
+
+        client = AsyncClient()
+        record = json.dumps(sample_records()[0], default=str)
+        await client.post("/model/async/predict/", record, content_type="application/json")
+
+        with mock.patch.object(MultiPartParser, "parse", slow_parse), \
+                mock.patch.object(views, "score_upload", return_value={"rows": 0}), \
+                mock.patch.object(views, "get_signature_pool", return_value=SlowSignaturePool(delay=0)):
+            started = time.perf_counter()
+            uploads = [
+                asyncio.create_task(client.post("/model/async/predict_file/", {
+                    "file": SimpleUploadedFile("claims.csv", b"policy_no\n1\n"),
+                })),
+                asyncio.create_task(client.post("/model/async/verify_signature/", {
+                    "image": SimpleUploadedFile("1.png", b"scan"), "reference_number": "1",
+                })),
+            ]
+            await asyncio.sleep(0.1)
+            response = await client.post("/model/async/predict/", record, content_type="application/json")
+            predict_seconds = time.perf_counter() - started  # each parse sleeps 0.5s
+            scored, verified = await asyncio.gather(*uploads)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(predict_seconds, 0.4)
+        self.assertEqual(scored.json(), {"rows": 0})
+        self.assertEqual(verified.json()["Result"], "Matched")
+
+    def test_executor_refuses_work_beyond_its_bound(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=1)
+
+        async def run():
+            running = [asyncio.create_task(executor.run(time.sleep, 0.2)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(executor.stats()["waiting"], 1)
+            with self.assertRaises(ExecutorBusyError):
+                await executor.run(time.sleep, 0)
+            await asyncio.gather(*running)
+
+        asyncio.run(run())
+        self.assertEqual(executor.stats()["running"], 0)
+
+
+def json_records():
+    # Missing values travel as null in JSON
+    df = pd.DataFrame(sample_records())
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+class PredictBatchTests(SimpleTestCase):
+    def test_records_and_columns_score_like_predict(self):
+        records = json_records()
+        columns = {field: [record[field] for record in records] for field in records[0]}
+        single = [
+            self.client.post("/model/predict/", json.dumps(r, default=str), content_type="application/json").json()
+            for r in records
+        ]
+        # predict_json rejects records with a missing bank_code; the batch path scores them
+        scored = [i for i, s in enumerate(single) if "prediction" in s]
+
+        by_records = self.client.post(
+            "/model/predict_batch/?top_k=3", json.dumps(records, default=str), content_type="application/json"
+        ).json()
+        by_columns = self.client.post(
+            "/model/predict_batch/", json.dumps(columns, default=str), content_type="application/json"
+        ).json()
+
+        self.assertEqual(by_records["rows"], len(records))
+        self.assertEqual([by_records["predictions"][i]["prediction"] for i in scored], [single[i]["prediction"] for i in scored])
+        self.assertEqual(by_columns["predictions"], [{"prediction": p["prediction"]} for p in by_records["predictions"]])
+        for prediction in by_records["predictions"]:
+            top = prediction["top_k"]
+            self.assertEqual(len(top), 3)
+            self.assertEqual(top[0]["category"], prediction["prediction"])
+            self.assertEqual([t["probability"] for t in top], sorted((t["probability"] for t in top), reverse=True))
+
+    def test_limits_and_malformed_payloads(self):
+        records = json.dumps(json_records(), default=str)
+        post = lambda body, url="/model/predict_batch/": self.client.post(url, body, content_type="application/json")
+
+        with self.settings(BATCH_SCORING_MAX_RECORDS=2):
+            self.assertIn("Too many records", post(records).json()["error"])
+        with self.settings(BATCH_SCORING_MAX_BYTES=100):
+            self.assertEqual(post(records).status_code, 413)
+        malformed_length = self.client.generic(
+            "POST", "/model/predict_batch/", records, content_type="application/json", CONTENT_LENGTH="abc"
+        )
+        self.assertEqual(malformed_length.status_code, 400)
+        self.assertEqual(post("not json").status_code, 400)
+        self.assertEqual(post(records, "/model/predict_batch/?top_k=99").status_code, 400)
+        self.assertIn("same length", post(json.dumps({"assured_age": [1, 2], "premium": [1.0]})).json()["error"])
+        self.assertIn("Missing required columns", post(json.dumps([{"assured_age": 40}])).json()["error"])
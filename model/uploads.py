@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """
+    Stops reading a multipart upload as soon as one file passes UPLOAD_MAX_BYTES.
+
+    It runs first in FILE_UPLOAD_HANDLERS and passes every chunk on to the
+    memory and temporary-file handlers unchanged. An oversized upload is
+    dropped without reading the rest of the request body. The request is
+    marked so views can answer 413 (see upload_too_large).
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.UPLOAD_MAX_BYTES:
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def upload_too_large(request):
+    return getattr(request, "upload_too_large", False)
+
+
+def upload_source(uploaded_file):
+    """
+    What to hand to score_file for an upload: the temporary file's path when
+    it was streamed to disk, so it can be memory-mapped, or the file object.
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file
@@ -1,9 +1,29 @@
 from django.urls import path
-from .views import predict_json, predict_file, download_file, verify_signature
+from .views import (
+     predict_json, predict_batch, predict_file, download_file, verify_signature, verify_signature_bulk,
+     batching_stats, cache_stats, model_registry_status,
+     submit_scoring_job, scoring_job_status, download_job_output, request_profiles, download_request_profile,
+     prediction_history, prediction_summary_counts, predict_json_async, predict_file_async, verify_signature_async,
+)
 
 urlpatterns = [
      path("predict/", predict_json, name="predict_json"),
+     path('predict_batch/', predict_batch, name="predict_batch"),
      path('predict_file/', predict_file, name="predict_file"),
      path('download_file/', download_file, name="download_file"),
      path('verify_signature/', verify_signature, name="verify_signature"),
+     path('verify_signature_bulk/', verify_signature_bulk, name="verify_signature_bulk"),
+     path('batching_stats/', batching_stats, name="batching_stats"),
+     path('cache_stats/', cache_stats, name="cache_stats"),
+     path('models/', model_registry_status, name="model_registry_status"),
+     path('jobs/', submit_scoring_job, name="submit_scoring_job"),
+     path('jobs/<uuid:job_id>/', scoring_job_status, name="scoring_job_status"),
+     path('jobs/<uuid:job_id>/download/', download_job_output, name="download_job_output"),
+     path('profiles/', request_profiles, name="request_profiles"),
+     path('profiles/<str:profile_id>/', download_request_profile, name="download_request_profile"),
+     path('predictions/', prediction_history, name="prediction_history"),
+     path('predictions/summary/', prediction_summary_counts, name="prediction_summary_counts"),
+     path('async/predict/', predict_json_async, name="predict_json_async"),
+     path('async/predict_file/', predict_file_async, name="predict_file_async"),
+     path('async/verify_signature/', verify_signature_async, name="verify_signature_async"),
 ]
\ No newline at end of file
@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-from .config import MEAN_STD, MIN_MAX, ONE_HOT_COLUMNS, LABEL_ENCODINGS
+from .config import MEAN_STD, MIN_MAX, ONE_HOT_COLUMNS, LABEL_ENCODINGS, REQUIRED_COLUMNS, DATE_COLUMNS
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
-from gradio_client import Client, handle_file
+from .signature import get_signature_pool
+from .dates import DAY_FEATURES, day_difference, parse_date_column
+from .metrics import stage
 import requests
-import tempfile
 import re
 import os
 
@@ -24,18 +25,12 @@ def preprocess_dates(df):
     
     # print(f"Before date processing, shape: {df.shape}")
 
-    df["date_of_death"] = pd.to_datetime(df["date_of_death"], errors='coerce', dayfirst=True)
-    df["policy_risk_commencement_date"] = pd.to_datetime(df["policy_risk_commencement_date"], errors='coerce', dayfirst=True)
-    df["intimation_date"] = pd.to_datetime(df["intimation_date"], errors='coerce', dayfirst=True)
+    # Parse each date column once, with vectorized fixed-format parsing for the known layouts
+    dates = {col: parse_date_column(df[col]) for col in DATE_COLUMNS}
 
-
-    # Create new features (time differences in days)
-    df["policy_to_death_days"] = (df["date_of_death"] - df["policy_risk_commencement_date"]).dt.days
-    df["death_to_intimation_days"] = (df["intimation_date"] - df["date_of_death"]).dt.days
-    df["policy_to_intimation_days"] = (df["intimation_date"] - df["policy_risk_commencement_date"]).dt.days
-
-    # Fill missing values with -1
-    df.fillna({"policy_to_death_days": -1, "death_to_intimation_days": -1, "policy_to_intimation_days": -1}, inplace=True)
+    # Create new features (time differences in days, -1 where a date is missing)
+    for name, later, earlier in DAY_FEATURES:
+        df[name] = day_difference(dates[later], dates[earlier])
 
     # Drop original date columns
     df.drop(columns=["policy_risk_commencement_date", "date_of_death", "intimation_date"], inplace=True)
@@ -44,19 +39,19 @@ def preprocess_dates(df):
     
     return df
 
-def preprocess_numerical_columns(df):
+def preprocess_numerical_columns(df, mean_std=MEAN_STD, min_max=MIN_MAX):
     """
     Applies precomputed scaling statistics instead of fitting new scalers on a single-row input.
     """
     # print(f"Before numerical processing, shape: {df.shape}")
     
     # StandardScaler transformation
-    for col, (mean, std) in MEAN_STD.items():
+    for col, (mean, std) in mean_std.items():
         if col in df.columns:
             df[col] = (df[col] - mean) / std
 
     # MinMaxScaler transformation
-    for col, (min_val, max_val) in MIN_MAX.items():
+    for col, (min_val, max_val) in min_max.items():
         if col in df.columns:
             df[col] = (df[col] - min_val) / (max_val - min_val)
 
@@ -130,6 +125,40 @@ def preprocess_input(data):
     return X_input  
 
 
+def preprocess_batch(df, features=None):
+    """
+    Preprocesses a whole DataFrame of raw records in one pass.
+
+    Runs the same steps as preprocess_input over every row at once, so row i
+    of the result matches preprocess_input(df.iloc[i].to_dict()) when df holds
+    the REQUIRED_COLUMNS in training order.
+
+    Parameters:
+    df (pd.DataFrame): Raw input records with the REQUIRED_COLUMNS.
+    features (FeatureConfig): Feature config of the model version being served;
+    config.py when omitted.
+
+    Returns:
+    np.ndarray: Feature matrix of shape (len(df), n_features).
+    """
+    if features is None:
+        required_columns, mean_std, min_max = REQUIRED_COLUMNS, MEAN_STD, MIN_MAX
+        one_hot_columns, label_encodings = ONE_HOT_COLUMNS, LABEL_ENCODINGS
+    else:
+        required_columns, mean_std, min_max = features.required_columns, features.mean_std, features.min_max
+        one_hot_columns, label_encodings = features.one_hot_columns, features.label_encodings
+
+    df = df[required_columns].copy()
+    with stage("dates"):
+        df = preprocess_dates(df)
+    with stage("scaling"):
+        df = preprocess_numerical_columns(df, mean_std, min_max)
+    with stage("encoding"):
+        df = encode_categorical_features(df, one_hot_columns, label_encodings)
+
+    return df.to_numpy(dtype=np.float64)
+
+
 def parse_signature_result(result_list: list | tuple) -> dict:
     if not result_list or not isinstance(result_list, (list, tuple)):
         return {"Similarity score": "N/A", "Result": "N/A"}
@@ -150,24 +179,12 @@ def parse_signature_result(result_list: list | tuple) -> dict:
     }
 
 def frogery_test(image_file, reference_number):
-    # Create a temporary file to save the uploaded image
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        for chunk in image_file.chunks():
-            tmp.write(chunk)
-        tmp_path = tmp.name
-
-    try:
-        # Initialize Gradio Client
-        client = Client("Abhij12/signauth")
-
-        # Call Gradio API with the uploaded image and reference number
-        result = client.predict(
-            document_image=handle_file(tmp_path),
-            reference_number=reference_number,
-            api_name="/predict"
-        )
-        return result
-
-    finally:
-        # Clean up temp file
-        os.remove(tmp_path)
\ No newline at end of file
+    """
+    Sends an uploaded signature image to the verification Space and returns its raw result.
+
+    The image is read into memory and uploaded through the shared client pool,
+    so no temporary file or per-call client setup is needed.
+    """
+    image_bytes = b"".join(image_file.chunks())
+    filename = os.path.basename(getattr(image_file, "name", "") or "signature.png")
+    return get_signature_pool().predict(image_bytes, reference_number, filename=filename)
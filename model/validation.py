@@ -0,0 +1,141 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import DATE_COLUMNS
+from .dates import parse_date_column
+
+REASON_COLUMN = "Rejection reason"
+
+
+def numeric_columns(features):
+    """
+    Required columns holding numbers, as opposed to categories and dates.
+    """
+    categorical = set(features.label_encodings) | set(features.one_hot_columns) | set(DATE_COLUMNS)
+    return [col for col in features.required_columns if col not in categorical]
+
+
+def _to_float(raw):
+    # A plain cast is several times faster than to_numeric on strings; only a
+    # column holding a non-number needs the slower coercing parse
+    try:
+        return raw.astype("float64")
+    except (TypeError, ValueError):
+        return pd.to_numeric(raw, errors="coerce")
+
+
+def validate_records(df, features):
+    """
+    Checks raw records against the feature config in one vectorized pass per column.
+
+    Missing values are accepted, as the preprocessing handles them. A present
+    value is rejected if it is not a number or lies outside valid_ranges
+    (numeric columns), cannot be parsed as a date (DATE_COLUMNS), or is not one
+    of the known categories (label-encoded and one-hot columns).
+
+    Parameters:
+    df (pd.DataFrame): Raw records with the required columns.
+    features (FeatureConfig): Feature config of the model version scoring them.
+
+    Returns:
+    tuple: (clean, valid, reasons). clean holds the required columns with
+    numbers and dates already parsed, ready for preprocess_batch; valid is a
+    boolean array per row; reasons lists, for each invalid row in order, why
+    it was rejected.
+    """
+    clean = df[features.required_columns].copy()
+    checks = []
+
+    for col in numeric_columns(features):
+        raw = clean[col]
+        values = raw if pd.api.types.is_numeric_dtype(raw) else _to_float(raw)
+        checks.append((f"{col}: not a number", (raw.notna() & values.isna()).to_numpy()))
+        low, high = features.valid_ranges.get(col, (None, None))
+        if low is not None:
+            checks.append((f"{col}: below {low}", (values < low).to_numpy()))
+        if high is not None:
+            checks.append((f"{col}: above {high}", (values > high).to_numpy()))
+        clean[col] = values
+
+    for col in DATE_COLUMNS:
+        if col in clean.columns:
+            dates = parse_date_column(clean[col])
+            checks.append((f"{col}: not a date", (clean[col].notna() & dates.isna()).to_numpy()))
+            clean[col] = dates
+
+    categories = {**features.one_hot_columns, **features.label_encodings}
+    for col, known in categories.items():
+        if col in clean.columns:
+            raw = clean[col]
+            checks.append((f"{col}: unknown category", (raw.notna() & ~raw.isin(list(known))).to_numpy()))
+
+    invalid = np.zeros(len(clean), dtype=bool)
+    for _, mask in checks:
+        invalid |= mask
+
+    # Reasons are only assembled for the (usually few) rejected rows
+    rejected = np.flatnonzero(invalid)
+    reasons = [[] for _ in rejected]
+    for message, mask in checks:
+        for i in np.flatnonzero(mask[rejected]):
+            reasons[i].append(message)
+    return clean, ~invalid, ["; ".join(row_reasons) for row_reasons in reasons]
+
+
+class RejectedRows:
+    """
+    Collects the rows of an upload that failed validation into a CSV with the
+    original columns and a "Rejection reason" column.
+
+    Use as a context manager: the file is written to a ".part" file and renamed
+    into place on success; it is removed if scoring fails or nothing was
+    rejected, so a stale file from an earlier upload never lingers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.partial_path = path + ".part"
+        self.rows = 0
+        self._file = None
+
+    def write(self, df, reasons):
+        """
+        Appends raw records and their rejection reasons.
+        """
+        if self._file is None:
+            self._file = open(self.partial_path, "w", newline="")
+        df.assign(**{REASON_COLUMN: reasons}).to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(df)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is not None:
+            self._file.close()
+        if exc_type is None and self.rows:
+            os.replace(self.partial_path, self.path)
+            return
+        for path in (self.partial_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def quarantine(rejected, reasons, rejects):
+    """
+    Sends rows that failed validation to rejects, or raises if the caller keeps none.
+
+    Parameters:
+    rejected (callable): Returns the raw rejected rows as a DataFrame; only
+    called when there is somewhere to write them.
+    reasons (list): Rejection reason per row.
+    rejects (RejectedRows): Destination, or None to fail instead.
+
+    Raises:
+    ValueError: If rejects is None.
+    """
+    if rejects is None:
+        raise ValueError(f"{len(reasons)} invalid row(s), e.g. {reasons[0]}")
+    rejects.write(rejected(), reasons)
@@ -1,16 +1,35 @@
-import tensorflow as tf
 from django.http import HttpResponse, JsonResponse
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
-from .utils import preprocess_input, parse_signature_result, frogery_test
+from .utils import parse_signature_result, frogery_test
+from .batching import MicroBatcher
+from .scoring import active_model, model_holder, payload_frame, score_file, score_records, OUTPUT_EXTENSIONS
+from .cache import PredictionCache, SignatureResultCache
+from .signature import CircuitBreaker, get_signature_pool, open_bulk_archive, read_bulk_manifest, verify_bulk
+from .jobs import create_job, read_job_status, job_output_path
+from .metrics import count_rows, instrumented, stage
+from .profiling import list_profiles, profile_path, profile_text
+from .persistence import persist_predictions, prediction_persister
+from .history import prediction_page, prediction_summary
+from .executor import ExecutorBusyError, get_inference_executor
+from .registry import list_versions
+from .uploads import upload_source, upload_too_large
+from .validation import RejectedRows
 from rest_framework.response import Response
-from .config import FRAUD_CATEGORY
 from rest_framework import status
 from django.conf import settings
+from django.core.cache import caches
 from django.http import FileResponse, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from gradio_client import Client, handle_file
 import requests
 import tempfile
+import threading
+import asyncio
+import json
+import time
 import os
 import re
 import io
@@ -18,102 +37,267 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
-# Load model once when Django starts
-model_path = os.path.join(os.path.dirname(__file__), "model.h5")
-model = tf.keras.models.load_model(model_path)
-
 UPLOAD_DIR = os.path.join(settings.MEDIA_ROOT, "predicted_files") 
+# Rows of the last upload that failed validation, with their rejection reasons
+REJECTED_ROWS_FILE = "rejected_rows.csv"
 
-@api_view(["POST"])
-def predict_json(request):
+CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".parquet": "application/vnd.apache.parquet",
+    ".arrow": "application/vnd.apache.arrow.file",
+}
+
+SUPPORTED_UPLOADS_ERROR = "Only CSV, XLS/XLSX, Parquet or Arrow (.arrow/.feather) files are allowed."
+UPLOAD_TOO_LARGE_ERROR = "Uploaded file is larger than {} bytes."
+
+# Coalesces concurrent predict_json requests into shared model calls when enabled.
+# Only the serving version gets a batcher, so a batch never mixes rows for two
+# models; a replaced batcher is closed so its thread and model can be freed
+_batcher = (None, None)  # (model version, MicroBatcher)
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(active):
     """
-    API to receive input data, preprocess it, and return model predictions.
+    Returns the micro-batcher for a LoadedModel, or None when PREDICT_BATCHING
+    is off or active has already been replaced by a newer version (requests
+    still holding it then score their row directly).
     """
-    try:
-        # logger.info(f"Received request: {request.method} - {request.body}")
-        input_data = request.data  # Get JSON data from request
-        
-        # Step 1: Preprocess input using utils.py
-        processed_data = preprocess_input(input_data)
-        # print("processed data: ",processed_data)
+    global _batcher
+    if not settings.PREDICT_BATCHING:
+        return None
+    with _batchers_lock:
+        version, batcher = _batcher
+        if version == active.version:
+            return batcher
+        if active is not model_holder.current:
+            return None
+        if batcher is not None:
+            batcher.close()
+        batcher = MicroBatcher(
+            active.predict,
+            max_batch_size=settings.PREDICT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.PREDICT_BATCH_MAX_WAIT_MS,
+        )
+        _batcher = (active.version, batcher)
+        return batcher
+
+
+def get_prediction_cache(active):
+    """
+    Returns the shared predict_json result cache for a LoadedModel, or None when
+    PREDICTION_CACHE_ENABLED is off. Keys are tied to the model version.
+    """
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return None
+    return PredictionCache(caches["predictions"], active.version)
+
+
+signature_cache = (
+    SignatureResultCache(caches["signatures"], lease_timeout=settings.SIGNATURE_CONNECT_TIMEOUT + settings.SIGNATURE_READ_TIMEOUT)
+    if settings.SIGNATURE_CACHE_ENABLED else None
+)
 
-        # Step 2: Predict using the pre-trained model
-        predictions = model.predict(processed_data)
+# Shared by all bulk verification requests in this process, so an upstream
+# outage seen by one request makes the next ones fail fast too
+signature_breaker = CircuitBreaker(settings.SIGNATURE_BREAKER_FAILURES, settings.SIGNATURE_BREAKER_RESET_SECONDS)
+
+
+def score_record(input_data, active):
+    """
+    Scores one raw record with a LoadedModel and returns its fraud category,
+    using the batcher and prediction cache when enabled. Shared by the sync and
+    async predict views.
+    """
+    batcher = get_batcher(active)
+    prediction_cache = get_prediction_cache(active)
+
+    # Step 1: Encode the record with the model version's precompiled feature plan
+    with stage("preprocess"):
+        processed_data = active.encoder.encode(input_data)
+    # print("processed data: ",processed_data)
+
+    # Step 2: Predict using the pre-trained model, unless this record was scored before
+    predicted_class = None
+    if prediction_cache is not None:
+        with stage("cache"):
+            predicted_class = prediction_cache.get(processed_data)
+    if predicted_class is None:
+        with stage("predict"):
+            if batcher is not None:
+                predictions = batcher.submit(processed_data[0])[np.newaxis]
+            else:
+                predictions = active.predict(processed_data)
+        count_rows(1)
 
         # Step 3: Convert predictions to a readable format
         predicted_class = int(np.argmax(predictions, axis=1)[0])
         # print("predicted class: ", predicted_class)
 
-        fraud_category = FRAUD_CATEGORY[predicted_class]
-        return Response({"prediction": fraud_category}, status=200)    
+        if prediction_cache is not None:
+            prediction_cache.set(processed_data, predicted_class)
+
+    fraud_category = active.features.fraud_category[predicted_class]
+    if settings.PERSIST_PREDICTIONS:
+        with stage("persist"):
+            persist_predictions(pd.DataFrame([input_data]), [fraud_category], active.version)
+    return fraud_category
+
+
+@instrumented("predict")
+@api_view(["POST"])
+def predict_json(request):
+    """
+    API to receive input data, preprocess it, and return model predictions.
+    """
+    try:
+        # logger.info(f"Received request: {request.method} - {request.body}")
+        with stage("parse"):
+            input_data = request.data  # Get JSON data from request
+
+        active = active_model()
+        return Response({"prediction": score_record(input_data, active), "model_version": active.version}, status=200)
     
     except Exception as e:
         return Response({"error": str(e)}, status=400)
 
 
+@instrumented("predict_batch")
 @api_view(["POST"])
-def predict_file(request):
+def predict_batch(request):
     """
-    Upload a CSV/XLS file, preprocess it, generate predictions,
-    save the processed file, and return it to the frontend.
+    Score a batch of records sent as JSON, either a list of records or an
+    object of columns (field -> list of values), in one vectorized pass.
+
+    Pass ?top_k=N to also get the N most likely categories of each record
+    with their probabilities.
     """
+    # DATA_UPLOAD_MAX_MEMORY_SIZE does not cover JSON bodies, so the body is read
+    # here, at most one byte past the limit, instead of trusting Content-Length
+    # (which may be missing, e.g. for a chunked request, or malformed)
+    body = request.stream.read(settings.BATCH_SCORING_MAX_BYTES + 1) if request.stream is not None else b""
+    if len(body) > settings.BATCH_SCORING_MAX_BYTES:
+        return Response(
+            {"error": f"Request body is larger than {settings.BATCH_SCORING_MAX_BYTES} bytes"},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
     try:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        top_k = int(request.query_params.get("top_k", 0))
+    except ValueError:
+        return Response({"error": "top_k must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    active = active_model()
+    n_categories = len(active.features.fraud_category)
+    if not 0 <= top_k <= n_categories:
+        return Response({"error": f"top_k must be between 0 and {n_categories}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get the uploaded file
-        uploaded_file = request.FILES.get("file")
-        if not uploaded_file:
-            return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        with stage("parse"):
+            payload = json.loads(body)
+            df = payload_frame(payload, settings.BATCH_SCORING_MAX_RECORDS, active.features.required_columns)
+        categories, top = score_records(df, top_k, active)
+        count_rows(len(df))
+        if settings.PERSIST_PREDICTIONS:
+            with stage("persist"):
+                persist_predictions(df, categories, active.version)
 
-        # Validate file format
-        if not uploaded_file.name.endswith((".csv", ".xls", ".xlsx")):
-            return Response({"error": "Only CSV or XLS/XLSX files are allowed."}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Read the file into a DataFrame
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-
-        # Ensure required columns exist
-        required_columns = [
-            "assured_age", "nominee_relation", "occupation", "policy_sum_assured", "premium",
-            "premium_payment_mode", "annual_income", "holder_marital_status", "indiv_requirement_flag",
-            "policy_term", "policy_payment_term", "product_type", "channel", "bank_code",
-            "policy_risk_commencement_date", "date_of_death", "intimation_date", "status", "sub_status"
+    if top is None:
+        predictions = [{"prediction": category} for category in categories]
+    else:
+        predictions = [
+            {"prediction": category, "top_k": [{"category": name, "probability": p} for name, p in ranked]}
+            for category, ranked in zip(categories, top)
         ]
+    return Response(
+        {"rows": len(predictions), "model_version": active.version, "predictions": predictions},
+        status=status.HTTP_200_OK,
+    )
 
-        if not all(col in df.columns for col in required_columns):
-            return Response({"error": "Missing required columns"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Process each row and generate predictions
-        predictions = []
-        for _, row in df.iterrows():
-            processed_input = preprocess_input(row.to_dict())  # Preprocess the row
+@api_view(["GET"])
+def batching_stats(request):
+    """
+    Report batch-size and queue-wait statistics of the predict_json micro-batcher
+    for the model version being served.
+    """
+    batcher = get_batcher(active_model())
+    if batcher is None:
+        return Response({"enabled": False}, status=status.HTTP_200_OK)
+    return Response({"enabled": True, **batcher.stats()}, status=status.HTTP_200_OK)
+
 
-            # final_features = get_final_features(processed_input)  # Get final array of values
+@api_view(["GET"])
+def cache_stats(request):
+    """
+    Report this worker's hit/miss counts for the shared predict_json result cache
+    (fraud_prediction_cache_lookups_total covers all workers).
+    """
+    prediction_cache = get_prediction_cache(active_model())
+    if prediction_cache is None:
+        return Response({"enabled": False}, status=status.HTTP_200_OK)
+    return Response({"enabled": True, **prediction_cache.stats()}, status=status.HTTP_200_OK)
 
-            prediction = model.predict(processed_input)  # Model outputs an integer
-            predicted_class = int(np.argmax(prediction, axis=1)[0])
 
-            fraud_category = FRAUD_CATEGORY[predicted_class]
-            
-            predictions.append(fraud_category)  # Append category name
+def score_upload(uploaded_file):
+    """
+    Streams an uploaded file through preprocessing and scoring chunk by chunk,
+    saves the scored output and returns the response body. Shared by the sync
+    and async predict_file views.
 
-        # Append fraud category predictions to DataFrame
-        df["Predicted"] = predictions
+    Rows that fail validation are left out of the output and saved with their
+    rejection reasons for download with ?file_format=rejected.
+    """
+    active = active_model()
+    file_extension = OUTPUT_EXTENSIONS[os.path.splitext(uploaded_file.name)[1].lower()]
+    output_filename = os.path.join(UPLOAD_DIR, f"predicted_output{file_extension}")
+    started = time.perf_counter()
+    with prediction_persister(active.version) as on_scored, \
+            RejectedRows(os.path.join(UPLOAD_DIR, REJECTED_ROWS_FILE)) as rejects:
+        rows = score_file(
+            upload_source(uploaded_file), uploaded_file.name, output_filename,
+            on_scored=on_scored, active=active, rejects=rejects,
+        )
+    elapsed = time.perf_counter() - started
+    count_rows(rows)
+
+    return {
+        "message": "Successfully processed the file",
+        "rows": rows,
+        "rejected_rows": rejects.rows,
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "model_version": active.version,
+    }
+
+
+@instrumented("predict_file")
+@api_view(["POST"])
+def predict_file(request):
+    """
+    Upload a CSV/XLS/Parquet/Arrow file, preprocess it, generate predictions,
+    save the processed file, and return it to the frontend.
+    """
+    try:
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-        # Save the processed file
-        file_extension = ".csv" if uploaded_file.name.endswith(".csv") else ".xlsx"
-        output_filename = os.path.join(UPLOAD_DIR, f"predicted_output{file_extension}")
+        # Get the uploaded file
+        with stage("parse"):
+            uploaded_file = request.FILES.get("file")
+        if upload_too_large(request):
+            return Response(
+                {"error": UPLOAD_TOO_LARGE_ERROR.format(settings.UPLOAD_MAX_BYTES)},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if not uploaded_file:
+            return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if file_extension == ".csv":
-            df.to_csv(output_filename, index=False)
-        else:
-            df.to_excel(output_filename, index=False)
+        # Validate file format
+        if not uploaded_file.name.lower().endswith(tuple(OUTPUT_EXTENSIONS)):
+            return Response({"error": SUPPORTED_UPLOADS_ERROR}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Return JSON response
-        return Response({"message": "Successfully processed the file"}, status=status.HTTP_200_OK)
+        return Response(score_upload(uploaded_file), status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -123,21 +307,34 @@ def predict_file(request):
 def download_file(request):
     """
     Serve the processed file from the predicted_output folder for download.
+    Pass ?file_format=csv|xlsx|parquet|arrow to pick a format, or
+    ?file_format=rejected for the rows the last upload rejected.
     """
     try:
-        file_path_csv = os.path.join(UPLOAD_DIR, "predicted_output.csv")
-        file_path_excel = os.path.join(UPLOAD_DIR, "predicted_output.xlsx")
-
-        # Choose which file exists (CSV or Excel)
-        if os.path.exists(file_path_csv):
-            file_path = file_path_csv
-            content_type = 'text/csv'
-        elif os.path.exists(file_path_excel):
-            file_path = file_path_excel
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        # Serve the requested format, or else the most recently written output
+        requested_format = request.query_params.get("file_format")
+        if requested_format == "rejected":
+            file_path = os.path.join(UPLOAD_DIR, REJECTED_ROWS_FILE)
+            if not os.path.exists(file_path):
+                raise FileNotFoundError("The last upload had no rejected rows.")
+            response = FileResponse(open(file_path, 'rb'), content_type=CONTENT_TYPES[".csv"])
+            response['Content-Disposition'] = f'attachment; filename="{REJECTED_ROWS_FILE}"'
+            return response
+        if requested_format:
+            extensions = [f".{requested_format.lower()}"]
+            if extensions[0] not in CONTENT_TYPES:
+                return Response({"error": f"Unknown format: {requested_format}"}, status=status.HTTP_400_BAD_REQUEST)
         else:
+            extensions = list(CONTENT_TYPES)
+
+        candidates = [os.path.join(UPLOAD_DIR, f"predicted_output{extension}") for extension in extensions]
+        candidates = [path for path in candidates if os.path.exists(path)]
+        if not candidates:
             raise FileNotFoundError("No processed file found to download.")
 
+        file_path = max(candidates, key=os.path.getmtime)
+        content_type = CONTENT_TYPES[os.path.splitext(file_path)[1]]
+
         response = FileResponse(open(file_path, 'rb'), content_type=content_type)
         response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
         return response
@@ -148,6 +345,60 @@ def download_file(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)    
     
 
+@instrumented("submit_scoring_job")
+@api_view(["POST"])
+def submit_scoring_job(request):
+    """
+    Upload a CSV/XLS/Parquet/Arrow file for background scoring and return the job ID
+    used to poll its progress and download its output.
+    """
+    try:
+        uploaded_file = request.FILES.get("file")
+        if upload_too_large(request):
+            return Response(
+                {"error": UPLOAD_TOO_LARGE_ERROR.format(settings.UPLOAD_MAX_BYTES)},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if not uploaded_file:
+            return Response({"error": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not uploaded_file.name.lower().endswith(tuple(OUTPUT_EXTENSIONS)):
+            return Response({"error": SUPPORTED_UPLOADS_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+
+        job_id = create_job(uploaded_file)
+        return Response({"job_id": job_id, "status": "queued"}, status=status.HTTP_202_ACCEPTED)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def scoring_job_status(request, job_id):
+    """
+    Report the state and progress (rows done, rows per second) of a scoring job.
+    """
+    job_status = read_job_status(job_id)
+    if job_status is None:
+        return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job_status, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+def download_job_output(request, job_id):
+    """
+    Serve the output file of a finished scoring job, or its rejected rows with ?output=rejected.
+    """
+    rejected = request.query_params.get("output") == "rejected"
+    file_path = job_output_path(job_id, rejected=rejected)
+    if file_path is None or not os.path.exists(file_path):
+        return Response({"error": "No finished output for this job."}, status=status.HTTP_404_NOT_FOUND)
+
+    prefix = "rejected" if rejected else "predicted"
+    response = FileResponse(open(file_path, 'rb'), content_type=CONTENT_TYPES[os.path.splitext(file_path)[1]])
+    response['Content-Disposition'] = f'attachment; filename="{prefix}_{job_id}{os.path.splitext(file_path)[1]}"'
+    return response
+
+
 # def parse_signature_result(result_list: list | tuple) -> dict:
 #     if not result_list or not isinstance(result_list, (list, tuple)):
 #         return {"Similarity score": "N/A", "Result": "N/A"}
@@ -190,6 +441,7 @@ def download_file(request):
 #         # Clean up temp file
 #         os.remove(tmp_path)
 
+@instrumented("verify_signature")
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])  # Handle form data with file uploads
 def verify_signature(request):
@@ -198,8 +450,9 @@ def verify_signature(request):
     calls the Gradio API via frogery_test, and returns the result.
     """
     try:
-        image_file = request.FILES.get('image')
-        reference_number = request.data.get('reference_number')
+        with stage("parse"):
+            image_file = request.FILES.get('image')
+            reference_number = request.data.get('reference_number')
 
         if not image_file or not reference_number:
             return Response({'error': 'Image and reference_number are required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -209,13 +462,274 @@ def verify_signature(request):
         except ValueError:
             return Response({'error': 'reference_number must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Call the function
-        result = frogery_test(image_file, reference_number)
-        print("Raw API result:", result)
-        parsed_result = parse_signature_result(result)
-        print("Parsed result: ", parsed_result)
+        def verify():
+            with stage("remote"):
+                result = frogery_test(image_file, reference_number)
+            logger.debug(f"Raw signature API result: {result}")
+            return parse_signature_result(result)
+
+        if signature_cache is not None:
+            image_bytes = b"".join(image_file.chunks())
+            with stage("cache"):
+                parsed_result = signature_cache.get_or_verify(image_bytes, reference_number, verify)
+        else:
+            parsed_result = verify()
         return Response(parsed_result, status=status.HTTP_200_OK)
 
     except Exception as e:
         logger.error(f"Error in verify_signature: {e}")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def verify_signature_bytes(image_bytes, reference_number, filename, timeout):
+    """
+    Verifies one image through the client pool, reusing cached results when the signature cache is enabled.
+    """
+    def verify():
+        with stage("remote", endpoint="verify_signature_bulk"):
+            result = get_signature_pool().predict(image_bytes, reference_number, filename=filename, timeout=timeout)
+        return parse_signature_result(result)
+
+    if signature_cache is not None:
+        return signature_cache.get_or_verify(image_bytes, reference_number, verify)
+    return verify()
+
+
+@instrumented("verify_signature_bulk")
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def verify_signature_bulk(request):
+    """
+    Accepts a zip of signature images and a manifest CSV (filename, reference_number),
+    verifies every row concurrently and returns a per-row result table.
+
+    The manifest can be uploaded as 'manifest' or included in the zip as manifest.csv.
+    Pass ?file_format=csv to get the table as a CSV download instead of JSON.
+    """
+    try:
+        images = request.FILES.get('images')
+        if upload_too_large(request):
+            return Response(
+                {'error': UPLOAD_TOO_LARGE_ERROR.format(settings.UPLOAD_MAX_BYTES)},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if not images:
+            return Response({'error': 'A zip of images is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            archive = open_bulk_archive(images)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with archive:
+            try:
+                items = read_bulk_manifest(
+                    archive, request.FILES.get('manifest'), settings.SIGNATURE_BULK_MAX_ITEMS,
+                    max_file_bytes=settings.SIGNATURE_BULK_MAX_FILE_BYTES,
+                    max_total_bytes=settings.SIGNATURE_BULK_MAX_TOTAL_BYTES,
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            results = verify_bulk(
+                archive, items, verify_signature_bytes, signature_breaker,
+                max_workers=settings.SIGNATURE_BULK_CONCURRENCY,
+                timeout=settings.SIGNATURE_BULK_ITEM_TIMEOUT,
+                retries=settings.SIGNATURE_BULK_RETRIES,
+            )
+
+        if request.query_params.get('file_format') == 'csv':
+            response = HttpResponse(pd.DataFrame(results).to_csv(index=False), content_type=CONTENT_TYPES['.csv'])
+            response['Content-Disposition'] = 'attachment; filename="signature_results.csv"'
+            return response
+
+        verified = sum(result['status'] == 'ok' for result in results)
+        return Response({
+            'results': results,
+            'verified': verified,
+            'failed': len(results) - verified,
+            'circuit': signature_breaker.state,
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error in verify_signature_bulk: {e}")
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def request_profiles(request):
+    """
+    List stored request profiles, newest first (staff only).
+    """
+    return Response({"enabled": settings.PROFILING_ENABLED, "profiles": list_profiles()}, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def download_request_profile(request, profile_id):
+    """
+    Download a stored request profile as a .prof file for pstats/snakeviz (staff only).
+    Pass ?file_format=text for the top functions by cumulative time instead.
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise Http404("Profile not found.")
+
+    if request.query_params.get("file_format") == "text":
+        return HttpResponse(profile_text(path), content_type="text/plain")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=f"{profile_id}.prof")
+
+
+@api_view(["GET"])
+def model_registry_status(request):
+    """
+    Report the model version this worker serves, any reload in progress or
+    failed, and the versions published to the model registry.
+    """
+    return Response(
+        {**model_holder.status(), "versions": list_versions(settings.MODEL_REGISTRY_DIR)},
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def prediction_history(request):
+    """
+    List stored predictions, newest first, one page at a time (staff only,
+    as rows hold the full claim records).
+
+    Pass the returned next_cursor as ?cursor= to get the following page. Filter
+    with ?category=, ?channel=, ?product_type=, ?model_version= and ?since= /
+    ?until= (days, inclusive); ?limit= sets the page size.
+    """
+    try:
+        return Response(prediction_page(request.query_params), status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def prediction_summary_counts(request):
+    """
+    Count stored predictions per day, channel, product type and fraud category (staff only).
+
+    Reads the incrementally maintained summary table. Pick dimensions with
+    ?group_by=day,predicted_category and filter like prediction_history.
+    """
+    try:
+        return Response(prediction_summary(request.query_params), status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Async versions of the scoring and signature endpoints, for ASGI servers.
+# Blocking work runs on the bounded inference executor and the remote
+# verifier is awaited, so a slow signature check never holds up scoring.
+
+@instrumented("predict_async")
+@csrf_exempt
+@require_POST
+async def predict_json_async(request):
+    """
+    Async version of predict_json; encoding and inference run on the inference executor.
+    """
+    try:
+        with stage("parse"):
+            input_data = json.loads(request.body)
+        active = active_model()
+        fraud_category = await get_inference_executor().run(score_record, input_data, active)
+        return JsonResponse({"prediction": fraud_category, "model_version": active.version}, status=200)
+
+    except ExecutorBusyError as e:
+        return JsonResponse({"error": str(e)}, status=503, headers={"Retry-After": "1"})
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+
+def score_upload_request(request):
+    """
+    Parses a predict_file_async upload and scores it, returning (body, status).
+    Runs whole on the inference executor: parsing spools large uploads to disk.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    with stage("parse"):
+        uploaded_file = request.FILES.get("file")
+    if upload_too_large(request):
+        return {"error": UPLOAD_TOO_LARGE_ERROR.format(settings.UPLOAD_MAX_BYTES)}, 413
+    if not uploaded_file:
+        return {"error": "No file uploaded."}, 400
+    if not uploaded_file.name.lower().endswith(tuple(OUTPUT_EXTENSIONS)):
+        return {"error": SUPPORTED_UPLOADS_ERROR}, 400
+
+    return score_upload(uploaded_file), 200
+
+
+def read_signature_upload(request):
+    """
+    Parses a verify_signature_async form into (image_bytes, reference_number, filename).
+    Raises ValueError with the client-facing message when a field is missing or malformed.
+    """
+    with stage("parse"):
+        image_file = request.FILES.get("image")
+        reference_number = request.POST.get("reference_number")
+
+    if not image_file or not reference_number:
+        raise ValueError("Image and reference_number are required")
+    try:
+        reference_number = int(reference_number)
+    except ValueError:
+        raise ValueError("reference_number must be an integer") from None
+
+    return b"".join(image_file.chunks()), reference_number, os.path.basename(image_file.name or "signature.png")
+
+
+@instrumented("predict_file_async")
+@csrf_exempt
+@require_POST
+async def predict_file_async(request):
+    """
+    Async version of predict_file; the upload is parsed and scored on the inference executor.
+    """
+    try:
+        body, status_code = await get_inference_executor().run(score_upload_request, request)
+        return JsonResponse(body, status=status_code)
+
+    except ExecutorBusyError as e:
+        return JsonResponse({"error": str(e)}, status=503, headers={"Retry-After": "1"})
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+
+@instrumented("verify_signature_async")
+@csrf_exempt
+@require_POST
+async def verify_signature_async(request):
+    """
+    Async version of verify_signature; the form is parsed on a worker thread and
+    the upload and the remote prediction are awaited on the event loop.
+    """
+    try:
+        try:
+            image_bytes, reference_number, filename = await asyncio.to_thread(read_signature_upload, request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        async def verify():
+            with stage("remote"):
+                result = await get_signature_pool().predict_async(image_bytes, reference_number, filename=filename)
+            logger.debug(f"Raw signature API result: {result}")
+            return parse_signature_result(result)
+
+        if signature_cache is not None:
+            with stage("cache"):
+                parsed_result = await signature_cache.get_or_verify_async(image_bytes, reference_number, verify)
+        else:
+            parsed_result = await verify()
+        return JsonResponse(parsed_result, status=200)
+
+    except Exception as e:
+        logger.error(f"Error in verify_signature_async: {e!r}")
+        return JsonResponse({"error": str(e)}, status=500)